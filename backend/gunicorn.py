@@ -0,0 +1,16 @@
+"""
+Gunicorn settings for ``run.py`` with RUN_SERVER=gunicorn.
+
+The arbiter does not load Django (no ``--preload``), so the hooks only use
+the environment ``backend.settings`` exported for the workers.
+"""
+
+import os
+
+
+def child_exit(server, worker):
+    # Restarted and recycled workers leave their live gauge samples behind
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
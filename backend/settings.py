@@ -35,10 +35,16 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "backend.urls"
 
+EMAIL_TEMPLATES_ROOT = BASE_DIR / "templates"
+EMAIL_TEMPLATES_GLOB = "emails/**/*.html"
+MJML_ARTIFACT_DIR = Path(os.getenv("MJML_ARTIFACT_DIR", BASE_DIR / "build" / "templates"))
+MJML_USE_PRECOMPILED = os.getenv("MJML_USE_PRECOMPILED", "True").lower() == "true"
+MJML_PRECOMPILE_ON_STARTUP = os.getenv("MJML_PRECOMPILE_ON_STARTUP", "False").lower() == "true"
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [BASE_DIR / "templates"],
+        "DIRS": [BASE_DIR / "templates", MJML_ARTIFACT_DIR],
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -52,13 +58,58 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "backend.wsgi.application"
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+SQLITE_PATH = Path(os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"))
+# Optional separate file for django-q's OrmQ queue table, see tasks.routers
+SQLITE_BROKER_PATH = os.getenv("SQLITE_BROKER_PATH")
+
+# Opt-in profile for the web process and the cluster writing concurrently
+SQLITE_HIGH_CONCURRENCY = os.getenv("SQLITE_HIGH_CONCURRENCY", "False").lower() == "true"
+SQLITE_TUNED_OPTIONS = {
+    "init_command": ";".join(
+        [
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+            f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}",
+            # Negative cache_size is in KiB
+            f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_KB', '65536'))}",
+        ]
+    ),
+    # Take the write lock up front instead of failing to upgrade a read lock
+    "transaction_mode": "IMMEDIATE",
+    "timeout": float(os.getenv("SQLITE_BUSY_TIMEOUT", "20")),
 }
 
+
+def sqlite_database(name):
+    database = {"ENGINE": "django.db.backends.sqlite3", "NAME": name}
+    if SQLITE_HIGH_CONCURRENCY:
+        database["OPTIONS"] = SQLITE_TUNED_OPTIONS
+    return database
+
+
+DATABASES = {"default": sqlite_database(SQLITE_PATH)}
+if SQLITE_BROKER_PATH:
+    DATABASES["broker"] = sqlite_database(SQLITE_BROKER_PATH)
+    DATABASE_ROUTERS = ["tasks.routers.BrokerRouter"]
+
+# Local memory by default; set CACHE_URL (e.g. redis://localhost:6379/0) to
+# share cached task results between the web and cluster processes
+CACHE_URL = os.getenv("CACHE_URL")
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -84,17 +135,137 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 Q_CLUSTER = {
     "name": "django-q",
-    "workers": 4,
+    "workers": int(os.getenv("Q_CLUSTER_WORKERS", "4")),
     "recycle": 500,
-    "timeout": 60,
+    "timeout": int(os.getenv("Q_CLUSTER_TIMEOUT", "60")),
     "retry": 120,
     "queue_limit": 50,
     "bulk": 10,
-    "orm": "default",
+    "save_limit": int(os.getenv("Q_CLUSTER_SAVE_LIMIT", "250")),
+    # Clusters started with Q_CLUSTER_NAME=<name> run with these overrides
+    "ALT_CLUSTERS": {},
 }
 
+# Task lanes: named queues that shared_task(queue=...) routes to, each run by
+# its own cluster (Q_CLUSTER_NAME=<lane> manage.py qcluster) with its own
+# workers and queue limit. Unrouted tasks and schedules stay on "django-q".
+TASK_LANES_ENABLED = os.getenv("TASK_LANES_ENABLED", "False").lower() == "true"
+# Concurrent tasks per qcluster_async worker
+TASK_ASYNC_CONCURRENCY = int(os.getenv("TASK_ASYNC_CONCURRENCY", "200"))
+TASK_LANES = {
+    "email": {
+        "workers": int(os.getenv("Q_EMAIL_WORKERS", "2")),
+        "queue_limit": int(os.getenv("Q_EMAIL_QUEUE_LIMIT", "20")),
+        "timeout": 60,
+        "retry": 120,
+    },
+    "long": {
+        "workers": int(os.getenv("Q_LONG_WORKERS", "4")),
+        "queue_limit": int(os.getenv("Q_LONG_QUEUE_LIMIT", "8")),
+        # sample_task sleeps up to 300 seconds
+        "timeout": 330,
+        "retry": 360,
+    },
+    # Run by `manage.py qcluster_async`: each worker awaits up to
+    # "concurrency" async tasks at once
+    "io": {
+        "workers": int(os.getenv("Q_IO_WORKERS", "1")),
+        "timeout": 330,
+        "retry": 360,
+        "concurrency": TASK_ASYNC_CONCURRENCY,
+    },
+}
+# Lane for shared_task(priority=...) when no queue is given
+TASK_PRIORITY_LANES = {"high": "email", "low": "long"}
+if TASK_LANES_ENABLED:
+    Q_CLUSTER["ALT_CLUSTERS"] = TASK_LANES
+
+# Broker backend: "orm" (default database), "redis" (Q_REDIS_URL) or "disk",
+# a file-per-task queue under Q_DISK_BROKER_PATH for tests and benchmarks
+Q_BROKER = os.getenv("Q_BROKER", "orm")
+Q_REDIS_URL = os.getenv("Q_REDIS_URL", "redis://localhost:6379/0")
+Q_DISK_BROKER_PATH = Path(os.getenv("Q_DISK_BROKER_PATH", BASE_DIR / "build" / "queue"))
+
+if Q_BROKER == "orm":
+    Q_CLUSTER["orm"] = "broker" if "broker" in DATABASES else "default"
+elif Q_BROKER == "redis":
+    Q_CLUSTER["redis"] = Q_REDIS_URL
+elif Q_BROKER == "disk":
+    Q_CLUSTER["broker_class"] = "tasks.brokers.DiskBroker"
+else:
+    raise ValueError(f"Unknown Q_BROKER {Q_BROKER!r}, expected orm, redis or disk")
+
+TASK_BATCH_CHUNK_SIZE = int(os.getenv("TASK_BATCH_CHUNK_SIZE", "500"))
+TASK_BATCH_MAX_SIZE = int(os.getenv("TASK_BATCH_MAX_SIZE", "10000"))
+TASK_RESULTS_CHUNK_SIZE = int(os.getenv("TASK_RESULTS_CHUNK_SIZE", "500"))
+TASK_RESULTS_MAX_IDS = int(os.getenv("TASK_RESULTS_MAX_IDS", "10000"))
+TASK_RESULT_CACHE = "default"
+TASK_RESULT_CACHE_TTL = int(os.getenv("TASK_RESULT_CACHE_TTL", "3600"))
+TASK_RESULT_NEGATIVE_TTL = int(os.getenv("TASK_RESULT_NEGATIVE_TTL", "2"))
+TASK_RESULT_POLL_INTERVAL = float(os.getenv("TASK_RESULT_POLL_INTERVAL", "0.25"))
+TASK_RESULT_MAX_WAIT = float(os.getenv("TASK_RESULT_MAX_WAIT", "60"))
+TASK_RESULT_SSE_KEEPALIVE = float(os.getenv("TASK_RESULT_SSE_KEEPALIVE", "15"))
+# shared_task(result_storage="compress"|"spill"): results whose pickle exceeds
+# TASK_RESULT_COMPRESS_BYTES are compressed with TASK_RESULT_CODEC (zlib, or
+# zstd when zstandard is installed); "spill" writes JSON results over
+# TASK_RESULT_SPILL_BYTES to a content-addressed file under TASK_RESULT_STORE_DIR
+TASK_RESULT_COMPRESS_BYTES = int(os.getenv("TASK_RESULT_COMPRESS_BYTES", str(16 * 1024)))
+TASK_RESULT_SPILL_BYTES = int(os.getenv("TASK_RESULT_SPILL_BYTES", str(1024 * 1024)))
+TASK_RESULT_CODEC = os.getenv("TASK_RESULT_CODEC", "zlib")
+TASK_RESULT_STORE_DIR = Path(os.getenv("TASK_RESULT_STORE_DIR", BASE_DIR / "build" / "results"))
+# Task table retention, enforced by manage.py prune_tasks or the prune_tasks
+# IntervalSchedule (AUTO_CREATE_PRUNE_SCHEDULE). 0 disables a rule. Rows are
+# deleted TASK_PRUNE_CHUNK_SIZE at a time with TASK_PRUNE_PAUSE seconds between
+# chunks; scheduled runs stop after TASK_PRUNE_MAX_SECONDS and continue next time.
+TASK_RETENTION_SUCCESS_DAYS = float(os.getenv("TASK_RETENTION_SUCCESS_DAYS", "7"))
+TASK_RETENTION_FAILURE_DAYS = float(os.getenv("TASK_RETENTION_FAILURE_DAYS", "30"))
+TASK_RETENTION_MAX_PER_FUNC = int(os.getenv("TASK_RETENTION_MAX_PER_FUNC", "10000"))
+TASK_PRUNE_CHUNK_SIZE = int(os.getenv("TASK_PRUNE_CHUNK_SIZE", "1000"))
+TASK_PRUNE_PAUSE = float(os.getenv("TASK_PRUNE_PAUSE", "0.05"))
+TASK_PRUNE_MAX_SECONDS = float(os.getenv("TASK_PRUNE_MAX_SECONDS", "30"))
+TASK_PRUNE_INTERVAL = int(os.getenv("TASK_PRUNE_INTERVAL", "3600"))
+# SQLite pages returned to the filesystem per prune, 0 for all free pages
+TASK_PRUNE_VACUUM_PAGES = int(os.getenv("TASK_PRUNE_VACUUM_PAGES", "5000"))
+# Memoized results of shared_task(cache_ttl=...) tasks. Results larger than
+# TASK_MEMO_MAX_BYTES (pickled) are not kept; the cache bounds the entries.
+TASK_MEMO_CACHE = os.getenv("TASK_MEMO_CACHE", "default")
+TASK_MEMO_MAX_BYTES = int(os.getenv("TASK_MEMO_MAX_BYTES", str(64 * 1024)))
+# Memoize sample_task results for this many seconds, 0 to disable
+SAMPLE_TASK_CACHE_TTL = int(os.getenv("SAMPLE_TASK_CACHE_TTL", "0"))
+# Idempotency keys on delay(): repeats within the window return the first
+# task id. Keys are reserved in the database, so they hold across processes.
+TASK_IDEMPOTENCY_WINDOW = int(os.getenv("TASK_IDEMPOTENCY_WINDOW", "600"))
+TASK_IDEMPOTENCY_WAIT = float(os.getenv("TASK_IDEMPOTENCY_WAIT", "5"))
+SCHEDULES_BULK_MAX_SIZE = int(os.getenv("SCHEDULES_BULK_MAX_SIZE", "10000"))
+SCHEDULES_PAGE_SIZE = int(os.getenv("SCHEDULES_PAGE_SIZE", "100"))
+# manage.py run_interval_scheduler: how often IntervalSchedule definitions are
+# checked for changes and run counts are written back, in seconds
+TASK_SCHEDULER_RELOAD = float(os.getenv("TASK_SCHEDULER_RELOAD", "10"))
+TASK_SCHEDULER_CHECKPOINT = float(os.getenv("TASK_SCHEDULER_CHECKPOINT", "60"))
+# Sampled cProfile (and tracemalloc) runs of shared_task(profile=True) tasks,
+# summarized by manage.py profile_report. 0 disables profiling.
+TASK_PROFILE_RATE = float(os.getenv("TASK_PROFILE_RATE", "0"))
+TASK_PROFILE_MEMORY = os.getenv("TASK_PROFILE_MEMORY", "False").lower() == "true"
+TASK_PROFILE_FRAMES = int(os.getenv("TASK_PROFILE_FRAMES", "1"))
+TASK_PROFILE_DIR = os.getenv("TASK_PROFILE_DIR", str(BASE_DIR / "build" / "profiles"))
+# Prometheus metrics at /metrics. Web and cluster processes write samples to
+# PROMETHEUS_MULTIPROC_DIR, which prometheus_client reads from the environment.
+# Off by default: run.py turns it on for its children after clearing the
+# directory, other entrypoints would serve samples left by earlier runs.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False").lower() == "true"
+PROMETHEUS_MULTIPROC_DIR = os.getenv(
+    "PROMETHEUS_MULTIPROC_DIR", str(BASE_DIR / "build" / "metrics")
+)
+if METRICS_ENABLED:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = PROMETHEUS_MULTIPROC_DIR
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # JSONRenderer encoding with orjson
+    "DEFAULT_RENDERER_CLASSES": [
+        "tasks.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
 }
@@ -106,4 +277,28 @@ SPECTACULAR_SETTINGS = {
     "SERVE_INCLUDE_SCHEMA": False,
 }
 
+# Delivery sinks are Django email backends, EMAIL_BACKEND takes any dotted path
+EMAIL_SINKS = {
+    "log": "tasks.services.email_backends.LogEmailBackend",
+    "file": "django.core.mail.backends.filebased.EmailBackend",
+    "smtp": "django.core.mail.backends.smtp.EmailBackend",
+    "console": "django.core.mail.backends.console.EmailBackend",
+}
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND") or EMAIL_SINKS[os.getenv("EMAIL_SINK", "log")]
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", BASE_DIR / "build" / "email-spool")
+EMAIL_LOG_BODIES = os.getenv("EMAIL_LOG_BODIES", "False").lower() == "true"
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "25"))
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "webmaster@localhost")
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "100"))
+EMAIL_TEXT_CACHE_MAX_ENTRIES = int(os.getenv("EMAIL_TEXT_CACHE_MAX_ENTRIES", "256"))
+EMAIL_TEXT_CACHE_MAX_BYTES = int(os.getenv("EMAIL_TEXT_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# "render" compiles MJML after rendering the block, "substitute" compiles the
+# block once with its template tags in place and renders the resulting HTML
+MJML_COMPILE_MODE = os.getenv("MJML_COMPILE_MODE", "render")
+MJML_CACHE_MAX_ENTRIES = int(os.getenv("MJML_CACHE_MAX_ENTRIES", "256"))
+MJML_CACHE_MAX_BYTES = int(os.getenv("MJML_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
 AUTO_CREATE_SCHEDULED_TASK = os.getenv("AUTO_CREATE_SCHEDULED_TASK", "False").lower() == "true"
+AUTO_CREATE_PRUNE_SCHEDULE = os.getenv("AUTO_CREATE_PRUNE_SCHEDULE", "False").lower() == "true"
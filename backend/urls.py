@@ -23,9 +23,12 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from tasks.views import MetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("tasks.urls")),
+    path("metrics", MetricsView.as_view(), name="metrics"),
     # Swagger/OpenAPI endpoints
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
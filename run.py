@@ -4,75 +4,232 @@ Script to run both Django server and django-q2 cluster together.
 Usage:
     uv run python run.py
     python run.py
+
+The supervisor relays child output with one selector instead of a thread per
+child, restarts children that exit with a backoff, and is configured from the
+environment:
+
+    RUN_SERVER           runserver (default), gunicorn or uvicorn
+    WEB_WORKERS          gunicorn/uvicorn worker processes (default 2)
+    WEB_BIND             address to serve on (default 0.0.0.0:8000)
+    CLUSTER_PROCESSES    default qcluster processes (default 1)
+    LOG_RELAY            relay (prefix each line) or passthrough (inherit stdout)
+    RESTART_BACKOFF_MAX  longest wait in seconds before restarting a child
+    METRICS_ENABLED      Prometheus metrics for every child (default True here)
 """
 
+import os
+import selectors
 import signal
 import subprocess
 import sys
-import threading
+import time
 
+from dotenv import load_dotenv
 from loguru import logger
 
-# Configure loguru with colors and formatting
-logger.remove()  # Remove default handler
-logger.add(
-    sys.stderr,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan> - <level>{message}</level>",
-    colorize=True,
-    level="INFO",
-)
-
-# Global process references for signal handling
-server_process = None
-cluster_process = None
-
-
-def signal_handler(sig, frame):
-    """Handle Ctrl+C and termination signals gracefully"""
-    logger.warning("Received shutdown signal, shutting down server and cluster...")
-    if server_process:
-        logger.info("Terminating server process...")
-        server_process.terminate()
-    if cluster_process:
-        logger.info("Terminating cluster process...")
-        cluster_process.terminate()
-    sys.exit(0)
-
-
-def print_output(process, prefix):
-    """Print output from a process with color-coded prefix using loguru"""
-    color_map = {
-        "SERVER": "blue",
-        "CLUSTER": "magenta",
-    }
-    color = color_map.get(prefix, "white")
+load_dotenv()
 
-    try:
-        for line in iter(process.stdout.readline, ""):
-            if line:
-                line = line.rstrip()
-                if line:
-                    logger.opt(colors=True).info(
-                        f"<{color}>[{prefix}]</{color}> {line}"
-                    )
-    except Exception as e:
-        logger.error(f"Error reading output from {prefix}: {e}")
+RUN_SERVER = os.getenv("RUN_SERVER", "runserver")
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "2"))
+WEB_BIND = os.getenv("WEB_BIND", "0.0.0.0:8000")
+CLUSTER_PROCESSES = int(os.getenv("CLUSTER_PROCESSES", "1"))
+LOG_RELAY = os.getenv("LOG_RELAY", "relay")
+RESTART_BACKOFF_MIN = 1.0
+RESTART_BACKOFF_MAX = float(os.getenv("RESTART_BACKOFF_MAX", "30"))
+# A child that ran this long before exiting restarts without delay
+RESTART_RESET_AFTER = 60.0
+# How long to keep reading an exited child's pipe, which its own children may hold open
+EXIT_DRAIN_SECONDS = 2.0
+
+PREFIX_COLORS = {"SERVER": 34, "CLUSTER": 35, "SCHEDULER": 36}  # ANSI blue, magenta, cyan
+
+
+def configure_logging():
+    # Configure loguru with colors and formatting
+    logger.remove()  # Remove default handler
+    logger.add(
+        sys.stderr,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan> - <level>{message}</level>",
+        colorize=True,
+        level="INFO",
+    )
+
+
+class Child:
+    """A supervised subprocess and the restart bookkeeping for it."""
+
+    def __init__(self, name, args, env=None):
+        self.name = name
+        self.args = args
+        self.env = env
+        self.process = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at = 0.0
+        self.exited_at = None
+        color = PREFIX_COLORS.get(name.split(":")[0], 37)
+        self.prefix = f"\033[{color}m[{name}]\033[0m ".encode()
+        self.pending = b""
+
+    def start(self, relay: bool):
+        self.process = subprocess.Popen(
+            self.args,
+            stdout=subprocess.PIPE if relay else None,
+            stderr=subprocess.STDOUT if relay else None,
+            env=self.env,
+            # Ctrl+C reaches only the supervisor, which stops children once
+            start_new_session=True,
+        )
+        self.started_at = time.monotonic()
+        self.exited_at = None
+        if relay:
+            os.set_blocking(self.process.stdout.fileno(), False)
+
+    def signal(self, sig):
+        """
+        Signal the child's whole process group. Server workers and cluster
+        processes are its children and would outlive it otherwise.
+        """
+        try:
+            os.killpg(self.process.pid, sig)
+        except ProcessLookupError:
+            # Every process of the group has exited
+            pass
+
+    def schedule_restart(self):
+        if time.monotonic() - self.started_at > RESTART_RESET_AFTER:
+            self.failures = 0
+        delay = min(RESTART_BACKOFF_MAX, RESTART_BACKOFF_MIN * 2**self.failures)
+        self.failures += 1
+        self.restart_at = time.monotonic() + delay
+        return delay
+
+
+class Supervisor:
+    """
+    Runs children, relays their output and restarts the ones that exit.
+
+    In relay mode every complete line is written to ``output`` with a colored
+    ``[NAME]`` prefix, one write per chunk read. In passthrough mode children
+    inherit this process's stdout and stderr and nothing is copied.
+    """
+
+    def __init__(self, children, relay=True, output=None):
+        self.children = children
+        self.relay = relay
+        self.output = output or sys.stdout.buffer
+        self.selector = selectors.DefaultSelector()
+        self.stopping = False
+
+    def start(self, child):
+        child.start(self.relay)
+        if self.relay:
+            self.selector.register(child.process.stdout, selectors.EVENT_READ, child)
+        logger.info(f"Started {child.name} (pid {child.process.pid})")
+
+    def read(self, child, stream):
+        try:
+            chunk = os.read(stream.fileno(), 65536)
+        except BlockingIOError:
+            return
+        if not chunk:
+            # EOF: the child exited, flush what is left of its last line
+            self.close(child)
+            return
+        *lines, child.pending = (child.pending + chunk).split(b"\n")
+        if lines:
+            self.output.write(
+                b"".join(child.prefix + line + b"\n" for line in lines if line.strip())
+            )
+            self.output.flush()
+
+    def close(self, child):
+        stream = child.process.stdout
+        self.selector.unregister(stream)
+        stream.close()
+        if child.pending:
+            self.output.write(child.prefix + child.pending + b"\n")
+            self.output.flush()
+            child.pending = b""
+
+    def reap(self):
+        now = time.monotonic()
+        for child in self.children:
+            if child.process is None:
+                if now >= child.restart_at:
+                    self.start(child)
+                continue
+            code = child.process.poll()
+            if code is None or self.stopping:
+                continue
+            if child.exited_at is None:
+                child.exited_at = now
+                # Processes it started would keep its pipe, port or queue
+                child.signal(signal.SIGTERM)
+            if self.relay and not child.process.stdout.closed:
+                if now - child.exited_at < EXIT_DRAIN_SECONDS:
+                    # Read the rest of its output before reporting the exit
+                    continue
+                child.signal(signal.SIGKILL)
+                self.close(child)
+            mark_process_dead(child.process.pid)
+            delay = child.schedule_restart()
+            logger.error(f"{child.name} exited with code {code}, restarting in {delay:.1f}s")
+            child.process = None
+
+    def run(self):
+        for child in self.children:
+            self.start(child)
+        while not self.stopping:
+            if self.relay and self.selector.get_map():
+                for key, _ in self.selector.select(timeout=0.5):
+                    self.read(key.data, key.fileobj)
+            else:
+                time.sleep(0.5)
+            self.reap()
+
+    def stop(self, timeout: float = 30):
+        self.stopping = True
+        running = [c for c in self.children if c.process and c.process.poll() is None]
+        for child in running:
+            logger.info(f"Terminating {child.name}...")
+            child.signal(signal.SIGTERM)
+        # Keep relaying while the children shut down so a full pipe cannot block them
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and any(c.process.poll() is None for c in running):
+            if self.relay and self.selector.get_map():
+                for key, _ in self.selector.select(timeout=0.1):
+                    self.read(key.data, key.fileobj)
+            else:
+                time.sleep(0.1)
+        for child in running:
+            if child.process.poll() is None:
+                logger.warning(f"Killing {child.name}")
+            # Also the group's stragglers once the child itself has exited
+            child.signal(signal.SIGKILL)
+            child.process.wait()
+            mark_process_dead(child.process.pid)
 
 
 def run_migrations():
     """Run Django migrations before starting services"""
     logger.info("Running database migrations...")
     python_exe = sys.executable
+    databases = ["default"]
+    if os.getenv("SQLITE_BROKER_PATH"):
+        databases.append("broker")
     try:
-        result = subprocess.run(
-            [python_exe, "manage.py", "migrate", "--noinput"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
+        for database in databases:
+            result = subprocess.run(
+                [python_exe, "manage.py", "migrate", "--noinput", "--database", database],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            if result.stdout:
+                logger.debug(result.stdout)
         logger.success("Migrations completed successfully")
-        if result.stdout:
-            logger.debug(result.stdout)
         return True
     except subprocess.CalledProcessError as e:
         logger.error(f"Migration failed: {e}")
@@ -81,17 +238,87 @@ def run_migrations():
         return False
 
 
-def main():
-    """Run both server and cluster as subprocesses"""
-    global server_process, cluster_process
+def reset_metrics():
+    """Drop metric samples left by processes of an earlier run"""
+    # Children inherit it, the directory they write to starts empty
+    os.environ.setdefault("METRICS_ENABLED", "True")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    import django
 
-    # Register signal handlers for graceful shutdown
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    django.setup()
+    from tasks.services import metrics
+
+    metrics.reset()
+
+
+def mark_process_dead(pid):
+    """Drop the live metric samples of an exited child"""
+    from tasks.services import metrics
+
+    metrics.mark_process_dead(pid)
+
+
+def cluster_commands():
+    """
+    (lane, command) for the default cluster, plus one cluster per task lane
+    when lanes are enabled. Lanes with a concurrency run async tasks.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    from django.conf import settings
+
+    commands = [(None, "qcluster")]
+    if settings.TASK_LANES_ENABLED:
+        commands.extend(
+            (name, "qcluster_async" if "concurrency" in lane else "qcluster")
+            for name, lane in settings.TASK_LANES.items()
+        )
+    return commands
+
+
+def server_args(server=RUN_SERVER, workers=WEB_WORKERS, bind=WEB_BIND):
+    """Command line for the web server selected by RUN_SERVER"""
+    python_exe = sys.executable
+    if server == "runserver":
+        return [python_exe, "manage.py", "runserver", bind]
+    if server == "gunicorn":
+        return [
+            python_exe, "-m", "gunicorn", "backend.wsgi:application",
+            "--config", "python:backend.gunicorn", "--workers", str(workers), "--bind", bind,
+        ]  # fmt: skip
+    if server == "uvicorn":
+        host, port = bind.rsplit(":", 1)
+        return [
+            python_exe, "-m", "uvicorn", "backend.asgi:application",
+            "--workers", str(workers), "--host", host, "--port", port,
+        ]  # fmt: skip
+    raise ValueError(f"Unknown RUN_SERVER {server!r}, expected runserver, gunicorn or uvicorn")
+
+
+def build_children():
+    children = [Child("SERVER", server_args())]
+    # Lane clusters pick their settings from Q_CLUSTER_NAME
+    for name, command in cluster_commands():
+        args = [sys.executable, "manage.py", command]
+        if name:
+            children.append(
+                Child(f"CLUSTER:{name}", args, env={**os.environ, "Q_CLUSTER_NAME": name})
+            )
+            continue
+        for i in range(CLUSTER_PROCESSES):
+            suffix = f":{i + 1}" if CLUSTER_PROCESSES > 1 else ""
+            children.append(Child(f"CLUSTER{suffix}", args))
+    # One instance enqueues every IntervalSchedule
+    children.append(Child("SCHEDULER", [sys.executable, "manage.py", "run_interval_scheduler"]))
+    return children
+
+
+def main():
+    """Run the server and clusters as supervised subprocesses"""
+    configure_logging()
 
     logger.info("=" * 60)
-    logger.info("Starting Django server and django-q2 cluster...")
-    logger.info("Press Ctrl+C to stop both processes")
+    logger.info("Starting Django server, django-q2 cluster and interval scheduler...")
+    logger.info("Press Ctrl+C to stop all processes")
     logger.info("=" * 60)
 
     # Run migrations first
@@ -99,50 +326,24 @@ def main():
         logger.error("Failed to run migrations. Exiting.")
         sys.exit(1)
 
-    # Determine the Python executable
-    python_exe = sys.executable
-
-    # Start Django server
-    logger.info("Starting Django development server...")
-    server_process = subprocess.Popen(
-        [python_exe, "manage.py", "runserver", "0.0.0.0:8000"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-    )
-
-    # Start django-q2 cluster
-    logger.info("Starting django-q2 cluster...")
-    cluster_process = subprocess.Popen(
-        [python_exe, "manage.py", "qcluster"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-    )
-
-    # Create threads to handle output from both processes
-    server_thread = threading.Thread(
-        target=print_output, args=(server_process, "SERVER"), daemon=True
-    )
-    cluster_thread = threading.Thread(
-        target=print_output, args=(cluster_process, "CLUSTER"), daemon=True
-    )
+    reset_metrics()
+    supervisor = Supervisor(build_children(), relay=LOG_RELAY != "passthrough")
 
-    server_thread.start()
-    cluster_thread.start()
+    def signal_handler(sig, frame):
+        """Handle Ctrl+C and termination signals gracefully"""
+        logger.warning("Received shutdown signal, shutting down server and cluster...")
+        supervisor.stopping = True
 
-    logger.success("Both processes started successfully")
-    logger.info("Server: http://0.0.0.0:8000")
-    logger.info("API Docs: http://0.0.0.0:8000/api/docs/")
+    # Register signal handlers for graceful shutdown
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
 
-    # Wait for processes to complete
+    logger.info(f"Server ({RUN_SERVER}): http://{WEB_BIND}")
+    logger.info(f"API Docs: http://{WEB_BIND}/api/docs/")
     try:
-        server_process.wait()
-        cluster_process.wait()
-    except KeyboardInterrupt:
-        signal_handler(None, None)
+        supervisor.run()
+    finally:
+        supervisor.stop()
 
 
 if __name__ == "__main__":
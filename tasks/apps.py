@@ -8,22 +8,41 @@ class TasksConfig(AppConfig):
     name = "tasks"
 
     def ready(self):
+        from . import checks, signals  # noqa: F401
+        from . import tasks  # noqa: F401  registers the shared_tasks schedules may run
+
+        if settings.MJML_PRECOMPILE_ON_STARTUP:
+            try:
+                from .services.mjml_artifacts import precompile_templates
+
+                precompile_templates()
+            except Exception as e:
+                logger.warning(f"Could not precompile MJML templates: {e}")
+
         if (
             hasattr(settings, "AUTO_CREATE_SCHEDULED_TASK")
             and settings.AUTO_CREATE_SCHEDULED_TASK
         ):
             try:
-                from django_q.models import Schedule
-                from django_q.tasks import schedule
-
-                if not Schedule.objects.filter(name="scheduled_task_5s").exists():
-                    schedule(
-                        "tasks.tasks.scheduled_task",
-                        name="scheduled_task_5s",
-                        schedule_type=Schedule.MINUTES,
-                        minutes=5 / 60,
-                        repeats=-1,
-                    )
+                from .models import IntervalSchedule
+                from .services.interval_scheduler import HEARTBEAT_NAME, create_heartbeat
+
+                if not IntervalSchedule.objects.filter(name=HEARTBEAT_NAME).exists():
+                    create_heartbeat()
                     logger.info("Auto-created scheduled task (runs every 5 seconds)")
             except Exception as e:
                 logger.warning(f"Could not auto-create scheduled task: {e}")
+
+        if settings.AUTO_CREATE_PRUNE_SCHEDULE:
+            try:
+                from .models import IntervalSchedule
+                from .services.retention import SCHEDULE_NAME, create_schedule
+
+                if not IntervalSchedule.objects.filter(name=SCHEDULE_NAME).exists():
+                    create_schedule()
+                    logger.info(
+                        f"Auto-created {SCHEDULE_NAME} schedule "
+                        f"(runs every {settings.TASK_PRUNE_INTERVAL} seconds)"
+                    )
+            except Exception as e:
+                logger.warning(f"Could not auto-create {SCHEDULE_NAME} schedule: {e}")
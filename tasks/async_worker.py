@@ -0,0 +1,129 @@
+import asyncio
+import inspect
+import pydoc
+import signal
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django_q.brokers import get_broker
+from django_q.conf import Conf
+from django_q.monitor import save_cached, save_task
+from django_q.signals import post_execute, post_execute_in_worker, pre_execute
+from django_q.signing import BadSignature, SignedPackage
+from django_q.utils import close_old_django_connections, get_func_repr
+from loguru import logger
+
+
+class AsyncWorker:
+    """
+    Pulls tasks from a broker and runs up to ``concurrency`` of them at once
+    on one event loop. ``async def`` tasks are awaited; plain functions run in
+    a thread so they cannot stall the loop.
+
+    Results are saved and acknowledged the way the django-q monitor does it,
+    and the same execution signals are sent.
+    """
+
+    def __init__(self, concurrency: int, broker=None):
+        self.concurrency = concurrency
+        self.broker = broker or get_broker()
+        self.running = set()
+        self.stopping = None
+        # broker.dequeue() blocks while the queue is empty
+        self.dequeuer = ThreadPoolExecutor(1, thread_name_prefix="dequeue")
+
+    def run(self):
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopping.set)
+        slots = asyncio.Semaphore(self.concurrency)
+        logger.info(
+            f"Async worker pulling from {self.broker.list_key} "
+            f"with {self.concurrency} concurrent tasks"
+        )
+
+        try:
+            while not self.stopping.is_set():
+                await slots.acquire()
+                slots.release()
+                task_set = await loop.run_in_executor(self.dequeuer, self.broker.dequeue)
+                for ack_id, package in task_set or ():
+                    task = self.unpack(ack_id, package)
+                    if task is None:
+                        continue
+                    # Waits for a free slot, the task stays unacknowledged until then
+                    await slots.acquire()
+                    job = asyncio.create_task(self.process(task))
+                    self.running.add(job)
+                    job.add_done_callback(self.running.discard)
+                    job.add_done_callback(lambda _: slots.release())
+        finally:
+            if self.running:
+                logger.info(f"Waiting for {len(self.running)} running tasks")
+                await asyncio.gather(*self.running, return_exceptions=True)
+            self.dequeuer.shutdown(wait=False)
+        logger.info("Async worker stopped")
+
+    def unpack(self, ack_id, package):
+        try:
+            task = SignedPackage.loads(package)
+        except (TypeError, BadSignature):
+            logger.exception("Failed to unpack task")
+            self.broker.fail(ack_id)
+            return None
+        task["cluster"] = Conf.CLUSTER_NAME
+        task["ack_id"] = ack_id
+        return task
+
+    async def process(self, task):
+        f = task["func"]
+        if not callable(f):
+            f = pydoc.locate(f)
+        timeout = task.pop("timeout", Conf.TIMEOUT)
+        await sync_to_async(close_old_django_connections)()
+        pre_execute.send(sender="django_q", func=f, task=task)
+
+        try:
+            if f is None:
+                raise ValueError(f"Function {task['func']} is not defined")
+            async with asyncio.timeout(timeout):
+                result = (await self.call(f, task["args"], task["kwargs"]), True)
+        except TimeoutError:
+            # A plain function keeps running in its thread, only its result is dropped
+            result = (f"Task exceeded timeout of {timeout}s", False)
+        except Exception as e:
+            result = (f"{e} : {traceback.format_exc()}", False)
+
+        task["result"], task["success"] = result
+        task["stopped"] = timezone.now()
+        post_execute_in_worker.send(sender="django_q", func=f, task=task)
+        await sync_to_async(self.finish)(task)
+
+    @staticmethod
+    async def call(f, args, kwargs):
+        if getattr(f, "is_async", False) or inspect.iscoroutinefunction(f):
+            return await f(*args, **kwargs)
+        return await sync_to_async(f, thread_sensitive=False)(*args, **kwargs)
+
+    def finish(self, task):
+        """Save, acknowledge and report a task, like django_q.monitor.monitor."""
+        if task.get("cached", False):
+            save_cached(task, self.broker)
+        else:
+            save_task(task, self.broker)
+        ack_id = task.pop("ack_id", False)
+        if ack_id and (task["success"] or task.get("ack_failure", False)):
+            self.broker.acknowledge(ack_id)
+        post_execute.send(sender="django_q", task=task)
+
+        name = get_func_repr(task["func"])
+        if task["success"]:
+            logger.info(f"Processed '{name}' ({task['name']})")
+        else:
+            logger.error(f"Failed '{name}' ({task['name']}) - {task['result']}")
@@ -0,0 +1,97 @@
+import os
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django_q.brokers import Broker
+from django_q.conf import Conf
+
+
+class DiskBroker(Broker):
+    """
+    Broker that keeps each queued package as a file, for tests and benchmarks
+    without a database lock or a Redis server. Point Q_DISK_BROKER_PATH at a
+    tmpfs such as /dev/shm to keep the queue in memory.
+
+    Packages move between ``new/`` (queued) and ``cur/`` (awaiting
+    acknowledgement) with atomic renames, so several cluster processes can
+    share one directory. Unacknowledged packages return to the queue after
+    Q_CLUSTER["retry"] seconds.
+    """
+
+    @staticmethod
+    def get_connection(list_key: str = None) -> Path:
+        path = Path(settings.Q_DISK_BROKER_PATH) / (list_key or Conf.CLUSTER_NAME)
+        for folder in ("tmp", "new", "cur"):
+            (path / folder).mkdir(parents=True, exist_ok=True)
+        return path
+
+    def enqueue(self, task):
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex}"
+        tmp = self.connection / "tmp" / name
+        tmp.write_text(task, encoding="utf-8")
+        os.replace(tmp, self.connection / "new" / name)
+        return name
+
+    def dequeue(self):
+        self.requeue_expired()
+        task_list = []
+        for name in sorted(os.listdir(self.connection / "new"))[: Conf.BULK]:
+            queued = self.connection / "new" / name
+            locked = self.connection / "cur" / name
+            try:
+                # Stamp the lock time before the package shows up in cur/, so
+                # requeue_expired never sees it there with its enqueue time
+                os.utime(queued)
+                os.rename(queued, locked)
+            except FileNotFoundError:
+                # Another cluster process was faster
+                continue
+            task_list.append((name, locked.read_text(encoding="utf-8")))
+        if task_list:
+            return task_list
+        # empty queue, spare the cpu
+        time.sleep(Conf.POLL)
+
+    def requeue_expired(self):
+        expired = time.time() - Conf.RETRY
+        with os.scandir(self.connection / "cur") as entries:
+            for entry in entries:
+                try:
+                    if entry.stat().st_mtime < expired:
+                        os.rename(entry.path, self.connection / "new" / entry.name)
+                except FileNotFoundError:
+                    continue
+
+    def queue_size(self) -> int:
+        return len(os.listdir(self.connection / "new"))
+
+    def lock_size(self) -> int:
+        return len(os.listdir(self.connection / "cur"))
+
+    def purge_queue(self):
+        for folder in ("new", "cur"):
+            for name in os.listdir(self.connection / folder):
+                (self.connection / folder / name).unlink(missing_ok=True)
+
+    def delete_queue(self):
+        return self.purge_queue()
+
+    def delete(self, task_id):
+        for folder in ("new", "cur"):
+            (self.connection / folder / task_id).unlink(missing_ok=True)
+
+    def acknowledge(self, task_id):
+        return self.delete(task_id)
+
+    def fail(self, task_id):
+        self.delete(task_id)
+
+    def ping(self) -> bool:
+        return self.connection.is_dir()
+
+    def info(self) -> str:
+        if not self._info:
+            self._info = f"Disk {self.connection}"
+        return self._info
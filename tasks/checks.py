@@ -0,0 +1,33 @@
+from django.core.checks import Tags, Warning, register
+from django.db import connections, router
+from django.db.migrations.recorder import MigrationRecorder
+from django_q.models import Task
+
+# Created by migration tasks.0003 on django-q's table
+RETENTION_INDEX = "tasks_retention_index"
+
+
+@register(Tags.database)
+def check_retention_index(app_configs, databases=None, **kwargs):
+    """Warn when a django_q migration rebuilt the Task table without our index."""
+    alias = router.db_for_write(Task)
+    if alias not in (databases or ()):
+        return []
+    connection = connections[alias]
+    table = Task._meta.db_table
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ("tasks", "0003_task_retention_index") not in applied:
+        return []
+    with connection.cursor() as cursor:
+        if RETENTION_INDEX in connection.introspection.get_constraints(cursor, table):
+            return []
+    return [
+        Warning(
+            f"Index {RETENTION_INDEX} on {table} is missing, task pruning scans the table.",
+            hint=(
+                f'Recreate it: CREATE INDEX IF NOT EXISTS "{RETENTION_INDEX}" '
+                f'ON "{table}" ("func", "success", "stopped")'
+            ),
+            id="tasks.W001",
+        )
+    ]
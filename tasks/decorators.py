@@ -1,23 +1,252 @@
+import asyncio
+import inspect
+import random
+import time
 from functools import wraps
+from itertools import batched
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django_q.brokers import get_broker
+from django_q.brokers.orm import ORM
+from django_q.conf import Conf
+from django_q.humanhash import uuid
+from django_q.models import OrmQ
+from django_q.signals import pre_enqueue
+from django_q.signing import SignedPackage
 from django_q.tasks import async_task
 
+from .services import memo, metrics, profiling
+from .services.idempotency import derive_key, enqueue_once
+from .services.result_storage import POLICIES
+
+try:
+    from django_q.brokers.redis_broker import Redis as RedisBroker
+except ImportError:
+    RedisBroker = None
+
+# Every shared_task by dotted path, the functions a schedule may run
+registry = {}
+
 
 class TaskWrapper:
-    def __init__(self, func):
+    def __init__(
+        self,
+        func,
+        queue=None,
+        priority=None,
+        idempotent=False,
+        cache_ttl=None,
+        profile=False,
+        result_storage=None,
+    ):
+        if queue is not None and queue not in settings.TASK_LANES:
+            raise ValueError(f"Unknown task queue {queue!r}, expected one of TASK_LANES")
+        if priority is not None and priority not in settings.TASK_PRIORITY_LANES:
+            raise ValueError(
+                f"Unknown task priority {priority!r}, expected one of TASK_PRIORITY_LANES"
+            )
+        if result_storage is not None and result_storage not in POLICIES:
+            raise ValueError(
+                f"Unknown result_storage {result_storage!r}, expected one of {POLICIES}"
+            )
         self.func = func
+        self.queue = queue
+        self.priority = priority
+        self.idempotent = idempotent
+        self.cache_ttl = cache_ttl
+        self.profile = profile
+        self.result_storage = result_storage
+        self.is_async = inspect.iscoroutinefunction(func)
         self.module_path = f"{func.__module__}.{func.__name__}"
         wraps(func)(self)
+        registry[self.module_path] = self
 
     def __call__(self, *args, **kwargs):
+        if self.profile and random.random() < profiling.sample_rate(self.profile):
+            return profiling.run_profiled(self.module_path, lambda: self._run(args, kwargs))
+        return self._run(args, kwargs)
+
+    def _run(self, args, kwargs):
+        if self.is_async:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # Called by a regular qcluster worker: run it to completion
+                return asyncio.run(self.func(*args, **kwargs))
         return self.func(*args, **kwargs)
 
-    def delay(self, *args, **kwargs):
-        return async_task(self.module_path, *args, **kwargs)
+    @property
+    def lane(self):
+        """Cluster that runs this task, or None for the default cluster."""
+        if not settings.TASK_LANES_ENABLED:
+            return None
+        return self.queue or settings.TASK_PRIORITY_LANES.get(self.priority)
+
+    def delay(self, *args, idempotency_key=None, **kwargs):
+        return self.delay_once(*args, idempotency_key=idempotency_key, **kwargs)[0]
+
+    def delay_once(self, *args, idempotency_key=None, **kwargs):
+        """
+        Enqueue the task and return ``(task_id, created)``.
+
+        With an ``idempotency_key``, or ``True`` to hash the function and its
+        arguments, a repeat within TASK_IDEMPOTENCY_WINDOW returns the first
+        task id with ``created=False`` instead of enqueuing again. Tasks
+        declared with ``idempotent=True`` always derive a key.
+
+        Tasks declared with ``cache_ttl`` return the id of an earlier task
+        with the same arguments (``created=False``) while its result is
+        memoized, see ``services.memo``.
+        """
+        if self.cache_ttl:
+            task_id = memo.lookup(self.module_path, args, kwargs)
+            if task_id is not None:
+                return task_id, False
+
+        if self.lane:
+            kwargs.setdefault("cluster", self.lane)
+        if idempotency_key is None and self.idempotent:
+            idempotency_key = True
+        start = time.perf_counter()
+        if idempotency_key is None:
+            task_id, created = async_task(self.module_path, *args, **kwargs), True
+        else:
+            if idempotency_key is True:
+                idempotency_key = derive_key(self.module_path, args, kwargs)
+            task_id, created = enqueue_once(
+                self.module_path,
+                idempotency_key,
+                lambda: async_task(self.module_path, *args, **kwargs),
+            )
+
+        if created:
+            metrics.observe_enqueue(self.module_path, 1, time.perf_counter() - start)
+        if self.cache_ttl and created:
+            memo.remember_pending(
+                memo.memo_key(self.module_path, args, kwargs), task_id, self.cache_ttl
+            )
+        return task_id, created
+
+    async def adelay(self, *args, idempotency_key=None, **kwargs):
+        return (await self.adelay_once(*args, idempotency_key=idempotency_key, **kwargs))[0]
+
+    async def adelay_once(self, *args, idempotency_key=None, **kwargs):
+        """``delay_once`` for async views, django-q's enqueue API is synchronous."""
+        return await sync_to_async(self.delay_once)(
+            *args, idempotency_key=idempotency_key, **kwargs
+        )
+
+    def delay_many(self, iterable_of_args, chunk_size=None, broker=None):
+        """
+        Enqueue one task per item, writing to the broker a chunk at a time.
+
+        Items may be a tuple/list of positional args, a dict of keyword args
+        or a single positional argument. Returns the task ids in input order.
+
+        Tasks declared with ``idempotent`` or ``cache_ttl`` are enqueued one
+        ``delay`` at a time, so each item is deduplicated or memoized as it
+        would be on its own.
+        """
+        if Conf.SYNC or self.idempotent or self.cache_ttl:
+            return [
+                self.delay(*args, **kwargs)
+                for args, kwargs in map(_split_args, iterable_of_args)
+            ]
+
+        chunk_size = chunk_size or settings.TASK_BATCH_CHUNK_SIZE
+        broker = broker or get_broker(self.lane)
+        task_ids = []
+        for chunk in batched(iterable_of_args, chunk_size):
+            start = time.perf_counter()
+            tasks = [build_task(self.module_path, *_split_args(item)) for item in chunk]
+            bulk_enqueue(broker, [SignedPackage.dumps(task) for task in tasks])
+            metrics.observe_enqueue(self.module_path, len(tasks), time.perf_counter() - start)
+            task_ids.extend(task["id"] for task in tasks)
+        return task_ids
 
     def __getattr__(self, name):
         return getattr(self.func, name)
 
 
-def shared_task(func):
-    return TaskWrapper(func)
+def _split_args(item):
+    if isinstance(item, dict):
+        return (), dict(item)
+    if isinstance(item, (list, tuple)):
+        return tuple(item), {}
+    return (item,), {}
+
+
+def build_task(func_path: str, args, kwargs, **options) -> dict:
+    """Task package as built by django_q.tasks.async_task, ``options`` being q_options."""
+    tag = uuid()
+    task = {
+        "id": tag[1],
+        "name": tag[0],
+        "func": func_path,
+        "args": args,
+        "kwargs": kwargs,
+        "started": timezone.now(),
+        **options,
+    }
+    if Conf.CACHED:
+        task.setdefault("cached", Conf.CACHED)
+    if Conf.ACK_FAILURES:
+        task.setdefault("ack_failure", Conf.ACK_FAILURES)
+    pre_enqueue.send(sender="django_q", task=task)
+    return task
+
+
+def bulk_enqueue(broker, packs):
+    # The queue name django-q's own enqueue falls back to
+    key = broker.list_key or Conf.CLUSTER_NAME
+    if isinstance(broker, ORM):
+        now = timezone.now()
+        with transaction.atomic(using=Conf.ORM):
+            OrmQ.objects.using(Conf.ORM).bulk_create(
+                [OrmQ(key=key, payload=pack, lock=now) for pack in packs]
+            )
+    elif RedisBroker and isinstance(broker, RedisBroker):
+        broker.connection.rpush(key, *packs)
+    else:
+        # Other brokers have no bulk push, fall back to one enqueue per package
+        for pack in packs:
+            broker.enqueue(pack)
+
 
+def shared_task(
+    func=None,
+    *,
+    queue=None,
+    priority=None,
+    idempotent=False,
+    cache_ttl=None,
+    profile=False,
+    result_storage=None,
+):
+    """
+    Turn a function or ``async def`` coroutine function into a task. Async
+    tasks are multiplexed by ``manage.py qcluster_async`` and run to
+    completion by a regular cluster. Use bare or with options, e.g.
+    ``@shared_task(queue="email")``; ``priority`` picks a lane from
+    TASK_PRIORITY_LANES when no queue is given. Lanes only apply while
+    TASK_LANES_ENABLED is set. ``idempotent=True`` suppresses repeats of the
+    same call, see ``TaskWrapper.delay_once``. ``cache_ttl`` memoizes the
+    results of a pure task for that many seconds. ``profile=True`` profiles
+    a TASK_PROFILE_RATE sample of runs, or pass a rate, see
+    ``services.profiling``. ``result_storage="compress"`` or ``"spill"``
+    keeps large results compressed or in files, see ``services.result_storage``.
+    """
+    options = {
+        "queue": queue,
+        "priority": priority,
+        "idempotent": idempotent,
+        "cache_ttl": cache_ttl,
+        "profile": profile,
+        "result_storage": result_storage,
+    }
+    if func is None:
+        return lambda func: TaskWrapper(func, **options)
+    return TaskWrapper(func, **options)
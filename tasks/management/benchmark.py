@@ -0,0 +1,68 @@
+"""Helpers shared by the benchmark_* management commands."""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from itertools import batched
+
+from django.conf import settings
+from django_q.models import Task
+
+
+def percentiles(values, points=(50, 90, 99)) -> dict:
+    """Nearest-rank percentiles of ``values`` keyed ``p50``, ``p90``..."""
+    ordered = sorted(values)
+    if not ordered:
+        return {f"p{point}": None for point in points}
+    last = len(ordered) - 1
+    return {f"p{point}": ordered[round(point / 100 * last)] for point in points}
+
+
+def start_process(*args, env=None, quiet=True):
+    """Start ``manage.py <args>`` with extra environment variables."""
+    return subprocess.Popen(
+        [sys.executable, "manage.py", *args],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL if quiet else None,
+        stderr=subprocess.DEVNULL if quiet else None,
+    )
+
+
+def stop_process(process, timeout: float = 30):
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def count_finished(task_ids) -> int:
+    return sum(Task.objects.filter(id__in=chunk).count() for chunk in batched(task_ids, 500))
+
+
+def wait_for_tasks(task_ids, timeout: float, poll: float = 0.2) -> bool:
+    """Block until every task has a saved result. Returns False on timeout."""
+    deadline = time.monotonic() + timeout
+    while count_finished(task_ids) < len(task_ids):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(poll)
+    return True
+
+
+def finished_tasks(task_ids, *fields) -> list:
+    fields = fields or ("id", "started", "stopped")
+    rows = []
+    for chunk in batched(task_ids, 500):
+        rows.extend(Task.objects.filter(id__in=chunk).values_list(*fields))
+    return rows
+
+
+def delete_tasks(task_ids):
+    for chunk in batched(task_ids, 500):
+        Task.objects.filter(id__in=chunk).delete()
@@ -0,0 +1,166 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_q.brokers import get_broker
+
+from tasks.management.benchmark import (
+    delete_tasks,
+    finished_tasks,
+    start_process,
+    stop_process,
+    wait_for_tasks,
+)
+from tasks.tasks import sample_task, sample_task_async
+
+QUEUE_NAME = "benchmark-async"
+
+MODES = {
+    "sync": ("qcluster", sample_task),
+    "async": ("qcluster_async", sample_task_async),
+}
+
+
+def max_in_flight(intervals) -> int:
+    """Largest number of overlapping ``(start, stop)`` intervals."""
+    events = sorted(
+        [(start, 1) for start, _ in intervals] + [(stop, -1) for _, stop in intervals]
+    )
+    in_flight = peak = 0
+    for _, change in events:
+        in_flight += change
+        peak = max(peak, in_flight)
+    return peak
+
+
+class Command(BaseCommand):
+    help = (
+        "Run N delayed sample tasks on a regular cluster and the same number of "
+        "sample_task_async tasks on qcluster_async, and report completion time and "
+        "tasks in flight"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default="sync,async", help="Comma separated: sync, async")
+        parser.add_argument("--count", type=int, default=1000, help="Tasks per mode")
+        parser.add_argument("--delay", type=int, default=1, help="Seconds each task sleeps")
+        parser.add_argument(
+            "--workers", type=int, default=settings.Q_CLUSTER["workers"], help="Worker processes"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.TASK_ASYNC_CONCURRENCY,
+            help="Concurrent tasks per async worker",
+        )
+        parser.add_argument(
+            "--warmup", type=float, default=3, help="Seconds to let the cluster start"
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=900, help="Seconds to wait for the tasks"
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument("--child", choices=list(MODES), help="Internal: run one mode")
+
+    def handle(self, *args, **options):
+        if options["child"]:
+            self.stdout.write(json.dumps(self.run_mode(options["child"], options)))
+            return
+
+        results = [
+            self.spawn(mode.strip(), options)
+            for mode in options["modes"].split(",")
+            if mode.strip()
+        ]
+        report = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "count": options["count"],
+            "delay": options["delay"],
+            "workers": options["workers"],
+            "concurrency": options["concurrency"],
+            "results": results,
+        }
+
+        for result in results:
+            if "error" in result:
+                self.stdout.write(f"{result['mode']:<6} error: {result['error']}")
+                continue
+            self.stdout.write(
+                f"{result['mode']:<6} {result['completed']:5}/{options['count']} tasks in "
+                f"{result['seconds']:8.2f}s   {result['rate']:8,.1f} tasks/sec   "
+                f"max in flight {result['max_in_flight']}"
+            )
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def spawn(self, mode, options):
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "manage.py",
+                "benchmark_async_tasks",
+                f"--child={mode}",
+                f"--count={options['count']}",
+                f"--delay={options['delay']}",
+                f"--workers={options['workers']}",
+                f"--concurrency={options['concurrency']}",
+                f"--warmup={options['warmup']}",
+                f"--timeout={options['timeout']}",
+            ],
+            cwd=settings.BASE_DIR,
+            env=os.environ,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode:
+            error = completed.stderr.strip().splitlines()[-1:] or ["failed"]
+            return {"mode": mode, "error": error[0]}
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def run_mode(self, mode, options):
+        command, task = MODES[mode]
+        broker = get_broker(QUEUE_NAME)
+        broker.purge_queue()
+        cluster = start_process(
+            command,
+            f"--concurrency={options['concurrency']}" if mode == "async" else "--verbosity=1",
+            env={
+                "Q_CLUSTER_NAME": QUEUE_NAME,
+                "Q_CLUSTER_WORKERS": str(options["workers"]),
+                "Q_CLUSTER_SAVE_LIMIT": "0",
+            },
+        )
+        task_ids = []
+        try:
+            time.sleep(options["warmup"])
+            start = time.perf_counter()
+            task_ids = task.delay_many(
+                [("benchmark", options["delay"])] * options["count"], broker=broker
+            )
+            drained = wait_for_tasks(task_ids, options["timeout"], poll=0.05)
+            seconds = time.perf_counter() - start
+            rows = finished_tasks(task_ids, "stopped", "success")
+        finally:
+            stop_process(cluster)
+            broker.purge_queue()
+
+        delete_tasks(task_ids)
+        # Tasks only sleep, so each one ran during the delay before it stopped
+        delay = timedelta(seconds=options["delay"])
+        return {
+            "mode": mode,
+            "completed": sum(success for _, success in rows),
+            "failed": sum(not success for _, success in rows),
+            "drained": drained,
+            "seconds": seconds,
+            "rate": len(rows) / seconds,
+            "max_in_flight": max_in_flight([(stopped - delay, stopped) for stopped, _ in rows]),
+        }
@@ -0,0 +1,144 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django_q
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_q.brokers import get_broker
+
+from tasks.management.benchmark import (
+    delete_tasks,
+    finished_tasks,
+    percentiles,
+    start_process,
+    stop_process,
+    wait_for_tasks,
+)
+from tasks.tasks import sample_task
+
+QUEUE_NAME = "benchmark-broker"
+
+
+class Command(BaseCommand):
+    help = (
+        "Enqueue N sample_task(delay=0) jobs per broker and report enqueue rate, "
+        "end-to-end latency percentiles and drain time"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--brokers",
+            default=settings.Q_BROKER,
+            help="Comma separated brokers to compare: orm, redis, disk",
+        )
+        parser.add_argument("--count", type=int, default=500, help="Tasks per broker")
+        parser.add_argument(
+            "--warmup", type=float, default=3, help="Seconds to let the cluster start"
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=300, help="Seconds to wait for the queue to drain"
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument("--child", action="store_true", help="Internal: run one broker")
+
+    def handle(self, *args, **options):
+        if options["child"]:
+            report = self.run_broker(options["count"], options["warmup"], options["timeout"])
+            self.stdout.write(json.dumps(report))
+            return
+
+        results = [
+            self.spawn(broker.strip(), options)
+            for broker in options["brokers"].split(",")
+            if broker.strip()
+        ]
+        report = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "django_q_version": ".".join(map(str, django_q.VERSION)),
+            "count": options["count"],
+            "workers": settings.Q_CLUSTER["workers"],
+            "results": results,
+        }
+
+        for result in results:
+            if "error" in result:
+                self.stdout.write(f"{result['broker']:<6} error: {result['error']}")
+                continue
+            latency = result["latency_ms"]
+            self.stdout.write(
+                f"{result['broker']:<6} enqueue {result['enqueue_rate']:8,.0f} tasks/sec   "
+                f"latency p50 {latency['p50']:8.1f} ms  p90 {latency['p90']:8.1f} ms  "
+                f"p99 {latency['p99']:8.1f} ms   drain {result['drain_seconds']:.2f}s"
+            )
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def spawn(self, broker, options):
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "manage.py",
+                "benchmark_broker",
+                "--child",
+                f"--count={options['count']}",
+                f"--warmup={options['warmup']}",
+                f"--timeout={options['timeout']}",
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "Q_BROKER": broker},
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode:
+            error = completed.stderr.strip().splitlines()[-1:] or ["failed"]
+            return {"broker": broker, "error": error[0]}
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def run_broker(self, count, warmup, timeout):
+        try:
+            broker = get_broker(QUEUE_NAME)
+            broker.ping()
+            broker.purge_queue()
+        except Exception as e:
+            return {"broker": settings.Q_BROKER, "error": f"{type(e).__name__}: {e}"}
+
+        # Results must not be pruned while the run is being measured
+        cluster = start_process(
+            "qcluster", env={"Q_CLUSTER_NAME": QUEUE_NAME, "Q_CLUSTER_SAVE_LIMIT": "0"}
+        )
+        task_ids = []
+        try:
+            time.sleep(warmup)
+            start = time.perf_counter()
+            for _ in range(count):
+                task_ids.append(sample_task.delay("benchmark", 0, broker=broker))
+            enqueue_seconds = time.perf_counter() - start
+
+            drained = wait_for_tasks(task_ids, timeout)
+            rows = finished_tasks(task_ids)
+        finally:
+            stop_process(cluster)
+            broker.purge_queue()
+
+        delete_tasks(task_ids)
+        latencies = [(stopped - started).total_seconds() * 1000 for _, started, stopped in rows]
+        return {
+            "broker": settings.Q_BROKER,
+            "info": broker.info(),
+            "completed": len(rows),
+            "drained": drained,
+            "enqueue_rate": count / enqueue_seconds,
+            "latency_ms": percentiles(latencies),
+            "drain_seconds": (
+                (max(row[2] for row in rows) - min(row[1] for row in rows)).total_seconds()
+                if rows
+                else None
+            ),
+        }
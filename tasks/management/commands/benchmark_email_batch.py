@@ -0,0 +1,65 @@
+import time
+
+from django.core import mail
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from loguru import logger
+
+from tasks.services.email_service import EmailNotificationService
+
+LOCMEM_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+
+class Command(BaseCommand):
+    help = "Compare email throughput of one connection per message against batched sends"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=500, help="Messages per run")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            action="append",
+            help="Batch size to measure, may be repeated (default: 1, 10, 100, 500)",
+        )
+        parser.add_argument(
+            "--backend",
+            default=LOCMEM_BACKEND,
+            help=(
+                "Email backend to deliver through. For SMTP, run a local stand-in "
+                "(python -m aiosmtpd -n -l localhost:1025) and set EMAIL_PORT=1025"
+            ),
+        )
+        parser.add_argument("--template", default="emails/welcome.html")
+
+    def handle(self, *args, **options):
+        logger.remove()
+        count = options["count"]
+        template = options["template"]
+        recipients = [(f"user{i}@example.com", {"index": i}) for i in range(count)]
+        service = EmailNotificationService()
+
+        with override_settings(EMAIL_BACKEND=options["backend"]):
+            # What one send_email task per recipient costs: a template lookup
+            # and a fresh connection for every message
+            start = time.perf_counter()
+            for recipient in recipients:
+                service.send_email_batch("Benchmark", template, [recipient])
+            self.report("connection per message", count, time.perf_counter() - start)
+            self.reset_outbox()
+
+            for batch_size in options["batch_size"] or [1, 10, 100, 500]:
+                start = time.perf_counter()
+                service.send_email_batch(
+                    "Benchmark", template, recipients, batch_size=batch_size
+                )
+                self.report(f"batch_size={batch_size}", count, time.perf_counter() - start)
+                self.reset_outbox()
+
+    def reset_outbox(self):
+        if hasattr(mail, "outbox"):
+            mail.outbox.clear()
+
+    def report(self, label, count, elapsed):
+        self.stdout.write(
+            f"{label:<24} {count} emails in {elapsed:.3f}s ({count / elapsed:,.0f} emails/sec)"
+        )
@@ -0,0 +1,51 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from loguru import logger
+
+from tasks.services.email_backends import LogEmailBackend, format_message
+from tasks.services.email_service import EmailNotificationService
+
+
+class Command(BaseCommand):
+    help = "Measure the per-email overhead of logging delivered emails"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=2000, help="Emails per run")
+        parser.add_argument("--template", default="emails/welcome.html")
+
+    def handle(self, *args, **options):
+        service = EmailNotificationService()
+        template = service.get_template(options["template"])
+        message = service.build_message("Benchmark", template, ["bench@example.com"], {})
+        backend = LogEmailBackend()
+        count = options["count"]
+
+        def banner():
+            # The previous send_email path: build the full banner, then log it raw
+            logger.opt(raw=True).info(format_message(message))
+
+        def compact():
+            backend.send_messages([message])
+
+        runs = [
+            ("banner, INFO enabled", banner, "INFO", False),
+            ("banner, INFO filtered", banner, "WARNING", False),
+            ("compact, INFO enabled", compact, "INFO", False),
+            ("compact, INFO filtered", compact, "WARNING", False),
+            ("compact + bodies, DEBUG enabled", compact, "DEBUG", True),
+            ("compact + bodies, DEBUG filtered", compact, "INFO", True),
+        ]
+        with open(os.devnull, "w") as devnull:
+            for label, send, level, log_bodies in runs:
+                # Records are formatted and written as they would be to stderr
+                logger.remove()
+                logger.add(devnull, level=level)
+                with override_settings(EMAIL_LOG_BODIES=log_bodies):
+                    start = time.perf_counter()
+                    for _ in range(count):
+                        send()
+                    elapsed = time.perf_counter() - start
+                self.stdout.write(f"{label:<34} {elapsed / count * 1e6:8.1f} us/email")
@@ -0,0 +1,61 @@
+from django.core import mail
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from loguru import logger
+
+from tasks.management.benchmark import percentiles
+from tasks.services.email_service import EmailNotificationService, text_cache
+from tasks.templatetags.mjml import compiled_cache
+
+LOCMEM_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+STAGES = ("template_load", "render", "mjml_compile", "html_to_text", "delivery")
+
+
+class Command(BaseCommand):
+    help = "Per-stage p50/p95 of send_email: template load, render, MJML, html2text, delivery"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=200, help="Emails to send")
+        parser.add_argument("--template", default="emails/welcome.html")
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Clear the MJML and text caches before every email",
+        )
+        parser.add_argument(
+            "--source",
+            action="store_true",
+            help="Render the MJML source instead of the precompiled artifact",
+        )
+        parser.add_argument("--backend", default=LOCMEM_BACKEND, help="Email backend")
+
+    def handle(self, *args, **options):
+        logger.remove()
+        service = EmailNotificationService()
+        samples = {name: [] for name in STAGES}
+        totals = []
+
+        with override_settings(
+            EMAIL_BACKEND=options["backend"], MJML_USE_PRECOMPILED=not options["source"]
+        ):
+            for i in range(options["count"]):
+                if options["cold"]:
+                    compiled_cache.clear()
+                    text_cache.clear()
+                timings = service.send_email(
+                    "Benchmark", options["template"], [f"user{i}@example.com"], {"index": i}
+                )
+                for name in STAGES:
+                    samples[name].append(timings.get(name, 0.0))
+                totals.append(sum(timings.values()))
+                if hasattr(mail, "outbox"):
+                    mail.outbox.clear()
+
+        self.stdout.write(f"{'stage':<14} {'p50 ms':>9} {'p95 ms':>9} {'share':>7}")
+        total = sum(totals)
+        for name in STAGES:
+            p = percentiles(samples[name], (50, 95))
+            share = sum(samples[name]) / total if total else 0
+            self.stdout.write(f"{name:<14} {p['p50']:9.3f} {p['p95']:9.3f} {share:7.1%}")
+        p = percentiles(totals, (50, 95))
+        self.stdout.write(f"{'total':<14} {p['p50']:9.3f} {p['p95']:9.3f}")
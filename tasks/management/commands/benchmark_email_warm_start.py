@@ -0,0 +1,69 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from loguru import logger
+
+from tasks.services.email_service import EmailNotificationService
+from tasks.services.mjml_artifacts import precompile_templates
+
+MODES = ("source", "precompiled")
+
+
+class Command(BaseCommand):
+    help = "Measure first-email latency in fresh processes with and without precompiled MJML"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Fresh processes per mode")
+        parser.add_argument("--template", default="emails/welcome.html")
+        parser.add_argument(
+            "--child", choices=MODES, help="Internal: measure one fresh process"
+        )
+
+    def handle(self, *args, **options):
+        if options["child"]:
+            return self.measure(options["child"], options["template"])
+
+        precompile_templates()
+        for mode in MODES:
+            samples = [self.spawn(mode, options["template"]) for _ in range(options["runs"])]
+            first = [sample["first"] for sample in samples]
+            second = [sample["second"] for sample in samples]
+            self.stdout.write(
+                f"{mode:<12} first email {statistics.median(first) * 1000:8.1f} ms   "
+                f"second email {statistics.median(second) * 1000:8.1f} ms   "
+                f"(median of {len(samples)} processes)"
+            )
+
+    def spawn(self, mode, template):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "manage.py",
+                "benchmark_email_warm_start",
+                "--child",
+                mode,
+                "--template",
+                template,
+            ],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def measure(self, mode, template):
+        logger.remove()
+        settings.MJML_USE_PRECOMPILED = mode == "precompiled"
+        service = EmailNotificationService()
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            service.send_email("Benchmark", template, ["bench@example.com"], {})
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(json.dumps({"first": timings[0], "second": timings[1]}))
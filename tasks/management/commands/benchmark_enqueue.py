@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django_q.brokers import get_broker
+
+from tasks.tasks import sample_task
+
+
+class Command(BaseCommand):
+    help = "Compare enqueue throughput of single delay() calls against delay_many()"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=2000, help="Tasks per run")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            action="append",
+            help="delay_many chunk size, may be repeated (default: 100, 500)",
+        )
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        chunk_sizes = options["chunk_size"] or [100, 500]
+        # A dedicated queue keeps the benchmark away from a running cluster
+        broker = get_broker("benchmark-enqueue")
+        broker.purge_queue()
+        items = [(f"benchmark {i}", 0) for i in range(count)]
+
+        try:
+            start = time.perf_counter()
+            for message, delay in items:
+                sample_task.delay(message, delay, broker=broker)
+            self.report("single delay()", count, time.perf_counter() - start)
+            broker.purge_queue()
+
+            for chunk_size in chunk_sizes:
+                start = time.perf_counter()
+                sample_task.delay_many(items, chunk_size=chunk_size, broker=broker)
+                self.report(
+                    f"delay_many(chunk_size={chunk_size})",
+                    count,
+                    time.perf_counter() - start,
+                )
+                broker.purge_queue()
+        finally:
+            broker.purge_queue()
+
+    def report(self, label, count, elapsed):
+        self.stdout.write(
+            f"{label:<32} {count} tasks in {elapsed:.3f}s "
+            f"({count / elapsed:,.0f} tasks/sec)"
+        )
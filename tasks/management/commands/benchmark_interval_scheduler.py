@@ -0,0 +1,123 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django_q.models import Schedule
+from django_q.scheduler import scheduler
+from loguru import logger
+
+from tasks.models import IntervalSchedule
+from tasks.services.interval_scheduler import IntervalScheduler
+
+HOUR = 3600
+# The cluster's guard loop calls the django-q scheduler about every 30 seconds
+STOCK_PASSES_PER_HOUR = HOUR // 30
+NAME_PREFIX = "benchmark-scheduler-"
+
+
+class CountingBroker:
+    """Stands in for the queue, enqueues cost the same for both schedulers."""
+
+    list_key = "benchmark-scheduler"
+
+    def __init__(self):
+        self.enqueued = 0
+
+    def enqueue(self, pack):
+        self.enqueued += 1
+        return self.enqueued
+
+
+class WriteCounter:
+    def __init__(self):
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().split(None, 1)[0].upper() in ("INSERT", "UPDATE", "DELETE"):
+            self.writes += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Scheduler CPU and schedule/result writes per hour for 1, 100 and 1,000 "
+        "sub-minute schedules: django-q Schedule vs run_interval_scheduler"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--schedules", type=int, action="append", help="Default: 1, 100 and 1000"
+        )
+        parser.add_argument("--interval", type=int, default=5, help="Seconds between runs")
+
+    def handle(self, *args, **options):
+        logger.remove()
+        logging.getLogger("django-q").setLevel(logging.WARNING)
+        self.stdout.write(
+            f"{'schedules':>9}  {'scheduler':<10} {'runs/h':>9} {'cpu s/h':>8} "
+            f"{'cpu ms/run':>10} {'schedule writes/h':>18} {'result rows/h':>14}"
+        )
+        for count in options["schedules"] or [1, 100, 1000]:
+            try:
+                self.report(count, "django-q", *self.measure_stock(count, options["interval"]))
+                self.report(
+                    count, "interval", *self.measure_interval(count, options["interval"])
+                )
+            finally:
+                Schedule.objects.filter(name__startswith=NAME_PREFIX).delete()
+                IntervalSchedule.objects.filter(name__startswith=NAME_PREFIX).delete()
+
+    def report(self, count, label, runs, cpu, schedule_writes, result_rows):
+        self.stdout.write(
+            f"{count:>9}  {label:<10} {runs:>9,} {cpu:>8.2f} {cpu / runs * 1000:>10.3f} "
+            f"{schedule_writes:>18,} {result_rows:>14,}"
+        )
+
+    def measure_stock(self, count, interval):
+        """One scheduler pass with every schedule due, times the passes in an hour."""
+        past = timezone.now() - timedelta(seconds=interval)
+        Schedule.objects.bulk_create(
+            Schedule(
+                name=f"{NAME_PREFIX}{i}",
+                func="tasks.tasks.scheduled_task",
+                schedule_type=Schedule.MINUTES,
+                minutes=interval / 60,
+                repeats=-1,
+                next_run=past,
+            )
+            for i in range(count)
+        )
+        broker, counter = CountingBroker(), WriteCounter()
+        with connection.execute_wrapper(counter):
+            start = time.process_time()
+            scheduler(broker=broker)
+            cpu = time.process_time() - start
+        runs = broker.enqueued * STOCK_PASSES_PER_HOUR
+        # Each run's Task row is saved by the cluster monitor
+        return runs, cpu * STOCK_PASSES_PER_HOUR, counter.writes * STOCK_PASSES_PER_HOUR, runs
+
+    def measure_interval(self, count, interval):
+        """A simulated hour: the clock jumps to each wake-up time step() returns."""
+        IntervalSchedule.objects.bulk_create(
+            IntervalSchedule(
+                name=f"{NAME_PREFIX}{i}", func="tasks.tasks.scheduled_task", interval=interval
+            )
+            for i in range(count)
+        )
+        broker, counter = CountingBroker(), WriteCounter()
+        interval_scheduler = IntervalScheduler(
+            broker=broker,
+            queryset=IntervalSchedule.objects.filter(name__startswith=NAME_PREFIX),
+        )
+        now = 0.0
+        with connection.execute_wrapper(counter):
+            start = time.process_time()
+            while now < HOUR:
+                now = interval_scheduler.step(now)
+            interval_scheduler.checkpoint()
+            cpu = time.process_time() - start
+        # Successful runs are not saved
+        return broker.enqueued, cpu, counter.writes, 0
@@ -0,0 +1,154 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_q.brokers import get_broker
+
+from tasks.management.benchmark import (
+    delete_tasks,
+    finished_tasks,
+    percentiles,
+    start_process,
+    stop_process,
+    wait_for_tasks,
+)
+from tasks.tasks import sample_task, send_email_task
+
+LOCMEM_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+
+class Command(BaseCommand):
+    help = (
+        "Flood the queue with long sample_task jobs, then enqueue emails and report "
+        "their end-to-end latency with one shared cluster and with task lanes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default="shared,lanes", help="Comma separated: shared, lanes")
+        parser.add_argument("--flood", type=int, default=24, help="Long sample tasks in flight")
+        parser.add_argument(
+            "--flood-delay", type=int, default=5, help="Seconds each sample task sleeps"
+        )
+        parser.add_argument("--emails", type=int, default=20, help="Emails to measure")
+        parser.add_argument(
+            "--interval", type=float, default=0.1, help="Seconds between enqueued emails"
+        )
+        parser.add_argument(
+            "--warmup", type=float, default=3, help="Seconds to let the clusters start"
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=300, help="Seconds to wait for the emails"
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument("--child", action="store_true", help="Internal: run one mode")
+
+    def handle(self, *args, **options):
+        if options["child"]:
+            self.stdout.write(json.dumps(self.run_mode(options)))
+            return
+
+        results = [
+            self.spawn(mode.strip(), options)
+            for mode in options["modes"].split(",")
+            if mode.strip()
+        ]
+        report = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "flood": options["flood"],
+            "flood_delay": options["flood_delay"],
+            "emails": options["emails"],
+            "results": results,
+        }
+
+        for result in results:
+            if "error" in result:
+                self.stdout.write(f"{result['mode']:<6} error: {result['error']}")
+                continue
+            latency = result["latency_ms"]
+            self.stdout.write(
+                f"{result['mode']:<6} emails {result['completed']:4}/{options['emails']}   "
+                f"latency p50 {latency['p50'] or 0:9.1f} ms  p90 {latency['p90'] or 0:9.1f} ms  "
+                f"p99 {latency['p99'] or 0:9.1f} ms"
+            )
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def spawn(self, mode, options):
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "manage.py",
+                "benchmark_lanes",
+                "--child",
+                f"--flood={options['flood']}",
+                f"--flood-delay={options['flood_delay']}",
+                f"--emails={options['emails']}",
+                f"--interval={options['interval']}",
+                f"--warmup={options['warmup']}",
+                f"--timeout={options['timeout']}",
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "TASK_LANES_ENABLED": str(mode == "lanes")},
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode:
+            error = completed.stderr.strip().splitlines()[-1:] or ["failed"]
+            return {"mode": mode, "error": error[0]}
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def run_mode(self, options):
+        mode = "lanes" if settings.TASK_LANES_ENABLED else "shared"
+        lanes = list(settings.TASK_LANES) if settings.TASK_LANES_ENABLED else []
+        brokers = [get_broker()] + [get_broker(lane) for lane in lanes]
+        for broker in brokers:
+            broker.purge_queue()
+
+        env = {"Q_CLUSTER_SAVE_LIMIT": "0", "EMAIL_BACKEND": LOCMEM_BACKEND}
+        clusters = [start_process("qcluster", env=env)] + [
+            start_process("qcluster", env={**env, "Q_CLUSTER_NAME": lane}) for lane in lanes
+        ]
+        flood_ids = []
+        email_ids = []
+        try:
+            time.sleep(options["warmup"])
+            flood_ids = [
+                sample_task.delay("flood", options["flood_delay"])
+                for _ in range(options["flood"])
+            ]
+            for i in range(options["emails"]):
+                email_ids.append(
+                    send_email_task.delay(
+                        "Benchmark",
+                        "emails/welcome.html",
+                        f"user{i}@example.com",
+                        {"index": i},
+                    )
+                )
+                time.sleep(options["interval"])
+
+            drained = wait_for_tasks(email_ids, options["timeout"])
+            rows = finished_tasks(email_ids)
+        finally:
+            for cluster in clusters:
+                stop_process(cluster)
+            for broker in brokers:
+                broker.purge_queue()
+
+        delete_tasks(flood_ids + email_ids)
+        latencies = [(stopped - started).total_seconds() * 1000 for _, started, stopped in rows]
+        return {
+            "mode": mode,
+            "clusters": ["default"] + lanes,
+            "completed": len(rows),
+            "drained": drained,
+            "latency_ms": percentiles(latencies),
+        }
@@ -0,0 +1,129 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from loguru import logger
+
+import run
+
+# Prints --lines log-like lines as fast as it can
+PRODUCER = (
+    "import sys\n"
+    "line = '2025-01-01 12:00:00 [Q] INFO Process-1:1 processing job-{} tasks.tasks.sample_task\\n'\n"
+    "for i in range(int(sys.argv[1])):\n"
+    "    sys.stdout.write(line.format(i))\n"
+)
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Command(BaseCommand):
+    help = (
+        "Relay N lines from a child process to /dev/null and report lines/sec and "
+        "relay CPU time for thread+loguru relaying, the selector relay and passthrough"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--modes",
+            default="threads,relay,passthrough",
+            help="Comma separated: threads, relay, passthrough",
+        )
+        parser.add_argument("--lines", type=int, default=200_000, help="Lines per run")
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        modes = {
+            "threads": self.threads,
+            "relay": self.relay,
+            "passthrough": self.passthrough,
+        }
+        results = []
+        with open(os.devnull, "wb") as sink:
+            for mode in options["modes"].split(","):
+                mode = mode.strip()
+                start, cpu = time.perf_counter(), cpu_seconds()
+                modes[mode](options["lines"], sink)
+                seconds = time.perf_counter() - start
+                results.append(
+                    {
+                        "mode": mode,
+                        "seconds": seconds,
+                        "lines_per_sec": options["lines"] / seconds,
+                        "relay_cpu_seconds": cpu_seconds() - cpu,
+                    }
+                )
+
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<12} {result['lines_per_sec']:12,.0f} lines/sec   "
+                f"relay CPU {result['relay_cpu_seconds']:6.2f}s"
+            )
+
+        if options["output"]:
+            report = {
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "lines": options["lines"],
+                "results": results,
+            }
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Report written to {options['output']}")
+
+    @staticmethod
+    def producer(lines):
+        return [sys.executable, "-c", PRODUCER, str(lines)]
+
+    def threads(self, lines, sink):
+        """The previous run.py relay: a readline() thread re-logging each line through loguru."""
+        logger.remove()
+        text_sink = open(os.devnull, "w")
+        handler = logger.add(
+            text_sink,
+            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan> - <level>{message}</level>",
+            colorize=True,
+        )
+        process = subprocess.Popen(
+            self.producer(lines),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            cwd=settings.BASE_DIR,
+        )
+
+        def print_output():
+            for line in iter(process.stdout.readline, ""):
+                line = line.rstrip()
+                if line:
+                    logger.opt(colors=True).info(f"<magenta>[CLUSTER]</magenta> {line}")
+
+        thread = threading.Thread(target=print_output, daemon=True)
+        thread.start()
+        thread.join()
+        process.wait()
+        logger.remove(handler)
+        text_sink.close()
+
+    def relay(self, lines, sink):
+        child = run.Child("CLUSTER", self.producer(lines))
+        supervisor = run.Supervisor([child], output=sink)
+        child.start(relay=True)
+        supervisor.selector.register(child.process.stdout, run.selectors.EVENT_READ, child)
+        while supervisor.selector.get_map():
+            for key, _ in supervisor.selector.select(timeout=1):
+                supervisor.read(key.data, key.fileobj)
+        child.process.wait()
+
+    def passthrough(self, lines, sink):
+        subprocess.run(self.producer(lines), stdout=sink, stderr=sink, check=True)
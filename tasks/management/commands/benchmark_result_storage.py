@@ -0,0 +1,110 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+from django_q.humanhash import uuid
+from django_q.models import Task
+
+from tasks.management.benchmark import percentiles
+from tasks.services import result_storage
+from tasks.services.task_results import fetch_results
+
+# (label, approximate JSON bytes, results stored)
+SIZES = [("1 KB", 1024, 200), ("100 KB", 100 * 1024, 50), ("10 MB", 10 * 1024 * 1024, 3)]
+POLICIES = (None, "compress", "spill")
+
+
+def make_result(size: int, seed: int) -> dict:
+    # Rows of mixed text and numbers, about 80 bytes of JSON each
+    return {
+        "seed": seed,
+        "rows": [
+            {"id": i, "name": f"item-{seed}-{i}", "value": i * 1.5, "tags": ["a", "b"]}
+            for i in range(max(size // 80, 1))
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Task table bytes and result read latency for 1 KB, 100 KB and 10 MB "
+        "results, stored as is, compressed and spilled to files"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--store-dir", default=None, help="File store, default TASK_RESULT_STORE_DIR"
+        )
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options["store_dir"]:
+            overrides["TASK_RESULT_STORE_DIR"] = options["store_dir"]
+        self.stdout.write(
+            f"{'size':<7} {'storage':<9} {'db bytes':>12} {'file bytes':>11} "
+            f"{'encode ms':>10} {'read p50 ms':>12} {'load p50 ms':>12}"
+        )
+        with override_settings(**overrides):
+            for label, size, count in SIZES:
+                for policy in POLICIES:
+                    self.measure(label, size, count, policy)
+
+    def measure(self, label, size, count, policy):
+        task_ids, digests, encode_seconds = [], set(), []
+        now = timezone.now()
+        for seed in range(count):
+            result = make_result(size, seed)
+            start = time.perf_counter()
+            stored = result_storage.encode(result, policy) if policy else result
+            encode_seconds.append(time.perf_counter() - start)
+            if isinstance(stored, result_storage.StoredResult) and stored.digest:
+                digests.add(stored.digest)
+            tag = uuid()
+            # As django_q.monitor.save_task writes it
+            Task.objects.create(
+                id=tag[1],
+                name=tag[0],
+                func="tasks.tasks.sample_task",
+                args=(),
+                kwargs={},
+                result=stored,
+                started=now,
+                stopped=now,
+                success=True,
+            )
+            task_ids.append(tag[1])
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT SUM(LENGTH(result)) FROM {Task._meta.db_table} "
+                    f"WHERE id IN ({', '.join(['%s'] * len(task_ids))})",
+                    task_ids,
+                )
+                db_bytes = cursor.fetchone()[0] / count
+            paths = [result_storage.store_path(digest) for digest in digests]
+            file_bytes = sum(path.stat().st_size for path in paths) / count
+
+            # What TaskResultView does on a cache miss, then the full value
+            reads, loads = [], []
+            for task_id in task_ids:
+                start = time.perf_counter()
+                value = fetch_results([task_id])[task_id][1]
+                result_storage.present(task_id, value)
+                reads.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                result_storage.load(fetch_results([task_id])[task_id][1])
+                loads.append(time.perf_counter() - start)
+        finally:
+            Task.objects.filter(id__in=task_ids).delete()
+            for digest in digests:
+                result_storage.store_path(digest).unlink(missing_ok=True)
+
+        self.stdout.write(
+            f"{label:<7} {policy or 'as is':<9} {db_bytes:>12,.0f} {file_bytes:>11,.0f} "
+            f"{sum(encode_seconds) / count * 1000:>10.2f} "
+            f"{percentiles(reads, (50,))['p50'] * 1000:>12.2f} "
+            f"{percentiles(loads, (50,))['p50'] * 1000:>12.2f}"
+        )
@@ -0,0 +1,118 @@
+import json
+import time
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from tasks.models import IntervalSchedule
+from tasks.pagination import ScheduleCursorPagination
+from tasks.serializers import ScheduleSerializer
+
+NAME_PREFIX = "benchmark-schedule-"
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create, update and list 10,000 interval schedules: one schedule per "
+        "request vs POST /api/schedules/, page numbers vs cursor pages"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10000, help="Schedules")
+        parser.add_argument("--page-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        items = [
+            {"name": f"{NAME_PREFIX}{i:06d}", "func": "tasks.tasks.scheduled_task", "interval": 30}
+            for i in range(count)
+        ]
+        client = APIClient()
+        client.force_authenticate(User(username="benchmark", is_staff=True))
+        try:
+            self.measure("create, one at a time", count, lambda: self.create_one_by_one(items))
+            IntervalSchedule.objects.filter(name__startswith=NAME_PREFIX).delete()
+
+            self.measure("create, bulk API", count, lambda: self.post(client, items))
+            for item in items:
+                item["interval"] = 15
+            self.measure("update, bulk API", count, lambda: self.post(client, items))
+            for i, item in enumerate(items):
+                item["kwargs"] = {"tenant": i}
+            self.measure("update per tenant, bulk API", count, lambda: self.post(client, items))
+
+            size = options["page_size"]
+            self.measure(f"list, page numbers ({size})", count, lambda: self.list_pages(size))
+            self.measure(f"list, cursor ({size})", count, lambda: self.list_cursor(size))
+        finally:
+            IntervalSchedule.objects.filter(name__startswith=NAME_PREFIX).delete()
+
+    def measure(self, label, count, run):
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<30} {count} schedules in {elapsed:7.3f}s "
+            f"({count / elapsed:>9,.0f}/s, {queries.count:>6} queries)"
+        )
+
+    def create_one_by_one(self, items):
+        # The single-schedule pattern: look up by name, save, fetch again
+        for item in items:
+            existing = IntervalSchedule.objects.filter(name=item["name"]).first()
+            if existing is None:
+                schedule_id = IntervalSchedule.objects.create(**item).id
+            else:
+                existing.interval = item["interval"]
+                existing.save()
+                schedule_id = existing.id
+            IntervalSchedule.objects.get(id=schedule_id)
+
+    def post(self, client, items):
+        response = client.post("/api/schedules/", json.dumps(items), content_type="application/json")
+        assert response.status_code == 200, response.content[:500]
+
+    def list_pages(self, size):
+        paginator = PageNumberPagination()
+        paginator.page_size = size
+        queryset = IntervalSchedule.objects.filter(name__startswith=NAME_PREFIX).order_by("name")
+        page_number = 1
+        while True:
+            request = self.request({"page": page_number})
+            page = paginator.paginate_queryset(queryset, request)
+            ScheduleSerializer(page, many=True).data
+            if not paginator.get_next_link():
+                return
+            page_number += 1
+
+    def list_cursor(self, size):
+        paginator = ScheduleCursorPagination()
+        queryset = IntervalSchedule.objects.filter(name__startswith=NAME_PREFIX)
+        params = {"page_size": size}
+        while True:
+            page = paginator.paginate_queryset(queryset, self.request(params))
+            ScheduleSerializer(page, many=True).data
+            next_link = paginator.get_next_link()
+            if not next_link:
+                return
+            params = {"page_size": size, "cursor": parse_qs(urlparse(next_link).query)["cursor"][0]}
+
+    @staticmethod
+    def request(params):
+        return Request(APIRequestFactory().get("/api/schedules/", params))
@@ -0,0 +1,145 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from tasks.management.benchmark import percentiles
+from tasks.renderers import FastJSONRenderer, orjson
+from tasks.serializers import (
+    ScheduledTaskResponseSerializer,
+    ScheduledTaskStatusSerializer,
+    TaskResponseSerializer,
+    TaskResultSerializer,
+    TaskResultsResponseSerializer,
+)
+
+
+def sample_result(rows: int) -> dict:
+    return {
+        "status": "completed",
+        "message": "Processed: benchmark",
+        "rows": [{"id": i, "name": f"item-{i}", "value": i * 1.5} for i in range(rows)],
+    }
+
+
+# (endpoint, response serializer, response data) as the views build them
+CASES = [
+    (
+        "TaskView POST",
+        TaskResponseSerializer,
+        {
+            "task_id": "0f1e2d3c4b5a69788796a5b4c3d2e1f0",
+            "status": "queued",
+            "message": "Task has been enqueued",
+            "input": {"message": "benchmark", "delay": 2},
+            "duplicate": False,
+        },
+    ),
+    (
+        "TaskResultView small",
+        TaskResultSerializer,
+        {
+            "task_id": "0f1e2d3c4b5a69788796a5b4c3d2e1f0",
+            "status": "success",
+            "result": {"status": "completed", "message": "Processed: benchmark", "delay": 2},
+        },
+    ),
+    (
+        "TaskResultView 100 KB",
+        TaskResultSerializer,
+        {
+            "task_id": "0f1e2d3c4b5a69788796a5b4c3d2e1f0",
+            "status": "success",
+            "result": sample_result(2000),
+        },
+    ),
+    (
+        "TaskResultsView 500",
+        TaskResultsResponseSerializer,
+        {
+            "results": [
+                {"task_id": f"{i:032x}", "status": "success", "result": sample_result(2)}
+                for i in range(500)
+            ]
+        },
+    ),
+    (
+        "ScheduledTaskView GET",
+        ScheduledTaskStatusSerializer,
+        {
+            "exists": True,
+            "name": "scheduled_task_5s",
+            "next_run": "2026-01-01T00:00:05+00:00",
+            "schedule_type": "every 5 seconds",
+            "repeats": -1,
+            "success_count": 1234,
+            "last_run": "2026-01-01T00:00:00+00:00",
+        },
+    ),
+    (
+        "ScheduledTaskView POST",
+        ScheduledTaskResponseSerializer,
+        {
+            "status": "success",
+            "message": "Scheduled task updated",
+            "schedule_id": 1,
+            "next_run": "2026-01-01T00:00:05+00:00",
+            "schedule_type": "every 5 seconds",
+        },
+    ),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Serialization and JSON rendering time per response, DRF Serializer(data).data "
+        "with JSONRenderer vs OutputSerializer.dump with FastJSONRenderer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000, help="Runs per case")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"orjson: {'installed' if orjson else 'not installed, json fallback'}")
+        self.stdout.write(
+            f"{'endpoint':<24} {'path':<7} {'serialize us':>13} {'render us':>10} "
+            f"{'total us':>9} {'speedup':>8}"
+        )
+        iterations = options["iterations"]
+        for endpoint, serializer_class, data in CASES:
+            before = self.measure(
+                lambda: serializer_class(data).data, JSONRenderer(), iterations
+            )
+            after = self.measure(
+                lambda: serializer_class.dump(data), FastJSONRenderer(), iterations
+            )
+            if json.loads(before["body"]) != json.loads(after["body"]):
+                raise RuntimeError(f"{endpoint}: fast path output differs")
+            for path, times in (("before", before), ("after", after)):
+                speedup = before["total"] / times["total"]
+                self.stdout.write(
+                    f"{endpoint:<24} {path:<7} {times['serialize']:>13.1f} "
+                    f"{times['render']:>10.1f} {times['total']:>9.1f} {speedup:>7.1f}x"
+                )
+
+    def measure(self, serialize, renderer, iterations):
+        serialize_times, render_times, totals = [], [], []
+        # Warm up, the first dump() compiles the field plan
+        for _ in range(min(iterations // 10, 100)):
+            renderer.render(serialize())
+        for _ in range(iterations):
+            start = time.perf_counter()
+            data = serialize()
+            middle = time.perf_counter()
+            body = renderer.render(data)
+            end = time.perf_counter()
+            serialize_times.append(middle - start)
+            render_times.append(end - middle)
+            totals.append(end - start)
+        return {
+            "serialize": percentiles(serialize_times, (50,))["p50"] * 1e6,
+            "render": percentiles(render_times, (50,))["p50"] * 1e6,
+            "total": percentiles(totals, (50,))["p50"] * 1e6,
+            "body": body,
+        }
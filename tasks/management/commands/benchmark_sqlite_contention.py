@@ -0,0 +1,222 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+from django.utils import timezone as django_timezone
+from django_q.brokers import get_broker
+from django_q.models import Task
+from django_q.signing import SignedPackage
+
+from tasks.management.benchmark import percentiles
+from tasks.tasks import sample_task
+
+QUEUE_NAME = "benchmark-sqlite"
+
+PROFILES = {
+    "stock": {"SQLITE_HIGH_CONCURRENCY": "False"},
+    "tuned": {"SQLITE_HIGH_CONCURRENCY": "True"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent enqueue (web) and dequeue (cluster) processes against a "
+        "scratch SQLite database and report lock errors, lock waits and throughput "
+        "for the stock and the tuned connection profile"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profiles", default="stock,tuned", help="Comma separated: stock, tuned"
+        )
+        parser.add_argument(
+            "--separate-broker",
+            action="store_true",
+            help="Also keep the queue in its own database file",
+        )
+        parser.add_argument("--enqueuers", type=int, default=4, help="Web processes")
+        parser.add_argument("--dequeuers", type=int, default=2, help="Cluster processes")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds per profile")
+        parser.add_argument(
+            "--slow-ms",
+            type=float,
+            default=50,
+            help="Operations slower than this count as lock waits",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument(
+            "--child", choices=["enqueue", "dequeue"], help="Internal: run one worker"
+        )
+
+    def handle(self, *args, **options):
+        if options["child"]:
+            worker = self.enqueue if options["child"] == "enqueue" else self.dequeue
+            report = worker(time.monotonic() + options["duration"], options["slow_ms"])
+            self.stdout.write(json.dumps(report))
+            return
+
+        results = [
+            self.run_profile(profile.strip(), options)
+            for profile in options["profiles"].split(",")
+            if profile.strip()
+        ]
+        report = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "enqueuers": options["enqueuers"],
+            "dequeuers": options["dequeuers"],
+            "duration": options["duration"],
+            "separate_broker": options["separate_broker"],
+            "results": results,
+        }
+
+        for result in results:
+            if "error" in result:
+                self.stdout.write(f"{result['profile']:<6} error: {result['error']}")
+                continue
+            for role in ("enqueue", "dequeue"):
+                stats = result[role]
+                self.stdout.write(
+                    f"{result['profile']:<6} {role:<8} {stats['rate']:8,.0f} ops/sec   "
+                    f"locked {stats['locked']:5}   waits {stats['waits']:5} "
+                    f"({stats['wait_seconds']:.2f}s)   p99 {stats['latency_ms']['p99'] or 0:8.1f} ms"
+                )
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def run_profile(self, profile, options):
+        with tempfile.TemporaryDirectory() as scratch:
+            env = {
+                **os.environ,
+                **PROFILES[profile],
+                "Q_BROKER": "orm",
+                "SQLITE_PATH": str(Path(scratch) / "db.sqlite3"),
+            }
+            databases = ["default"]
+            if options["separate_broker"]:
+                env["SQLITE_BROKER_PATH"] = str(Path(scratch) / "broker.sqlite3")
+                databases.append("broker")
+            for database in databases:
+                subprocess.run(
+                    [sys.executable, "manage.py", "migrate", "--noinput", "--database", database],
+                    cwd=settings.BASE_DIR,
+                    env=env,
+                    capture_output=True,
+                    check=True,
+                )
+
+            roles = ["enqueue"] * options["enqueuers"] + ["dequeue"] * options["dequeuers"]
+            children = [
+                (
+                    role,
+                    subprocess.Popen(
+                        [
+                            sys.executable,
+                            "manage.py",
+                            "benchmark_sqlite_contention",
+                            f"--child={role}",
+                            f"--duration={options['duration']}",
+                            f"--slow-ms={options['slow_ms']}",
+                        ],
+                        cwd=settings.BASE_DIR,
+                        env=env,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        text=True,
+                    ),
+                )
+                for role in roles
+            ]
+
+            reports = {"enqueue": [], "dequeue": []}
+            for role, child in children:
+                stdout, stderr = child.communicate()
+                if child.returncode:
+                    error = stderr.strip().splitlines()[-1:] or ["failed"]
+                    return {"profile": profile, "error": error[0]}
+                reports[role].append(json.loads(stdout.strip().splitlines()[-1]))
+
+        return {
+            "profile": profile,
+            **{role: self.combine(items, options["duration"]) for role, items in reports.items()},
+        }
+
+    @staticmethod
+    def combine(reports, duration):
+        latencies = [latency for report in reports for latency in report["latencies"]]
+        return {
+            "ops": sum(report["ops"] for report in reports),
+            "rate": sum(report["ops"] for report in reports) / duration,
+            "locked": sum(report["locked"] for report in reports),
+            "waits": sum(report["waits"] for report in reports),
+            "wait_seconds": sum(report["wait_seconds"] for report in reports),
+            "latency_ms": percentiles(latencies),
+        }
+
+    def measure(self, deadline, slow_ms, operation):
+        """Call ``operation`` until the deadline, timing it and counting lock errors."""
+        report = {"ops": 0, "locked": 0, "waits": 0, "wait_seconds": 0.0, "latencies": []}
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            locked = False
+            try:
+                done = operation()
+            except OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                report["locked"] += 1
+                locked = True
+                done = 0
+            elapsed = time.perf_counter() - start
+            # An empty dequeue sleeps Q_CLUSTER["poll"], that is not a lock wait
+            if (done or locked) and elapsed * 1000 > slow_ms:
+                report["waits"] += 1
+                report["wait_seconds"] += elapsed
+            if done:
+                report["ops"] += done
+                report["latencies"].append(elapsed * 1000)
+        return report
+
+    def enqueue(self, deadline, slow_ms):
+        broker = get_broker(QUEUE_NAME)
+
+        def operation():
+            sample_task.delay("benchmark", 0, broker=broker)
+            return 1
+
+        return self.measure(deadline, slow_ms, operation)
+
+    def dequeue(self, deadline, slow_ms):
+        """Pull packages like a cluster and save a Task row for each of them."""
+        broker = get_broker(QUEUE_NAME)
+
+        def operation():
+            packages = broker.dequeue() or []
+            for ack_id, package in packages:
+                task = SignedPackage.loads(package)
+                now = django_timezone.now()
+                Task.objects.create(
+                    id=task["id"],
+                    name=task["name"],
+                    func=task["func"],
+                    args=task["args"],
+                    kwargs=task["kwargs"],
+                    started=task["started"],
+                    stopped=now,
+                    result=None,
+                    success=True,
+                    attempt_count=1,
+                )
+                broker.acknowledge(ack_id)
+            return len(packages)
+
+        return self.measure(deadline, slow_ms, operation)
@@ -0,0 +1,232 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from django_q.humanhash import uuid
+from django_q.models import Task
+
+from tasks.management.benchmark import percentiles
+from tasks.services import retention
+
+SCENARIOS = ("unpruned", "pruned")
+# Share of traffic per function: the 5 second heartbeat, sample_task calls
+# and a few failures
+TRAFFIC = [
+    ("tasks.tasks.scheduled_task", True, 0.6),
+    ("tasks.tasks.sample_task", True, 0.39),
+    ("tasks.tasks.sample_task", False, 0.01),
+]
+INSERT_BATCH = 5000
+# Result lookups are for recent successes, as clients poll what they just enqueued
+RECENT = 10000
+
+
+class DeleteTimer:
+    """Longest DELETE statement, the longest write lock a prune holds."""
+
+    def __init__(self):
+        self.longest = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith("DELETE"):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.longest = max(self.longest, time.perf_counter() - start)
+
+
+class Command(BaseCommand):
+    help = (
+        "Grow a scratch Task table to 1M rows and report TaskResultView latency "
+        "and database file size at each step, without and with periodic pruning"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--steps",
+            default="10000,100000,1000000",
+            help="Comma separated table sizes (rows inserted) to measure at",
+        )
+        parser.add_argument(
+            "--per-minute", type=float, default=20, help="Simulated tasks finished per minute"
+        )
+        parser.add_argument(
+            "--prune-every",
+            type=int,
+            default=50000,
+            help="Rows inserted between prunes in the pruned scenario",
+        )
+        parser.add_argument("--requests", type=int, default=300, help="Lookups per step")
+        parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument("--child", choices=SCENARIOS, help="Internal: run one scenario")
+
+    def handle(self, *args, **options):
+        steps = sorted(int(step) for step in options["steps"].split(","))
+        if options["child"]:
+            report = self.run_child(options["child"], steps, options)
+            self.stdout.write(json.dumps(report))
+            return
+
+        results = [
+            self.run_scenario(scenario.strip(), options)
+            for scenario in options["scenarios"].split(",")
+            if scenario.strip()
+        ]
+        self.stdout.write(
+            f"{'scenario':<9} {'inserted':>10} {'rows':>10} {'db MB':>8} "
+            f"{'p50 ms':>7} {'p99 ms':>7} {'prune s':>8} {'max DELETE ms':>14}"
+        )
+        for result in results:
+            if "error" in result:
+                self.stdout.write(f"{result['scenario']:<9} error: {result['error']}")
+                continue
+            for step in result["steps"]:
+                self.stdout.write(
+                    f"{result['scenario']:<9} {step['inserted']:>10,} {step['rows']:>10,} "
+                    f"{step['db_bytes'] / 1e6:>8.1f} {step['latency_ms']['p50']:>7.2f} "
+                    f"{step['latency_ms']['p99']:>7.2f} {step['prune_seconds']:>8.2f} "
+                    f"{step['longest_delete_ms']:>14.1f}"
+                )
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def run_scenario(self, scenario, options):
+        with tempfile.TemporaryDirectory() as scratch:
+            env = {
+                **os.environ,
+                "Q_BROKER": "orm",
+                "SQLITE_PATH": str(Path(scratch) / "db.sqlite3"),
+                "AUTO_CREATE_SCHEDULED_TASK": "False",
+                "AUTO_CREATE_PRUNE_SCHEDULE": "False",
+            }
+            subprocess.run(
+                [sys.executable, "manage.py", "migrate", "--noinput"],
+                cwd=settings.BASE_DIR,
+                env=env,
+                capture_output=True,
+                check=True,
+            )
+            child = subprocess.run(
+                [
+                    sys.executable,
+                    "manage.py",
+                    "benchmark_task_retention",
+                    f"--child={scenario}",
+                    f"--steps={options['steps']}",
+                    f"--per-minute={options['per_minute']}",
+                    f"--prune-every={options['prune_every']}",
+                    f"--requests={options['requests']}",
+                ],
+                cwd=settings.BASE_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+        if child.returncode:
+            error = child.stderr.strip().splitlines()[-1:] or ["failed"]
+            return {"scenario": scenario, "error": error[0]}
+        return json.loads(child.stdout.strip().splitlines()[-1])
+
+    def run_child(self, scenario, steps, options):
+        pruned = scenario == "pruned"
+        if pruned:
+            # A fresh database, so switching costs nothing here
+            retention.enable_incremental_vacuum()
+
+        interval = timedelta(minutes=1) / options["per_minute"]
+        start = timezone.now() - interval * steps[-1]
+        weights = [share for _, _, share in TRAFFIC]
+        rng = random.Random(0)
+        client = Client()
+        cache = caches[settings.TASK_RESULT_CACHE]
+        timer = DeleteTimer()
+        ids, inserted, report = [], 0, {"scenario": scenario, "steps": []}
+        prune_seconds = 0.0
+
+        for step in steps:
+            while inserted < step:
+                count = min(INSERT_BATCH, step - inserted)
+                if pruned:
+                    # Stop at the next prune
+                    prune_every = options["prune_every"]
+                    count = min(count, prune_every - inserted % prune_every)
+                rows = []
+                for i in range(inserted, inserted + count):
+                    func, success, _ = rng.choices(TRAFFIC, weights)[0]
+                    tag = uuid()
+                    stopped = start + interval * i
+                    rows.append(
+                        Task(
+                            id=tag[1],
+                            name=tag[0],
+                            func=func,
+                            args=(),
+                            kwargs={},
+                            result={
+                                "status": "completed",
+                                "message": f"Scheduled task executed at {stopped}",
+                                "timestamp": str(stopped),
+                            }
+                            if success
+                            else "Traceback (most recent call last): ...",
+                            started=stopped,
+                            stopped=stopped,
+                            success=success,
+                        )
+                    )
+                    if success:
+                        ids.append(tag[1])
+                Task.objects.bulk_create(rows)
+                inserted += count
+                ids = ids[-RECENT:]
+
+                if pruned and inserted % options["prune_every"] == 0:
+                    began = time.perf_counter()
+                    with connection.execute_wrapper(timer):
+                        retention.prune(now=start + interval * inserted)
+                    prune_seconds += time.perf_counter() - began
+
+            latencies = []
+            for task_id in rng.sample(ids, min(options["requests"], len(ids))):
+                # Every lookup reaches the database
+                cache.clear()
+                began = time.perf_counter()
+                response = client.get(reverse("tasks:task_result"), {"task_id": task_id})
+                latencies.append((time.perf_counter() - began) * 1000)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{task_id}: {response.status_code}")
+
+            db_path = Path(settings.DATABASES["default"]["NAME"])
+            wal_path = db_path.with_name(db_path.name + "-wal")
+            report["steps"].append(
+                {
+                    "inserted": inserted,
+                    "rows": Task.objects.count(),
+                    "db_bytes": db_path.stat().st_size
+                    + (wal_path.stat().st_size if wal_path.exists() else 0),
+                    "latency_ms": percentiles(latencies),
+                    "prune_seconds": prune_seconds,
+                    "longest_delete_ms": timer.longest * 1000,
+                }
+            )
+            prune_seconds, timer.longest = 0.0, 0.0
+            self.stderr.write(f"{scenario}: {inserted:,} rows inserted")
+        return report
@@ -0,0 +1,228 @@
+import http.client
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_q.brokers import get_broker
+
+import run
+from tasks.management.benchmark import (
+    delete_tasks,
+    percentiles,
+    start_process,
+    stop_process,
+    wait_for_tasks,
+)
+
+QUEUE_NAME = "benchmark-api"
+
+
+class Client:
+    """
+    A connection per request, or with ``keepalive`` one per thread. Keep-alive
+    against runserver adds ~40ms per request from Nagle's algorithm meeting
+    delayed ACKs, which is not what a production server costs.
+    """
+
+    def __init__(self, base_url, keepalive=False):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.keepalive = keepalive
+        self.local = threading.local()
+
+    def request(self, method, path, body=None):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            if self.keepalive:
+                self.local.connection = connection
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self.local.connection = None
+            raise
+        finally:
+            if not self.keepalive:
+                connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test POST /api/task/ and GET /api/task/result/ against runserver, "
+        "gunicorn (WSGI) and uvicorn (ASGI) and report requests/sec and latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--servers",
+            default="runserver,gunicorn,uvicorn",
+            help="Comma separated servers to start: runserver, gunicorn, uvicorn",
+        )
+        parser.add_argument("--url", help="Test an already running server instead")
+        parser.add_argument("--bind", default="127.0.0.1:8765", help="Address for started servers")
+        parser.add_argument(
+            "--workers", type=int, default=run.WEB_WORKERS, help="gunicorn/uvicorn workers"
+        )
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario")
+        parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+        parser.add_argument(
+            "--keepalive", action="store_true", help="Reuse one connection per client"
+        )
+        parser.add_argument(
+            "--with-cluster",
+            action="store_true",
+            help="Run a cluster so lookups hit finished tasks instead of pending ones",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            results = [self.run_scenarios("external", options["url"], options)]
+        else:
+            results = [
+                self.run_server(server.strip(), options)
+                for server in options["servers"].split(",")
+                if server.strip()
+            ]
+
+        for result in results:
+            if "error" in result:
+                self.stdout.write(f"{result['server']:<10} error: {result['error']}")
+                continue
+            for name in ("enqueue", "result"):
+                scenario = result[name]
+                latency = scenario["latency_ms"]
+                self.stdout.write(
+                    f"{result['server']:<10} {name:<8} {scenario['rps']:8,.0f} req/sec   "
+                    f"p50 {latency['p50']:7.1f} ms  p99 {latency['p99']:7.1f} ms   "
+                    f"errors {scenario['errors']}"
+                )
+
+        if options["output"]:
+            report = {
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+                "workers": options["workers"],
+                "results": results,
+            }
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def run_server(self, server, options):
+        args = run.server_args(server, options["workers"], options["bind"])
+        if server == "runserver":
+            args.append("--noreload")
+        process = subprocess.Popen(
+            args,
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "Q_CLUSTER_NAME": QUEUE_NAME},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            base_url = f"http://{options['bind']}"
+            if not self.wait_until_ready(process, base_url):
+                error = process.stderr.read().decode().strip().splitlines()[-1:] or ["not ready"]
+                return {"server": server, "error": error[0]}
+            return self.run_scenarios(server, base_url, options)
+        finally:
+            stop_process(process)
+
+    @staticmethod
+    def wait_until_ready(process, base_url, timeout: float = 30) -> bool:
+        client = Client(base_url)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and process.poll() is None:
+            try:
+                if client.request("GET", "/api/stats/")[0] == 200:
+                    return True
+            except OSError:
+                time.sleep(0.2)
+        return False
+
+    def run_scenarios(self, server, base_url, options):
+        client = Client(base_url, options["keepalive"])
+        broker = get_broker(QUEUE_NAME)
+        cluster = None
+        if options["with_cluster"]:
+            cluster = start_process(
+                "qcluster", env={"Q_CLUSTER_NAME": QUEUE_NAME, "Q_CLUSTER_SAVE_LIMIT": "0"}
+            )
+        task_ids = []
+        try:
+            enqueue = self.load(
+                client,
+                options,
+                lambda i: (
+                    "POST",
+                    "/api/task/",
+                    json.dumps({"message": f"load-{i}", "delay": 0}),
+                ),
+                collect=task_ids,
+            )
+            if cluster:
+                wait_for_tasks(task_ids, timeout=120)
+            result = self.load(
+                client,
+                options,
+                lambda i: (
+                    "GET",
+                    "/api/task/result/?" + urlencode({"task_id": task_ids[i % len(task_ids)]}),
+                    None,
+                ),
+            )
+        finally:
+            if cluster:
+                stop_process(cluster)
+            broker.purge_queue()
+            delete_tasks(task_ids)
+        return {"server": server, "enqueue": enqueue, "result": result}
+
+    @staticmethod
+    def load(client, options, make_request, collect=None):
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+
+        def send(i):
+            nonlocal errors
+            method, path, body = make_request(i)
+            start = time.perf_counter()
+            try:
+                status, content = client.request(method, path, body)
+            except (OSError, http.client.HTTPException):
+                status, content = None, b""
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                # A pending task answers 404, which is still a served lookup
+                if status not in (200, 404):
+                    errors += 1
+                elif collect is not None and status == 200:
+                    collect.append(json.loads(content)["task_id"])
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as pool:
+            list(pool.map(send, range(options["requests"])))
+        seconds = time.perf_counter() - start
+        return {
+            "requests": options["requests"],
+            "errors": errors,
+            "seconds": seconds,
+            "rps": options["requests"] / seconds,
+            "latency_ms": percentiles(latencies),
+        }
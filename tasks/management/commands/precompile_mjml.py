@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.services.mjml_artifacts import precompile_templates
+
+
+class Command(BaseCommand):
+    help = "Compile the MJML blocks of email templates into HTML template artifacts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true", help="Rebuild artifacts that are still fresh"
+        )
+
+    def handle(self, *args, **options):
+        report = precompile_templates(force=options["force"])
+        for template_name, status in report:
+            self.stdout.write(f"{template_name}: {status}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(report)} templates checked, artifacts in {settings.MJML_ARTIFACT_DIR}"
+            )
+        )
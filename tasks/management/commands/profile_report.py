@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.services import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize sampled task profiles into the hottest functions and, with "
+        "TASK_PROFILE_MEMORY, the largest allocations per task"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--task", help="Only this task, e.g. tasks.tasks.send_email_task")
+        parser.add_argument("--top", type=int, default=20, help="Rows per table")
+        parser.add_argument(
+            "--sort", choices=["cumulative", "tottime", "calls"], default="cumulative"
+        )
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete the profiles after reporting"
+        )
+
+    def handle(self, *args, **options):
+        func_paths = [options["task"]] if options["task"] else profiling.profiled_tasks()
+        if not func_paths:
+            self.stdout.write(
+                f"No profiles in {settings.TASK_PROFILE_DIR}, set TASK_PROFILE_RATE "
+                "and run some shared_task(profile=True) tasks"
+            )
+            return
+
+        for func_path in func_paths:
+            runs, rows = profiling.top_functions(func_path, options["top"], options["sort"])
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{func_path} ({runs} runs)"))
+            self.stdout.write(f"{'calls':>10} {'tottime ms':>11} {'cumtime ms':>11}  function")
+            for calls, total, cumulative, location in rows:
+                self.stdout.write(
+                    f"{calls:10.1f} {total * 1e3:11.2f} {cumulative * 1e3:11.2f}  {location}"
+                )
+
+            runs, rows = profiling.top_allocations(func_path, options["top"])
+            if runs:
+                self.stdout.write(f"\nRetained allocations ({runs} runs)")
+                self.stdout.write(f"{'KiB':>10} {'blocks':>8}  line")
+                for size, count, location in rows:
+                    self.stdout.write(f"{size / 1024:10.1f} {count:8.1f}  {location}")
+            self.stdout.write("")
+
+            if options["clear"]:
+                profiling.clear(func_path)
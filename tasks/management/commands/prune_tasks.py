@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from tasks.services import retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete finished tasks past the retention policy (TASK_RETENTION_*) in "
+        "bounded chunks, then vacuum and analyze the SQLite database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--success-days", type=float, help="Override TASK_RETENTION_SUCCESS_DAYS"
+        )
+        parser.add_argument(
+            "--failure-days", type=float, help="Override TASK_RETENTION_FAILURE_DAYS"
+        )
+        parser.add_argument("--max-per-func", type=int, help="Override TASK_RETENTION_MAX_PER_FUNC")
+        parser.add_argument(
+            "--max-seconds", type=float, help="Stop after this long, the next run continues"
+        )
+        parser.add_argument(
+            "--no-compact", action="store_true", help="Skip the vacuum and ANALYZE"
+        )
+        parser.add_argument(
+            "--enable-incremental-vacuum",
+            action="store_true",
+            help="Switch SQLite to auto_vacuum=INCREMENTAL first, rewrites the file once",
+        )
+        parser.add_argument(
+            "--schedule",
+            action="store_true",
+            help="Create or reset the prune_tasks IntervalSchedule instead of pruning now",
+        )
+
+    def handle(self, *args, **options):
+        if options["schedule"]:
+            schedule, created = retention.create_schedule()
+            self.stdout.write(f"{'Created' if created else 'Updated'} schedule {schedule}")
+            return
+
+        if options["enable_incremental_vacuum"]:
+            if retention.enable_incremental_vacuum():
+                self.stdout.write("SQLite auto_vacuum set to INCREMENTAL")
+            else:
+                self.stdout.write("Not a SQLite database, nothing to change")
+
+        overrides = {
+            setting: options[option]
+            for option, setting in (
+                ("success_days", "TASK_RETENTION_SUCCESS_DAYS"),
+                ("failure_days", "TASK_RETENTION_FAILURE_DAYS"),
+                ("max_per_func", "TASK_RETENTION_MAX_PER_FUNC"),
+            )
+            if options[option] is not None
+        }
+        with override_settings(**overrides):
+            report = retention.prune(
+                max_seconds=options["max_seconds"], compact=not options["no_compact"]
+            )
+
+        for func, deleted in sorted(report["deleted"].items()):
+            self.stdout.write(f"{deleted:>10,}  {func}")
+        self.stdout.write(
+            f"Deleted {report['total']:,} tasks and {report['files']:,} result files, "
+            f"vacuumed {report['vacuumed_pages']:,} pages"
+        )
+        if not report["complete"]:
+            self.stdout.write("Stopped at --max-seconds, run again to continue")
@@ -0,0 +1,61 @@
+import multiprocessing
+import signal
+
+from django import db
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_q.conf import Conf
+
+from tasks.async_worker import AsyncWorker
+from tasks.services import metrics
+
+
+def run_worker(concurrency):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    AsyncWorker(concurrency).run()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run an async cluster: Q_CLUSTER workers processes, each running up to "
+        "--concurrency tasks on its own event loop"
+    )
+
+    def add_arguments(self, parser):
+        lane = settings.TASK_LANES.get(Conf.CLUSTER_NAME, {})
+        parser.add_argument(
+            "--workers", type=int, default=Conf.WORKERS, help="Worker processes"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=lane.get("concurrency", settings.TASK_ASYNC_CONCURRENCY),
+            help="Concurrent tasks per worker",
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] == 1:
+            AsyncWorker(options["concurrency"]).run()
+            return
+
+        # Children open their own database connections
+        db.connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=run_worker, args=(options["concurrency"],), name=f"async-worker-{i}"
+            )
+            for i in range(options["workers"])
+        ]
+        for worker in workers:
+            worker.start()
+
+        def stop(signum, frame):
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        for worker in workers:
+            worker.join()
+            metrics.mark_process_dead(worker.pid)
@@ -0,0 +1,20 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from tasks.services.interval_scheduler import IntervalScheduler
+
+
+class Command(BaseCommand):
+    help = "Enqueue IntervalSchedule tasks at second granularity, run a single instance"
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+
+        def shutdown(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+        IntervalScheduler().run(stop)
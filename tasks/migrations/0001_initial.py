@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntervalSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('func', models.CharField(help_text='Dotted path of the task function', max_length=256)),
+                ('args', models.JSONField(blank=True, default=list)),
+                ('kwargs', models.JSONField(blank=True, default=dict)),
+                ('interval', models.PositiveIntegerField(help_text='Seconds between runs')),
+                ('cluster', models.CharField(blank=True, max_length=100, null=True)),
+                ('enabled', models.BooleanField(default=True)),
+                ('store_success', models.BooleanField(default=False, help_text='Save results of successful runs, failures are always saved')),
+                ('last_run', models.DateTimeField(blank=True, null=True)),
+                ('run_count', models.PositiveBigIntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+
+def move_heartbeat(apps, schema_editor):
+    """Replace the django-q heartbeat schedule with an IntervalSchedule."""
+    Schedule = apps.get_model("django_q", "Schedule")
+    IntervalSchedule = apps.get_model("tasks", "IntervalSchedule")
+    db = schema_editor.connection.alias
+    stock = Schedule.objects.using(db).filter(name="scheduled_task_5s")
+    if stock.exists():
+        IntervalSchedule.objects.using(db).get_or_create(
+            name="scheduled_task_5s",
+            defaults={"func": "tasks.tasks.scheduled_task", "interval": 5},
+        )
+        stock.delete()
+
+
+def restore_heartbeat(apps, schema_editor):
+    """Recreate the django-q heartbeat schedule as it was before the move."""
+    Schedule = apps.get_model("django_q", "Schedule")
+    IntervalSchedule = apps.get_model("tasks", "IntervalSchedule")
+    db = schema_editor.connection.alias
+    moved = IntervalSchedule.objects.using(db).filter(name="scheduled_task_5s").first()
+    if moved is None:
+        return
+    Schedule.objects.using(db).get_or_create(
+        name="scheduled_task_5s",
+        defaults={
+            "func": moved.func,
+            "schedule_type": "I",
+            "minutes": moved.interval / 60,
+            "repeats": -1,
+        },
+    )
+    moved.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_q", "0019_alter_task_options_alter_ormq_key_alter_ormq_lock_and_more"),
+        ("tasks", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_heartbeat, restore_heartbeat),
+    ]
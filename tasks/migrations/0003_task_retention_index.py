@@ -0,0 +1,27 @@
+from django.db import migrations
+
+TABLE = "django_q_task"
+INDEX = "tasks_retention_index"
+
+
+class Migration(migrations.Migration):
+    """
+    Index django-q's Task table for services.retention: expired rows of a
+    function and its newest successes are range scans instead of full scans.
+
+    The table belongs to django_q, whose own indexes fit none of these
+    queries. A django_q migration that rebuilds the table drops this index;
+    the ``tasks.W001`` check reports that, and both directions tolerate it.
+    """
+
+    dependencies = [
+        ("django_q", "0019_alter_task_options_alter_ormq_key_alter_ormq_lock_and_more"),
+        ("tasks", "0002_move_heartbeat_schedule"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE INDEX IF NOT EXISTS "{INDEX}" ON "{TABLE}" ("func", "success", "stopped")',
+            f'DROP INDEX IF EXISTS "{INDEX}"',
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_retention_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('task_id', models.CharField(blank=True, max_length=32, null=True)),
+                ('expires', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
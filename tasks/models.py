@@ -0,0 +1,46 @@
+from django.db import models
+
+
+class IntervalSchedule(models.Model):
+    """
+    A task run every ``interval`` seconds by ``manage.py run_interval_scheduler``.
+
+    Due times live in the scheduler's memory; this row only holds the
+    definition and a checkpoint (``last_run``, ``run_count``) written every
+    TASK_SCHEDULER_CHECKPOINT seconds, so a run costs no schedule write.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    func = models.CharField(max_length=256, help_text="Dotted path of the task function")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    interval = models.PositiveIntegerField(help_text="Seconds between runs")
+    cluster = models.CharField(max_length=100, null=True, blank=True)
+    enabled = models.BooleanField(default=True)
+    store_success = models.BooleanField(
+        default=False, help_text="Save results of successful runs, failures are always saved"
+    )
+    last_run = models.DateTimeField(null=True, blank=True)
+    run_count = models.PositiveBigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return f"{self.name} (every {self.interval}s)"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A reserved idempotency key. The unique ``key`` makes the reservation
+    atomic across web and cluster processes; ``task_id`` is filled in once
+    the task is enqueued. Rows past ``expires`` are free to be taken over.
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    task_id = models.CharField(max_length=32, null=True, blank=True)
+    expires = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key} -> {self.task_id or 'reserved'}"
@@ -0,0 +1,11 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class ScheduleCursorPagination(CursorPagination):
+    """Keyset pages over the unique name index, without the COUNT(*) of page numbers."""
+
+    ordering = "name"
+    page_size = settings.SCHEDULES_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 1000
@@ -0,0 +1,74 @@
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Dates and times go through JSONEncoder, so they render exactly as with json
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson is not None else 0
+)
+encoder_default = JSONEncoder().default
+
+
+def dumps(data) -> str:
+    """Compact JSON of ``data`` for streamed responses, with orjson when installed."""
+    if orjson is not None:
+        try:
+            return escape_separators(
+                orjson.dumps(data, default=encoder_default, option=ORJSON_OPTIONS)
+            ).decode("utf-8")
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+
+
+def escape_separators(body: bytes) -> bytes:
+    # JSONRenderer escapes U+2028/U+2029 so the output is valid JavaScript
+    if b"\xe2\x80\xa8" in body or b"\xe2\x80\xa9" in body:
+        body = body.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    return body
+
+
+def format_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes compact responses with orjson when it is
+    installed, falling back to ``json`` for indented output, ASCII-only
+    settings and values orjson rejects (e.g. integers over 64 bits).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            body = orjson.dumps(data, default=encoder_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return escape_separators(body)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Negotiates ``text/event-stream``; non-streamed responses become one error event."""
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return format_event("error", data).encode(self.charset)
@@ -0,0 +1,27 @@
+class BrokerRouter:
+    """
+    Keeps django-q's queue table (OrmQ) in the "broker" database so queue
+    churn does not contend with result and schedule writes in "default".
+    """
+
+    broker_db = "broker"
+
+    def is_queue(self, model):
+        return model._meta.label == "django_q.OrmQ"
+
+    def db_for_read(self, model, **hints):
+        if self.is_queue(model):
+            return self.broker_db
+        return None
+
+    def db_for_write(self, model, **hints):
+        if self.is_queue(model):
+            return self.broker_db
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == "django_q" and model_name == "ormq":
+            return db == self.broker_db
+        if db == self.broker_db:
+            return False
+        return None
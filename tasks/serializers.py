@@ -1,4 +1,78 @@
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.fields import _UnvalidatedField, empty
+
+from .decorators import registry
+
+
+# A response-only serializer. ``dump(data)`` returns what ``cls(data).data``
+# does for a dict, from fields bound once per class instead of deep-copied and
+# bound on every instance. The declared fields still describe the response to
+# drf-spectacular. (A docstring here would become every subclass's schema
+# description.)
+class OutputSerializer(serializers.Serializer):
+    @classmethod
+    def dump(cls, data: dict) -> dict:
+        plan = cls.__dict__.get("_plan")
+        if plan is None:
+            plan = cls._plan = [
+                (name, field.source, _representation(field), _missing(field))
+                for name, field in cls().fields.items()
+                if not field.write_only
+            ]
+        ret = {}
+        for name, key, convert, default in plan:
+            try:
+                value = data[key]
+            except KeyError:
+                if default is None:
+                    continue
+                value = default()
+            ret[name] = None if value is None else convert(value)
+        return ret
+
+
+def _representation(field):
+    """``field.to_representation``, or an equivalent without per-value field calls."""
+    if isinstance(field, OutputSerializer):
+        return type(field).dump
+    if isinstance(field, serializers.ListSerializer) and isinstance(
+        field.child, OutputSerializer
+    ):
+        dump = type(field.child).dump
+        return lambda items: [dump(item) for item in items]
+    if _is_plain_dict(field):
+        # DictField() passes values through, only the keys are converted
+        return lambda value: {str(key): item for key, item in value.items()}
+    if isinstance(field, serializers.ListField) and _is_plain_dict(field.child):
+        return lambda items: [
+            None if value is None else {str(key): item for key, item in value.items()}
+            for value in items
+        ]
+    if type(field) is serializers.CharField:
+        return str
+    return field.to_representation
+
+
+def _is_plain_dict(field) -> bool:
+    return isinstance(field, serializers.DictField) and (
+        type(field.child) is _UnvalidatedField
+    )
+
+
+def _missing(field):
+    """What ``Field.get_attribute`` does for an absent key: None to skip the field."""
+    if field.default is not empty:
+        return field.get_default
+    if field.allow_null:
+        return lambda: None
+    if not field.required:
+        return None
+
+    def required():
+        raise KeyError(f"{field.field_name!r} is required by {field.parent.__class__.__name__}")
+
+    return required
 
 
 class TaskRequestSerializer(serializers.Serializer):
@@ -13,20 +87,73 @@ class TaskRequestSerializer(serializers.Serializer):
     )
 
 
-class TaskResponseSerializer(serializers.Serializer):
+class IdempotentTaskRequestSerializer(TaskRequestSerializer):
+    idempotency_key = serializers.CharField(
+        required=False,
+        max_length=255,
+        help_text="Repeats with the same key return the first task (or use the Idempotency-Key header)",
+    )
+
+
+class TaskResponseSerializer(OutputSerializer):
     task_id = serializers.CharField(help_text="Unique task identifier")
     status = serializers.CharField(help_text="Task status")
     message = serializers.CharField(help_text="Response message")
     input = serializers.DictField(help_text="Input parameters")
+    duplicate = serializers.BooleanField(
+        default=False, help_text="True when an earlier request with the same key enqueued the task"
+    )
+
+
+class TaskBatchResponseSerializer(OutputSerializer):
+    task_ids = serializers.ListField(
+        child=serializers.CharField(), help_text="Task identifiers in request order"
+    )
+    status = serializers.CharField(help_text="Task status")
+    message = serializers.CharField(help_text="Response message")
+    count = serializers.IntegerField(help_text="Number of enqueued tasks")
 
 
-class TaskResultSerializer(serializers.Serializer):
+class TaskResultSerializer(OutputSerializer):
     task_id = serializers.CharField(help_text="Task identifier")
     status = serializers.CharField(help_text="Result status")
     result = serializers.DictField(help_text="Task execution result")
 
 
-class ScheduledTaskStatusSerializer(serializers.Serializer):
+class TaskResultQuerySerializer(serializers.Serializer):
+    task_id = serializers.CharField(required=True, help_text="Task identifier")
+    wait = serializers.FloatField(
+        required=False,
+        min_value=0,
+        max_value=settings.TASK_RESULT_MAX_WAIT,
+        help_text="Seconds to hold the request open until the result is available",
+    )
+
+
+class TaskResultsRequestSerializer(serializers.Serializer):
+    task_ids = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=False,
+        max_length=settings.TASK_RESULTS_MAX_IDS,
+        help_text="Task identifiers to look up",
+    )
+
+
+class TaskResultsResponseSerializer(OutputSerializer):
+    results = TaskResultSerializer(
+        many=True, help_text="One entry per requested task, in request order"
+    )
+
+
+class StatsSerializer(OutputSerializer):
+    result_cache = serializers.DictField(help_text="Task result cache hits, misses and latency")
+    mjml_cache = serializers.DictField(help_text="Compiled MJML cache counters")
+    email_text_cache = serializers.DictField(help_text="HTML to text cache counters")
+    idempotency = serializers.DictField(help_text="Idempotent enqueues and suppressed duplicates")
+    memoized_tasks = serializers.DictField(help_text="Memoized result hits and misses per task")
+
+
+class ScheduledTaskStatusSerializer(OutputSerializer):
     exists = serializers.BooleanField(help_text="Whether the scheduled task exists")
     name = serializers.CharField(required=False, help_text="Schedule name")
     next_run = serializers.DateTimeField(
@@ -39,7 +166,7 @@ class ScheduledTaskStatusSerializer(serializers.Serializer):
         required=False, help_text="Number of repeats (-1 for infinite)"
     )
     success_count = serializers.IntegerField(
-        required=False, help_text="Number of successful runs"
+        required=False, help_text="Number of runs enqueued, as of the last checkpoint"
     )
     last_run = serializers.DateTimeField(
         required=False, help_text="Last execution time"
@@ -47,7 +174,7 @@ class ScheduledTaskStatusSerializer(serializers.Serializer):
     message = serializers.CharField(required=False, help_text="Status message")
 
 
-class ScheduledTaskResponseSerializer(serializers.Serializer):
+class ScheduledTaskResponseSerializer(OutputSerializer):
     status = serializers.CharField(help_text="Operation status")
     message = serializers.CharField(help_text="Response message")
     schedule_id = serializers.IntegerField(
@@ -61,6 +188,70 @@ class ScheduledTaskResponseSerializer(serializers.Serializer):
     )
 
 
+class ScheduleListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        names = [item["name"] for item in attrs]
+        if len(set(names)) != len(names):
+            raise serializers.ValidationError("Schedule names must be unique within a request")
+        return attrs
+
+
+class ScheduleSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True, help_text="Schedule identifier")
+    name = serializers.CharField(max_length=100, help_text="Unique schedule name, the upsert key")
+    func = serializers.CharField(
+        max_length=256, help_text="Dotted path of the task function, e.g. tasks.tasks.scheduled_task"
+    )
+    args = serializers.ListField(default=list, help_text="Positional arguments")
+    kwargs = serializers.DictField(default=dict, help_text="Keyword arguments")
+    interval = serializers.IntegerField(min_value=1, help_text="Seconds between runs")
+    cluster = serializers.CharField(
+        required=False, allow_null=True, default=None, help_text="Cluster to run on"
+    )
+    enabled = serializers.BooleanField(default=True)
+    store_success = serializers.BooleanField(
+        default=False, help_text="Save results of successful runs"
+    )
+    last_run = serializers.DateTimeField(read_only=True, allow_null=True)
+    run_count = serializers.IntegerField(read_only=True)
+
+    def validate_func(self, value):
+        # Looked up, never imported: only functions declared with shared_task run
+        if value not in registry:
+            raise serializers.ValidationError(f"{value} is not a shared_task")
+        return value
+
+    class Meta:
+        list_serializer_class = ScheduleListSerializer
+
+
+class SchedulePageSerializer(serializers.Serializer):
+    next = serializers.URLField(allow_null=True, help_text="Next page, null on the last one")
+    previous = serializers.URLField(allow_null=True, help_text="Previous page")
+    results = ScheduleSerializer(many=True)
+
+
+class ScheduleBulkResponseSerializer(OutputSerializer):
+    created = serializers.IntegerField(help_text="Schedules created")
+    updated = serializers.IntegerField(help_text="Existing schedules updated")
+    schedules = serializers.ListField(
+        child=serializers.DictField(), help_text="id and name of each schedule, in request order"
+    )
+
+
+class ScheduleDeleteSerializer(serializers.Serializer):
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        allow_empty=False,
+        max_length=settings.SCHEDULES_BULK_MAX_SIZE,
+        help_text="Names of the schedules to delete",
+    )
+
+
+class ScheduleDeleteResponseSerializer(OutputSerializer):
+    deleted = serializers.IntegerField(help_text="Schedules deleted")
+
+
 class EmailRequestSerializer(serializers.Serializer):
     subject = serializers.CharField(required=True, help_text="Email subject")
     html_template_path = serializers.CharField(required=True, help_text="Path to HTML template")
@@ -75,9 +266,17 @@ class EmailRequestSerializer(serializers.Serializer):
     service_type = serializers.CharField(
         required=False, allow_null=True, help_text="Deprecated: Email service type"
     )
+    idempotency_key = serializers.CharField(
+        required=False,
+        max_length=255,
+        help_text="Repeats with the same key return the first task (or use the Idempotency-Key header)",
+    )
 
 
-class EmailResponseSerializer(serializers.Serializer):
+class EmailResponseSerializer(OutputSerializer):
     task_id = serializers.CharField(help_text="Task identifier")
     status = serializers.CharField(help_text="Task status")
     message = serializers.CharField(help_text="Response message")
+    duplicate = serializers.BooleanField(
+        default=False, help_text="True when an earlier request with the same key enqueued the task"
+    )
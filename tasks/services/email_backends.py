@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from loguru import logger
+
+
+def format_message(message) -> str:
+    """Full text of a message in the banner format used for console debugging."""
+    alternatives = getattr(message, "alternatives", [])
+    html_content = next(
+        (content for content, mimetype in alternatives if mimetype == "text/html"), ""
+    )
+    output = []
+    output.append("=" * 80)
+    output.append("EMAIL NOTIFICATION")
+    output.append("=" * 80)
+    output.append(f"To: {', '.join(message.to)}")
+    output.append(f"Subject: {message.subject}")
+    output.append("-" * 80)
+    output.append("HTML VERSION:")
+    output.append("-" * 80)
+    output.append(html_content)
+    output.append("-" * 80)
+    output.append("TEXT VERSION:")
+    output.append("-" * 80)
+    output.append(message.body)
+    output.append("=" * 80)
+    return "\n".join(output) + "\n"
+
+
+class LogEmailBackend(BaseEmailBackend):
+    """
+    Email backend that delivers to the loguru log.
+
+    Each message is logged as one compact record with the envelope bound as
+    structured ``email`` extra data. Full bodies are only rendered when
+    EMAIL_LOG_BODIES is on, and never when DEBUG level logging is filtered out.
+    """
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            logger.bind(
+                email={
+                    "to": message.to,
+                    "subject": message.subject,
+                    "text_length": len(message.body),
+                }
+            ).info(
+                "Email to {} ({} recipients): {}",
+                message.to[0] if message.to else "",
+                len(message.to),
+                message.subject,
+            )
+            if settings.EMAIL_LOG_BODIES:
+                logger.opt(lazy=True, raw=True).debug("{}", lambda: format_message(message))
+        return len(email_messages)
@@ -1,32 +1,115 @@
+import hashlib
+import json
+from itertools import batched
+
 import html2text
-from django.template.loader import render_to_string
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template, select_template
 from loguru import logger
 
+from tasks.cache import LRUCache
 
-class EmailNotificationService:
-    def send_email(self, subject: str, html_template_path: str, to_email: list[str], context: dict):
-        html_content = render_to_string(html_template_path, context)
-        
+from . import metrics
+from .mjml_artifacts import precompiled_template_name
+from .timings import record, stage
+
+text_cache = LRUCache(
+    settings.EMAIL_TEXT_CACHE_MAX_ENTRIES, settings.EMAIL_TEXT_CACHE_MAX_BYTES
+)
+
+
+def html_to_text(html_content: str) -> str:
+    """Convert rendered HTML to the plain text part, reusing earlier conversions."""
+    key = hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+    text_content = text_cache.get(key)
+    if text_content is None:
+        # HTML2Text carries parser state from one handle() call into the next,
+        # so every conversion needs a fresh instance
         h = html2text.HTML2Text()
         h.ignore_links = False
         h.ignore_images = False
         text_content = h.handle(html_content)
-        
-        output = []
-        output.append("=" * 80)
-        output.append("EMAIL NOTIFICATION")
-        output.append("=" * 80)
-        output.append(f"To: {', '.join(to_email)}")
-        output.append(f"Subject: {subject}")
-        output.append("-" * 80)
-        output.append("HTML VERSION:")
-        output.append("-" * 80)
-        output.append(html_content)
-        output.append("-" * 80)
-        output.append("TEXT VERSION:")
-        output.append("-" * 80)
-        output.append(text_content)
-        output.append("=" * 80)
-        
-        logger.opt(raw=True).info("\n".join(output) + "\n")
+        text_cache.set(key, text_content)
+    return text_content
+
+
+class EmailNotificationService:
+    def get_template(self, html_template_path: str):
+        # Prefer the artifact written by `manage.py precompile_mjml` while it is fresh
+        artifact_name = precompiled_template_name(html_template_path)
+        if artifact_name:
+            return select_template([artifact_name, html_template_path])
+        return get_template(html_template_path)
+
+    def send_email(
+        self, subject: str, html_template_path: str, to_email: list[str], context: dict
+    ) -> dict:
+        """
+        Render and deliver one email. Returns the milliseconds spent per stage:
+        template_load, render, mjml_compile (inside render), html_to_text and
+        delivery.
+        """
+        with record() as timings:
+            with stage("template_load"):
+                template = self.get_template(html_template_path)
+            message = self.build_message(subject, template, to_email, context)
+            with stage("delivery"), get_connection() as connection:
+                connection.send_messages([message])
+
+        metrics.observe_stages("email", timings.totals)
+        stages_ms = timings.as_ms()
+        logger.debug(f"Email '{subject}' stage timings (ms): {stages_ms}")
+        return stages_ms
+
+    def send_email_batch(
+        self,
+        subject: str,
+        html_template_path: str,
+        recipients: list[tuple[str | list[str], dict]],
+        batch_size: int = None,
+    ) -> int:
+        """
+        Render ``html_template_path`` once per ``(to_email, context)`` pair and
+        deliver through a single backend connection, ``batch_size`` messages at
+        a time. Returns the number of messages sent.
+        """
+        template = self.get_template(html_template_path)
+        batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+        rendered = {}
+        sent = 0
+
+        with get_connection() as connection:
+            for chunk in batched(recipients, batch_size):
+                messages = [
+                    self.build_message(subject, template, to_email, context, rendered)
+                    for to_email, context in chunk
+                ]
+                sent += connection.send_messages(messages) or 0
+
+        logger.info(f"Sent {sent}/{len(recipients)} '{subject}' emails")
+        return sent
+
+    def build_message(
+        self, subject: str, template, to_email, context: dict, rendered: dict = None
+    ):
+        if isinstance(to_email, str):
+            to_email = [to_email]
+
+        # Recipients sharing a context share the rendered parts
+        key = json.dumps(context, sort_keys=True, default=str)
+        if rendered is not None and key in rendered:
+            html_content, text_content = rendered[key]
+        else:
+            with stage("render"):
+                html_content = template.render(context)
+            with stage("html_to_text"):
+                text_content = html_to_text(html_content)
+            if rendered is not None:
+                rendered[key] = html_content, text_content
 
+        message = EmailMultiAlternatives(
+            subject, text_content, settings.DEFAULT_FROM_EMAIL, to_email
+        )
+        message.attach_alternative(html_content, "text/html")
+        return message
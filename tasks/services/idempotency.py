@@ -0,0 +1,135 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from ..models import IdempotencyKey
+
+# Keyword arguments that configure django-q instead of being passed to the task
+Q_OPTION_KEYS = {
+    "hook",
+    "group",
+    "save",
+    "sync",
+    "cached",
+    "ack_failure",
+    "iter_count",
+    "iter_cached",
+    "chain",
+    "broker",
+    "cluster",
+    "timeout",
+    "q_options",
+    "task_name",
+}
+
+
+class IdempotencyConflict(Exception):
+    """Another caller is still enqueuing the task for this key."""
+
+
+class IdempotencyStats:
+    """Per-process counters for idempotent enqueues."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.enqueued = 0
+        self.suppressed = 0
+
+    def record(self, created: bool):
+        with self.lock:
+            if created:
+                self.enqueued += 1
+            else:
+                self.suppressed += 1
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            return {"enqueued": self.enqueued, "suppressed_duplicates": self.suppressed}
+
+
+stats = IdempotencyStats()
+
+
+def derive_key(func_path: str, args, kwargs) -> str:
+    """Hash of the task function and its arguments, ignoring django-q options."""
+    payload = json.dumps(
+        [
+            func_path,
+            list(args),
+            {key: value for key, value in kwargs.items() if key not in Q_OPTION_KEYS},
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def reservation_key(func_path: str, key: str) -> str:
+    return hashlib.sha256(f"{func_path}:{key}".encode()).hexdigest()
+
+
+def purge_expired():
+    """Delete expired reservations, at most once per TASK_IDEMPOTENCY_WINDOW per process."""
+    global next_purge
+    if time.monotonic() < next_purge:
+        return
+    next_purge = time.monotonic() + settings.TASK_IDEMPOTENCY_WINDOW
+    IdempotencyKey.objects.filter(expires__lt=timezone.now()).delete()
+
+
+next_purge = 0.0
+
+
+def enqueue_once(func_path: str, key: str, enqueue) -> tuple[str, bool]:
+    """
+    Call ``enqueue()`` unless a task was already enqueued for ``key`` within
+    TASK_IDEMPOTENCY_WINDOW. Returns ``(task_id, created)``.
+
+    The key is reserved by inserting an IdempotencyKey row before enqueuing.
+    Its unique constraint makes the reservation atomic across processes, so
+    concurrent duplicates wait up to TASK_IDEMPOTENCY_WAIT for the first
+    caller's task id and raise IdempotencyConflict after that.
+    """
+    window = timedelta(seconds=settings.TASK_IDEMPOTENCY_WINDOW)
+    key = reservation_key(func_path, key)
+    deadline = time.monotonic() + settings.TASK_IDEMPOTENCY_WAIT
+    purge_expired()
+
+    while True:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(key=key, expires=now + window)
+        except IntegrityError:
+            pass
+        else:
+            try:
+                task_id = enqueue()
+            except BaseException:
+                IdempotencyKey.objects.filter(key=key).delete()
+                raise
+            IdempotencyKey.objects.filter(key=key).update(task_id=task_id)
+            stats.record(created=True)
+            return task_id, True
+
+        existing = IdempotencyKey.objects.filter(key=key).values_list("task_id", "expires").first()
+        if existing is not None and existing[1] <= now:
+            # Expired: free it for the next create(), only one caller wins that
+            IdempotencyKey.objects.filter(key=key, expires__lte=now).delete()
+            continue
+        if existing is not None and existing[0] is not None:
+            stats.record(created=False)
+            return existing[0], False
+        # Reserved but not enqueued yet, or deleted since the create()
+        if time.monotonic() > deadline:
+            raise IdempotencyConflict(f"Task for idempotency key {key} is still being enqueued")
+        time.sleep(0.01)
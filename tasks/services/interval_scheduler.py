@@ -0,0 +1,182 @@
+import heapq
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from django_q.brokers import get_broker
+from django_q.signing import SignedPackage
+from loguru import logger
+
+from ..decorators import build_task, bulk_enqueue, registry
+from ..models import IntervalSchedule
+
+HEARTBEAT_NAME = "scheduled_task_5s"
+
+
+def create_heartbeat() -> tuple[IntervalSchedule, bool]:
+    """Create or reset the 5 second ``scheduled_task`` heartbeat, returns ``(schedule, created)``."""
+    return IntervalSchedule.objects.update_or_create(
+        name=HEARTBEAT_NAME,
+        defaults={
+            "func": "tasks.tasks.scheduled_task",
+            "args": [],
+            "kwargs": {},
+            "interval": 5,
+            "enabled": True,
+        },
+    )
+
+
+def next_run(schedule: IntervalSchedule):
+    """
+    Approximate next run from the last checkpoint. A schedule that has not
+    run yet is due now, as the scheduler runs it on its next reload; a
+    disabled one has none.
+    """
+    if not schedule.enabled:
+        return None
+    if schedule.last_run is None:
+        return timezone.now()
+    return schedule.last_run + timedelta(seconds=schedule.interval)
+
+
+def repeats(schedule: IntervalSchedule) -> int:
+    """Runs left in django-q's terms: -1 (forever) while enabled, 0 once disabled."""
+    return -1 if schedule.enabled else 0
+
+
+class IntervalScheduler:
+    """
+    Enqueues IntervalSchedule tasks from a heap of due times kept in memory.
+
+    The table is read every TASK_SCHEDULER_RELOAD seconds, and only reloaded
+    when a definition changed. Runs update ``last_run``/``run_count`` in
+    memory; they are written back in one bulk update every
+    TASK_SCHEDULER_CHECKPOINT seconds and on stop. A scheduler that was down
+    runs each overdue schedule once instead of catching up every missed run.
+    Run a single instance.
+    """
+
+    def __init__(self, broker=None, clock=time.monotonic, queryset=None):
+        self.broker = broker
+        self.queryset = queryset if queryset is not None else IntervalSchedule.objects.all()
+        self.brokers = {}
+        self.clock = clock
+        self.heap = []
+        self.schedules = {}
+        self.version = None
+        self.dirty = set()
+        self.next_reload = 0.0
+        self.next_checkpoint = 0.0
+        self.runs = 0
+
+    def reload(self, now: float):
+        enabled = self.queryset.filter(enabled=True)
+        version = enabled.aggregate(updated=Max("updated"), count=Count("id"))
+        if version == self.version:
+            return
+        self.version = version
+        # Persist run counts before the objects holding them are replaced
+        self.checkpoint()
+
+        due = {schedule_id: at for at, schedule_id in self.heap}
+        wall = timezone.now()
+        schedules = {s.id: s for s in enabled}
+        heap = []
+        for schedule_id, s in schedules.items():
+            previous = self.schedules.get(schedule_id)
+            if previous is not None and previous.interval == s.interval:
+                at = due[schedule_id]
+            elif s.last_run is not None:
+                wait = s.interval - (wall - s.last_run).total_seconds()
+                at = now + max(wait, 0.0)
+            else:
+                at = now
+            heap.append((at, schedule_id))
+        heapq.heapify(heap)
+        self.heap, self.schedules = heap, schedules
+        logger.info(f"Interval scheduler loaded {len(schedules)} schedules")
+
+    def run_due(self, now: float):
+        """Enqueue every schedule due at ``now``, returns the next due time or None."""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            at, schedule_id = heapq.heappop(self.heap)
+            s = self.schedules[schedule_id]
+            due.append(s)
+            at += s.interval
+            if at <= now:
+                # Fell behind, skip the missed runs
+                at = now + s.interval
+            heapq.heappush(self.heap, (at, schedule_id))
+        if due:
+            self.enqueue(due)
+        return self.heap[0][0] if self.heap else None
+
+    def enqueue(self, schedules):
+        packs = {}
+        wall = timezone.now()
+        for s in schedules:
+            options = {"group": s.name}
+            cluster = self.cluster(s)
+            if cluster:
+                options["cluster"] = cluster
+            if not s.store_success:
+                # django-q still saves failed runs
+                options["save"] = False
+            task = build_task(s.func, tuple(s.args), dict(s.kwargs), **options)
+            packs.setdefault(cluster, []).append(SignedPackage.dumps(task))
+            s.last_run = wall
+            s.run_count += 1
+            self.dirty.add(s.id)
+        for cluster, cluster_packs in packs.items():
+            bulk_enqueue(self.get_broker(cluster), cluster_packs)
+        self.runs += len(schedules)
+
+    @staticmethod
+    def cluster(schedule):
+        """The schedule's cluster, else the lane its shared_task routes ``delay()`` to."""
+        if schedule.cluster:
+            return schedule.cluster
+        wrapper = registry.get(schedule.func)
+        return wrapper.lane if wrapper is not None else None
+
+    def get_broker(self, cluster):
+        if self.broker is not None:
+            return self.broker
+        if cluster not in self.brokers:
+            self.brokers[cluster] = get_broker(cluster)
+        return self.brokers[cluster]
+
+    def checkpoint(self):
+        schedules = [self.schedules[i] for i in self.dirty if i in self.schedules]
+        self.dirty.clear()
+        if schedules:
+            # Only the checkpoint fields, so concurrent edits of a definition are kept
+            IntervalSchedule.objects.bulk_update(
+                schedules, ["last_run", "run_count"], batch_size=500
+            )
+
+    def step(self, now: float) -> float:
+        """Reload, enqueue and checkpoint as due at ``now``, returns when to wake up."""
+        if now >= self.next_reload:
+            self.reload(now)
+            self.next_reload = now + settings.TASK_SCHEDULER_RELOAD
+        next_due = self.run_due(now)
+        if now >= self.next_checkpoint:
+            self.checkpoint()
+            self.next_checkpoint = now + settings.TASK_SCHEDULER_CHECKPOINT
+        wake = min(self.next_reload, self.next_checkpoint)
+        return wake if next_due is None else min(wake, next_due)
+
+    def run(self, stop: threading.Event):
+        try:
+            while not stop.is_set():
+                wake = self.step(self.clock())
+                stop.wait(max(wake - self.clock(), 0.0))
+        finally:
+            self.checkpoint()
+            logger.info(f"Interval scheduler stopped after {self.runs} runs")
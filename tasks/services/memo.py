@@ -0,0 +1,102 @@
+import pickle
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .idempotency import derive_key
+from .task_results import cache_result, get_result
+
+
+class MemoStats:
+    """Per-process hit/miss counters for each memoized task."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counters = {}
+
+    def record(self, func_path: str, outcome: str):
+        with self.lock:
+            counters = self.counters.setdefault(
+                func_path, {"hits": 0, "in_flight": 0, "misses": 0}
+            )
+            counters[outcome] += 1
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            return {
+                func_path: {
+                    **counters,
+                    "hit_ratio": (
+                        (counters["hits"] + counters["in_flight"]) / total
+                        if (total := sum(counters.values()))
+                        else 0.0
+                    ),
+                }
+                for func_path, counters in self.counters.items()
+            }
+
+
+stats = MemoStats()
+
+
+def memo_key(func_path: str, args, kwargs) -> str:
+    return f"tasks:memo:{derive_key(func_path, args, kwargs)}"
+
+
+def lookup(func_path: str, args, kwargs):
+    """
+    Return the id of an earlier task with the same arguments, or None.
+
+    Entries are ``(task_id, done, result, expires_at)``. A pending entry is
+    resolved against the task result on first use after it finishes and
+    then kept with its result, so hits need no query and survive result
+    pruning. A failed task is forgotten so the next call runs it again.
+    """
+    cache = caches[settings.TASK_MEMO_CACHE]
+    key = memo_key(func_path, args, kwargs)
+    entry = cache.get(key)
+    if entry is None:
+        stats.record(func_path, "misses")
+        return None
+
+    task_id, done, result, expires_at = entry
+    if not done:
+        found = get_result(task_id)
+        if found is None:
+            # Still queued or running, share it
+            stats.record(func_path, "in_flight")
+            return task_id
+        success, result = found
+        if not success:
+            cache.delete(key)
+            stats.record(func_path, "misses")
+            return None
+        remember_result(key, task_id, result, expires_at)
+
+    # Make sure TaskResultView resolves the id even after the row was pruned
+    cache_result(task_id, True, result)
+    stats.record(func_path, "hits")
+    return task_id
+
+
+def remember_pending(key: str, task_id: str, ttl: int):
+    caches[settings.TASK_MEMO_CACHE].set(key, (task_id, False, None, time.time() + ttl), ttl)
+
+
+def remember_result(key: str, task_id: str, result, expires_at: float):
+    """Keep a finished result until ``expires_at`` unless it exceeds TASK_MEMO_MAX_BYTES."""
+    ttl = expires_at - time.time()
+    if ttl <= 0 or len(pickle.dumps(result)) > settings.TASK_MEMO_MAX_BYTES:
+        # Too big to keep, the pending entry still resolves it from the database
+        return
+    caches[settings.TASK_MEMO_CACHE].set(key, (task_id, True, result, expires_at), ttl)
+
+
+def store(func_path: str, task_id: str, args, kwargs, result, ttl: int):
+    """Remember a finished task's result, e.g. from the cluster's post_execute signal."""
+    remember_result(memo_key(func_path, args, kwargs), task_id, result, time.time() + ttl)
@@ -0,0 +1,184 @@
+"""
+Prometheus metrics for enqueues, task execution and broker state.
+
+Web and cluster worker processes write their samples to
+PROMETHEUS_MULTIPROC_DIR; ``render`` aggregates them with the broker gauges,
+which are read at scrape time. Everything is a no-op without
+prometheus_client or with METRICS_ENABLED off.
+"""
+
+import os
+import threading
+import time
+
+from django.conf import settings
+from django_q.brokers import get_broker
+from django_q.conf import Conf
+from django_q.status import Stat
+from loguru import logger
+
+if settings.METRICS_ENABLED:
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    prometheus_client = None
+
+enabled = prometheus_client is not None and settings.METRICS_ENABLED
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+if enabled:
+    ENQUEUED = prometheus_client.Counter(
+        "tasks_enqueued_total", "Tasks written to the broker", ["func"]
+    )
+    ENQUEUE_SECONDS = prometheus_client.Histogram(
+        "tasks_enqueue_seconds",
+        "Time to enqueue a task or a delay_many chunk",
+        ["func"],
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+    )
+    EXECUTED = prometheus_client.Counter(
+        "tasks_executed_total", "Finished tasks by outcome", ["func", "status"]
+    )
+    DURATION = prometheus_client.Histogram(
+        "tasks_duration_seconds", "Task execution time", ["func"], buckets=DURATION_BUCKETS
+    )
+    STAGE_SECONDS = prometheus_client.Histogram(
+        "tasks_stage_seconds",
+        "Time per stage inside a task, e.g. email rendering and delivery",
+        ["task", "stage"],
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    )
+    QUEUE_WAIT = prometheus_client.Histogram(
+        "tasks_queue_wait_seconds",
+        "Time from enqueue to the start of execution",
+        ["func"],
+        buckets=DURATION_BUCKETS,
+    )
+
+# Execution start per task id, per worker process
+_started = {}
+_started_lock = threading.Lock()
+
+
+def func_name(func) -> str:
+    if isinstance(func, str):
+        return func
+    return getattr(func, "module_path", None) or f"{func.__module__}.{func.__qualname__}"
+
+
+def observe_enqueue(func_path: str, count: int, seconds: float):
+    if enabled:
+        ENQUEUED.labels(func_path).inc(count)
+        ENQUEUE_SECONDS.labels(func_path).observe(seconds)
+
+
+def observe_stages(task: str, totals: dict):
+    if enabled:
+        for name, seconds in totals.items():
+            STAGE_SECONDS.labels(task, name).observe(seconds)
+
+
+def task_started(task: dict):
+    if not enabled:
+        return
+    with _started_lock:
+        _started[task["id"]] = time.perf_counter()
+    queued = time.time() - task["started"].timestamp()
+    QUEUE_WAIT.labels(func_name(task["func"])).observe(max(queued, 0))
+
+
+def task_finished(task: dict):
+    if not enabled:
+        return
+    with _started_lock:
+        start = _started.pop(task["id"], None)
+    name = func_name(task["func"])
+    if start is not None:
+        DURATION.labels(name).observe(time.perf_counter() - start)
+    EXECUTED.labels(name, "success" if task["success"] else "failure").inc()
+
+
+class BrokerCollector:
+    """Queue depth and saturation per lane and cluster, read at scrape time."""
+
+    def collect(self):
+        queued = GaugeMetricFamily("tasks_queued", "Tasks waiting in the broker", labels=["queue"])
+        in_progress = GaugeMetricFamily(
+            "tasks_in_progress", "Dequeued tasks not yet acknowledged", labels=["queue"]
+        )
+        saturation = GaugeMetricFamily(
+            "tasks_queue_limit_saturation",
+            "Dequeued tasks as a fraction of the lane's queue_limit",
+            labels=["queue"],
+        )
+        for queue, limit in queue_limits().items():
+            try:
+                broker = get_broker(queue)
+                size, locked = broker.queue_size(), broker.lock_size()
+            except Exception as e:
+                logger.warning(f"Could not read broker state for {queue}: {e}")
+                continue
+            queued.add_metric([queue], size)
+            in_progress.add_metric([queue], locked)
+            saturation.add_metric([queue], locked / limit)
+        yield queued
+        yield in_progress
+        yield saturation
+
+        workers = GaugeMetricFamily(
+            "q_cluster_workers", "Worker processes per running cluster", labels=["cluster_id"]
+        )
+        prefetched = GaugeMetricFamily(
+            "q_cluster_task_queue_size",
+            "Tasks prefetched by a cluster and not started yet",
+            labels=["cluster_id"],
+        )
+        try:
+            # Cluster stats are kept in the cache, only a shared cache shows other hosts
+            stats = Stat.get_all()
+        except Exception as e:
+            logger.warning(f"Could not read cluster stats: {e}")
+            stats = []
+        for stat in stats:
+            workers.add_metric([str(stat.cluster_id)], len(stat.workers))
+            prefetched.add_metric([str(stat.cluster_id)], stat.task_q_size)
+        yield workers
+        yield prefetched
+
+
+def queue_limits() -> dict:
+    """queue_limit of the default cluster and, when enabled, of each lane."""
+    limits = {Conf.CLUSTER_NAME: Conf.QUEUE_LIMIT}
+    if settings.TASK_LANES_ENABLED:
+        for name, lane in settings.TASK_LANES.items():
+            limits[name] = lane.get("queue_limit", lane.get("workers", Conf.WORKERS) ** 2)
+    return limits
+
+
+def render() -> tuple[bytes, str]:
+    """Exposition text and content type for a scrape."""
+    registry = prometheus_client.CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(BrokerCollector())
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    """Drop the live gauge samples of an exited process."""
+    if enabled:
+        multiprocess.mark_process_dead(pid, settings.PROMETHEUS_MULTIPROC_DIR)
+
+
+def reset():
+    """Remove samples of earlier runs, call once before starting processes."""
+    directory = settings.PROMETHEUS_MULTIPROC_DIR
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            os.remove(os.path.join(directory, name))
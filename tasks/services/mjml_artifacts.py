@@ -0,0 +1,104 @@
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.template.base import Lexer, TokenType
+
+from tasks.templatetags.mjml import block_source, compile_mjml, template_tags
+
+PRECOMPILED_PREFIX = "precompiled"
+
+
+class PrecompileError(Exception):
+    pass
+
+
+def artifact_path(template_name: str) -> Path:
+    return Path(settings.MJML_ARTIFACT_DIR) / PRECOMPILED_PREFIX / template_name
+
+
+def source_path(template_name: str) -> Path:
+    return Path(settings.EMAIL_TEMPLATES_ROOT) / template_name
+
+
+def is_fresh(source: Path, artifact: Path) -> bool:
+    """An artifact is fresh when it carries the mtime of the source it was built from."""
+    try:
+        return artifact.stat().st_mtime_ns == source.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def precompiled_template_name(template_name: str):
+    """Return the artifact template name for ``template_name`` if a fresh one exists."""
+    if not settings.MJML_USE_PRECOMPILED:
+        return None
+    if is_fresh(source_path(template_name), artifact_path(template_name)):
+        return f"{PRECOMPILED_PREFIX}/{template_name}"
+    return None
+
+
+def precompile_source(source: str) -> str:
+    """Replace every ``{% mjml %}`` block in ``source`` with its compiled HTML."""
+    tokens = Lexer(source).tokenize()
+    parts = []
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        index += 1
+        if token.token_type == TokenType.BLOCK and token.contents == "mjml":
+            mjml_source = block_source(tokens[index:], "endmjml")
+            html, errors = compile_mjml(mjml_source)
+            if errors:
+                raise PrecompileError(f"MJML errors: {errors}")
+            if template_tags(html) != template_tags(mjml_source):
+                raise PrecompileError("MJML did not preserve the block's template tags")
+            parts.append(html)
+            while index < len(tokens) and not (
+                tokens[index].token_type == TokenType.BLOCK
+                and tokens[index].contents == "endmjml"
+            ):
+                index += 1
+            if index == len(tokens):
+                raise PrecompileError("Unclosed mjml block")
+            index += 1
+        elif token.token_type == TokenType.BLOCK:
+            parts.append(f"{{% {token.contents} %}}")
+        elif token.token_type == TokenType.VAR:
+            parts.append(f"{{{{ {token.contents} }}}}")
+        elif token.token_type == TokenType.TEXT:
+            parts.append(token.contents)
+    return "".join(parts)
+
+
+def precompile_templates(force: bool = False) -> list:
+    """
+    Write precompiled artifacts for every email template.
+
+    Returns ``(template_name, status)`` pairs where status is ``compiled``,
+    ``fresh`` or the reason the template was skipped.
+    """
+    root = Path(settings.EMAIL_TEMPLATES_ROOT)
+    report = []
+    for source in sorted(root.glob(settings.EMAIL_TEMPLATES_GLOB)):
+        template_name = source.relative_to(root).as_posix()
+        artifact = artifact_path(template_name)
+        if not force and is_fresh(source, artifact):
+            report.append((template_name, "fresh"))
+            continue
+
+        try:
+            compiled = precompile_source(source.read_text(encoding="utf-8"))
+        except PrecompileError as e:
+            artifact.unlink(missing_ok=True)
+            report.append((template_name, f"skipped: {e}"))
+            continue
+
+        artifact.parent.mkdir(parents=True, exist_ok=True)
+        tmp = artifact.with_name(f".{artifact.name}.{os.getpid()}.tmp")
+        tmp.write_text(compiled, encoding="utf-8")
+        stat = source.stat()
+        os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        tmp.replace(artifact)
+        report.append((template_name, "compiled"))
+    return report
@@ -0,0 +1,134 @@
+import cProfile
+import glob
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+from django.conf import settings
+from loguru import logger
+
+PROFILE_SUFFIX = ".prof"
+MEMORY_SUFFIX = ".mem"
+
+# Held by the run being profiled in this process
+_lock = threading.Lock()
+
+
+def sample_rate(profile) -> float:
+    """Sampling rate for a task declared with ``shared_task(profile=...)``."""
+    if profile is True:
+        return settings.TASK_PROFILE_RATE
+    return float(profile or 0)
+
+
+def task_dir(func_path: str) -> str:
+    return os.path.join(settings.TASK_PROFILE_DIR, func_path)
+
+
+def run_profiled(func_path: str, call):
+    """
+    Run ``call()`` under cProfile, and tracemalloc when TASK_PROFILE_MEMORY is
+    set, and write the profile and allocation snapshot to
+    ``TASK_PROFILE_DIR/<func_path>/``. Summarize them with
+    ``manage.py profile_report``.
+
+    Only one profiler can be active per process, so a run that overlaps
+    another (threads of qcluster_async) or an outside profiler runs unprofiled.
+    """
+    if not _lock.acquire(blocking=False):
+        return call()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        _lock.release()
+        return call()
+    trace_memory = settings.TASK_PROFILE_MEMORY and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start(settings.TASK_PROFILE_FRAMES)
+    try:
+        return call()
+    finally:
+        profiler.disable()
+        try:
+            snapshot = None
+            if trace_memory:
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+            save(func_path, profiler, snapshot)
+        except Exception as e:
+            # A full or read-only disk must not replace the task's result or exception
+            logger.warning(f"Could not write profile for {func_path}: {e}")
+        finally:
+            if trace_memory and tracemalloc.is_tracing():
+                tracemalloc.stop()
+            _lock.release()
+
+
+def save(func_path: str, profiler, snapshot):
+    directory = task_dir(func_path)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{random.getrandbits(32):08x}"
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(os.path.join(directory, name + PROFILE_SUFFIX))
+    if snapshot is not None:
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        snapshot.dump(os.path.join(directory, name + MEMORY_SUFFIX))
+
+
+def profiled_tasks() -> list[str]:
+    """Function paths with at least one saved profile."""
+    root = settings.TASK_PROFILE_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name
+        for name in os.listdir(root)
+        if glob.glob(os.path.join(root, name, "*" + PROFILE_SUFFIX))
+    )
+
+
+def top_functions(func_path: str, limit: int, sort: str = "cumulative") -> tuple[int, list]:
+    """
+    Aggregate every profile of a task and return ``(runs, rows)``, rows being
+    ``(calls, total_s, cumulative_s, location)`` averaged per run.
+    """
+    paths = sorted(glob.glob(os.path.join(task_dir(func_path), "*" + PROFILE_SUFFIX)))
+    if not paths:
+        return 0, []
+    stats = pstats.Stats(*paths)
+    runs = len(paths)
+    column = {"cumulative": 3, "tottime": 2, "calls": 1}[sort]
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][column], reverse=True)
+    return runs, [
+        (calls / runs, total / runs, cumulative / runs, pstats.func_std_string(func))
+        for func, (_, calls, total, cumulative, _) in rows[:limit]
+    ]
+
+
+def top_allocations(func_path: str, limit: int) -> tuple[int, list]:
+    """
+    Memory still allocated when the task returned, by source line, averaged
+    over its snapshots. Returns ``(runs, rows)``, rows being
+    ``(size_bytes, blocks, location)``.
+    """
+    paths = sorted(glob.glob(os.path.join(task_dir(func_path), "*" + MEMORY_SUFFIX)))
+    totals = defaultdict(lambda: [0, 0])
+    for path in paths:
+        for stat in tracemalloc.Snapshot.load(path).statistics("lineno"):
+            frame = stat.traceback[0]
+            entry = totals[f"{frame.filename}:{frame.lineno}"]
+            entry[0] += stat.size
+            entry[1] += stat.count
+    runs = len(paths)
+    rows = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+    return runs, [(size / runs, count / runs, location) for location, (size, count) in rows]
+
+
+def clear(func_path: str = None):
+    for path in glob.glob(os.path.join(settings.TASK_PROFILE_DIR, func_path or "*", "*")):
+        if path.endswith((PROFILE_SUFFIX, MEMORY_SUFFIX)):
+            os.remove(path)
@@ -0,0 +1,179 @@
+"""
+Size-aware storage of task results.
+
+Tasks declared with ``shared_task(result_storage=...)`` have their result
+replaced by a ``StoredResult`` in the worker, before django-q pickles it into
+the Task table:
+
+- ``"compress"``: pickles over TASK_RESULT_COMPRESS_BYTES are kept compressed
+  in the row.
+- ``"spill"``: additionally, JSON-serializable results over
+  TASK_RESULT_SPILL_BYTES are written gzipped to a content-addressed file and
+  only the reference stays in the row. They are served by
+  ``/api/task/result/download/`` with ``Content-Encoding: gzip``.
+
+Readers call ``load`` for the original value, or ``present`` for what the
+JSON result endpoints show.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import reverse
+from loguru import logger
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+POLICIES = ("compress", "spill")
+# zlib level 6 took 4x longer than 3 on a 10 MB result for 5% less output
+ZLIB_LEVEL = 3
+# Files touched this long before a sweep started are kept by it: a task that
+# just spilled the same result may not be saved yet
+ORPHAN_GRACE_SECONDS = 3600
+
+
+@dataclass(frozen=True)
+class StoredResult:
+    codec: str  # "zlib" or "zstd" for compressed pickles, "file" for a spilled result
+    size: int  # uncompressed bytes
+    data: bytes = b""
+    digest: str = ""
+
+
+def codec() -> str:
+    if settings.TASK_RESULT_CODEC == "zstd" and zstandard is None:
+        logger.warning("TASK_RESULT_CODEC is zstd but zstandard is not installed, using zlib")
+        return "zlib"
+    return settings.TASK_RESULT_CODEC
+
+
+def compress(data: bytes, name: str) -> bytes:
+    if name == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(data: bytes, name: str) -> bytes:
+    if name == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def encode(result, policy: str):
+    """Return ``result`` or its StoredResult under ``policy``."""
+    if isinstance(result, (type(None), bool, int, float)):
+        return result
+    pickled = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(pickled) <= settings.TASK_RESULT_COMPRESS_BYTES:
+        return result
+
+    if policy == "spill" and settings.TASK_RESULT_SPILL_BYTES and (
+        len(pickled) > settings.TASK_RESULT_SPILL_BYTES
+    ):
+        stored = spill(result)
+        if stored is not None:
+            return stored
+
+    name = codec()
+    return StoredResult(codec=name, size=len(pickled), data=compress(pickled, name))
+
+
+def spill(result):
+    """Write ``result`` as gzipped JSON named by its hash, None if it is not JSON."""
+    try:
+        body = json.dumps(result, cls=JSONEncoder, separators=(",", ":")).encode("utf-8")
+    except (TypeError, ValueError):
+        return None
+    digest = hashlib.sha256(body).hexdigest()
+    path = store_path(digest)
+    try:
+        # Reused by another result, keep it within remove's grace window
+        os.utime(path)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(body, compresslevel=ZLIB_LEVEL, mtime=0))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return StoredResult(codec="file", size=len(body), digest=digest)
+
+
+def store_path(digest: str) -> Path:
+    return Path(settings.TASK_RESULT_STORE_DIR) / digest[:2] / f"{digest}.json.gz"
+
+
+def store_exists() -> bool:
+    return Path(settings.TASK_RESULT_STORE_DIR).is_dir()
+
+
+def remove_unreferenced(referenced: set, cutoff: float, deadline=None) -> tuple[int, bool]:
+    """
+    Delete the stored files, and temporary files of interrupted spills, that
+    are not among the ``referenced`` digests and were last modified before
+    ``cutoff``. Returns ``(removed, complete)``, ``complete`` being False when
+    ``deadline`` (a ``time.monotonic()`` value) passed first.
+    """
+    removed = 0
+    with os.scandir(settings.TASK_RESULT_STORE_DIR) as folders:
+        for folder in folders:
+            if not folder.is_dir():
+                continue
+            with os.scandir(folder.path) as entries:
+                for entry in entries:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return removed, False
+                    if entry.name.removesuffix(".json.gz") in referenced:
+                        continue
+                    try:
+                        if entry.stat().st_mtime < cutoff:
+                            os.unlink(entry.path)
+                            removed += 1
+                    except FileNotFoundError:
+                        pass
+    return removed, True
+
+
+def iter_decompressed(path: Path, chunk_size: int = 64 * 1024):
+    """The JSON of a spilled result, for clients that do not accept gzip."""
+    with gzip.open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def load(value):
+    """The original result of a value read from the Task table or the result cache."""
+    if not isinstance(value, StoredResult):
+        return value
+    if value.codec == "file":
+        with gzip.open(store_path(value.digest), "rb") as f:
+            return json.load(f)
+    return pickle.loads(decompress(value.data, value.codec))
+
+
+def present(task_id: str, value):
+    """``load`` for the JSON result endpoints, spilled results become a download link."""
+    if isinstance(value, StoredResult) and value.codec == "file":
+        return {
+            "stored": "file",
+            "size": value.size,
+            "download": f"{reverse('tasks:task_result_download')}?task_id={task_id}",
+        }
+    return load(value)
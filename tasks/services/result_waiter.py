@@ -0,0 +1,67 @@
+import asyncio
+import weakref
+
+from django.conf import settings
+from loguru import logger
+
+from .task_results import aget_results
+
+
+class ResultWaiter:
+    """
+    Lets many coroutines wait for task results while a single loop polls the
+    database for all of them. Waiters for the same task id share one future.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.futures = {}
+        self.waiting = {}
+        self.poller = None
+
+    async def wait(self, task_id: str, timeout: float):
+        """Return ``(success, result)`` once the task finishes, or None on timeout."""
+        future = self.futures.get(task_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.futures[task_id] = future
+        self.waiting[task_id] = self.waiting.get(task_id, 0) + 1
+        if self.poller is None or self.poller.done():
+            self.poller = asyncio.create_task(self.poll())
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except TimeoutError:
+            return None
+        finally:
+            self.waiting[task_id] -= 1
+            if not self.waiting[task_id]:
+                del self.waiting[task_id]
+                if self.futures.get(task_id) is future:
+                    del self.futures[task_id]
+
+    async def poll(self):
+        while self.futures:
+            try:
+                found = await aget_results(list(self.futures), negative=False)
+            except Exception as e:
+                logger.warning(f"Could not poll task results: {e}")
+                found = {}
+            for task_id, entry in found.items():
+                future = self.futures.pop(task_id, None)
+                if future is not None and not future.done():
+                    future.set_result(entry)
+            if self.futures:
+                await asyncio.sleep(self.interval)
+
+
+_waiters = weakref.WeakKeyDictionary()
+
+
+def get_waiter() -> ResultWaiter:
+    """Return the waiter bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    waiter = _waiters.get(loop)
+    if waiter is None:
+        waiter = _waiters[loop] = ResultWaiter(settings.TASK_RESULT_POLL_INTERVAL)
+    return waiter
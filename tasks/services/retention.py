@@ -0,0 +1,224 @@
+"""
+Retention of finished tasks in django-q's Task table.
+
+``prune`` deletes, per function:
+
+- successes older than TASK_RETENTION_SUCCESS_DAYS,
+- failures older than TASK_RETENTION_FAILURE_DAYS, so they can be kept longer,
+- the oldest successes beyond TASK_RETENTION_MAX_PER_FUNC.
+
+Rows are deleted TASK_PRUNE_CHUNK_SIZE at a time, each chunk in its own
+transaction with a TASK_PRUNE_PAUSE sleep in between, so workers saving
+results never wait on one long write lock. On SQLite the freed pages are
+then returned with ``PRAGMA incremental_vacuum`` and the planner statistics
+refreshed with ``ANALYZE``. Spilled result files no row refers to are
+removed by ``sweep_files``, which carries on across runs.
+
+Run it with ``manage.py prune_tasks`` or the ``prune_tasks`` IntervalSchedule.
+"""
+
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, router
+from django.utils import timezone
+from django_q.models import Task
+from loguru import logger
+
+from ..models import IntervalSchedule
+from . import result_storage
+
+SCHEDULE_NAME = "prune_tasks"
+# Pages ANALYZE samples per index, enough for the planner on a large table
+ANALYZE_LIMIT = 1000
+# sweep_files progress, kept next to the files it sweeps
+SWEEP_STATE = ".sweep.json"
+
+
+def create_schedule() -> tuple[IntervalSchedule, bool]:
+    """Create or reset the ``prune_tasks`` schedule, returns ``(schedule, created)``."""
+    return IntervalSchedule.objects.update_or_create(
+        name=SCHEDULE_NAME,
+        defaults={
+            "func": "tasks.tasks.prune_tasks_task",
+            "args": [],
+            "kwargs": {},
+            "interval": settings.TASK_PRUNE_INTERVAL,
+            "enabled": True,
+        },
+    )
+
+
+def delete_chunked(queryset, deadline=None) -> tuple[int, bool]:
+    """
+    Delete ``queryset`` a chunk of ids at a time. Returns ``(deleted, complete)``,
+    ``complete`` being False when ``deadline`` (a ``time.monotonic()`` value)
+    passed first.
+    """
+    deleted = 0
+    ids = queryset.order_by().values_list("id", flat=True)
+    while True:
+        if deadline is not None and time.monotonic() >= deadline:
+            return deleted, False
+        chunk = list(ids[: settings.TASK_PRUNE_CHUNK_SIZE])
+        if not chunk:
+            return deleted, True
+        # No cascades or signals on Task, so this is a single DELETE
+        deleted += Task.objects.filter(id__in=chunk).delete()[0]
+        if len(chunk) < settings.TASK_PRUNE_CHUNK_SIZE:
+            return deleted, True
+        time.sleep(settings.TASK_PRUNE_PAUSE)
+
+
+def expired(func: str, now) -> list:
+    """Querysets of the rows of ``func`` that the retention policy drops."""
+    querysets = []
+    tasks = Task.objects.filter(func=func)
+    if settings.TASK_RETENTION_SUCCESS_DAYS:
+        cutoff = now - timedelta(days=settings.TASK_RETENTION_SUCCESS_DAYS)
+        querysets.append(tasks.filter(success=True, stopped__lt=cutoff))
+    if settings.TASK_RETENTION_FAILURE_DAYS:
+        cutoff = now - timedelta(days=settings.TASK_RETENTION_FAILURE_DAYS)
+        querysets.append(tasks.filter(success=False, stopped__lt=cutoff))
+    if settings.TASK_RETENTION_MAX_PER_FUNC:
+        # Stopped times of the oldest success within the limit and the next one,
+        # present when there are more successes than that. Rows stopped at the
+        # same instant as the oldest kept one are kept with it.
+        limit = settings.TASK_RETENTION_MAX_PER_FUNC
+        newest = tasks.filter(success=True).order_by("-stopped").values_list("stopped", flat=True)
+        boundary = list(newest[limit - 1 : limit + 1])
+        if len(boundary) == 2:
+            querysets.append(tasks.filter(success=True, stopped__lt=boundary[0]))
+    return querysets
+
+
+def prune(max_seconds: float = None, compact: bool = True, now=None) -> dict:
+    """
+    Apply the retention policy as of ``now`` (default the current time) and
+    return the rows deleted per function.
+
+    With ``max_seconds`` pruning stops after that long and ``complete`` is
+    False; the next run continues where it stopped. The file sweep gets
+    whatever time the deletes leave.
+    """
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    now = now or timezone.now()
+    report = {"deleted": {}, "complete": True}
+    funcs = Task.objects.order_by().values_list("func", flat=True).distinct()
+    for func in list(funcs):
+        for queryset in expired(func, now):
+            deleted, complete = delete_chunked(queryset, deadline)
+            if deleted:
+                report["deleted"][func] = report["deleted"].get(func, 0) + deleted
+            if not complete:
+                report["complete"] = False
+                break
+        if not report["complete"]:
+            break
+
+    report["total"] = sum(report["deleted"].values())
+    report["files"] = sweep_files(deadline)[0] if result_storage.store_exists() else 0
+    report["vacuumed_pages"] = compact_database() if compact and report["total"] else 0
+    logger.info(
+        f"Pruned {report['total']} tasks"
+        + ("" if report["complete"] else ", stopped at the time limit")
+    )
+    return report
+
+
+def is_spilled(result) -> bool:
+    return isinstance(result, result_storage.StoredResult) and result.codec == "file"
+
+
+def sweep_files(deadline=None) -> tuple[int, bool]:
+    """
+    Remove the stored result files no Task row refers to. Returns
+    ``(removed, complete)``.
+
+    Equal results share a file, possibly across functions, and only the
+    pickled rows know which, so a sweep reads every row, a chunk at a time
+    in id order, and collects the digests they refer to. Then it removes the
+    files that are not among them and were last written before the sweep
+    started, less ORPHAN_GRACE_SECONDS for tasks that spilled but were not
+    saved yet. Reusing a file touches it, so rows added while the sweep runs
+    keep theirs. Progress is saved when ``deadline`` passes and the next
+    call continues from there.
+    """
+    path = Path(settings.TASK_RESULT_STORE_DIR) / SWEEP_STATE
+    try:
+        state = json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        state = {"started": time.time(), "after": "", "referenced": [], "marked": False}
+    referenced = set(state["referenced"])
+
+    rows = Task.objects.order_by("id").values_list("id", "result")
+    removed, complete = 0, False
+    while not state["marked"]:
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        chunk = list(rows.filter(id__gt=state["after"])[: settings.TASK_PRUNE_CHUNK_SIZE])
+        referenced.update(result.digest for _, result in chunk if is_spilled(result))
+        if chunk:
+            state["after"] = chunk[-1][0]
+        state["marked"] = len(chunk) < settings.TASK_PRUNE_CHUNK_SIZE
+    else:
+        cutoff = state["started"] - result_storage.ORPHAN_GRACE_SECONDS
+        removed, complete = result_storage.remove_unreferenced(referenced, cutoff, deadline)
+
+    if complete:
+        path.unlink(missing_ok=True)
+    else:
+        state["referenced"] = sorted(referenced)
+        path.write_text(json.dumps(state))
+    return removed, complete
+
+
+def database_alias() -> str:
+    return router.db_for_write(Task)
+
+
+def enable_incremental_vacuum() -> bool:
+    """
+    Switch the SQLite database holding Task to ``auto_vacuum=INCREMENTAL``.
+    This rewrites the whole file with ``VACUUM`` once, so run it off-peak.
+    Returns False for other databases.
+    """
+    connection = connections[database_alias()]
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.execute("VACUUM")
+    return True
+
+
+def compact_database() -> int:
+    """
+    Return free pages to the filesystem and refresh statistics after a
+    prune. SQLite only; returns the pages vacuumed.
+    """
+    connection = connections[database_alias()]
+    if connection.vendor != "sqlite":
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA auto_vacuum")
+        mode = cursor.fetchone()[0]
+        cursor.execute("PRAGMA freelist_count")
+        free = cursor.fetchone()[0]
+        pages = 0
+        if mode == 2:
+            pages = min(free, settings.TASK_PRUNE_VACUUM_PAGES or free)
+            cursor.execute(f"PRAGMA incremental_vacuum({pages})")
+            # The pragma returns a row per page, step through them to run it
+            cursor.fetchall()
+        elif free:
+            logger.info(
+                f"{free} free pages stay in the database file, run "
+                "`manage.py prune_tasks --enable-incremental-vacuum` once to reclaim them"
+            )
+        cursor.execute(f"PRAGMA analysis_limit = {ANALYZE_LIMIT}")
+        cursor.execute(f'ANALYZE "{Task._meta.db_table}"')
+    return pages
@@ -0,0 +1,216 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from django_q.models import Task
+
+from . import result_storage
+
+# Negative cache marker for ids that had no finished task
+MISSING = "__missing__"
+
+
+class ResultCacheStats:
+    """Per-process counters for the task result cache."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+        self.lookups = 0
+        self.db_seconds = 0.0
+        self.db_queries = 0
+
+    def record(self, hits, negative_hits, misses, lookup_seconds, db_seconds=None):
+        with self.lock:
+            self.hits += hits
+            self.negative_hits += negative_hits
+            self.misses += misses
+            self.lookups += 1
+            self.lookup_seconds += lookup_seconds
+            if db_seconds is not None:
+                self.db_queries += 1
+                self.db_seconds += db_seconds
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            ids = self.hits + self.negative_hits + self.misses
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.negative_hits) / ids if ids else 0.0,
+                "lookups": self.lookups,
+                "avg_lookup_ms": (
+                    self.lookup_seconds / self.lookups * 1000 if self.lookups else 0.0
+                ),
+                "db_queries": self.db_queries,
+                "avg_db_query_ms": (
+                    self.db_seconds / self.db_queries * 1000 if self.db_queries else 0.0
+                ),
+            }
+
+
+stats = ResultCacheStats()
+
+
+def cache_key(task_id: str) -> str:
+    return f"tasks:result:{task_id}"
+
+
+def finished_tasks(task_ids):
+    """
+    Rows of the finished tasks among ``task_ids``.
+
+    Like ``django_q.tasks.result``, a task can be asked for by its name as
+    well as its id.
+    """
+    return Task.objects.filter(Q(id__in=task_ids) | Q(name__in=task_ids)).values_list(
+        "id", "name", "success", "result"
+    )
+
+
+def by_requested_key(task_ids, rows) -> dict:
+    """Key ``finished_tasks`` rows by whichever of id or name was asked for."""
+    requested = set(task_ids)
+    found = {}
+    for task_id, name, success, result in rows:
+        for key in (task_id, name):
+            if key in requested:
+                found[key] = (success, result)
+    return found
+
+
+def fetch_results(task_ids) -> dict:
+    """Return ``{task_id: (success, result)}`` for the finished tasks among ``task_ids``."""
+    return by_requested_key(task_ids, finished_tasks(task_ids))
+
+
+def get_results(task_ids, negative: bool = True) -> dict:
+    """
+    ``fetch_results`` behind the result cache.
+
+    Successful results never change, so they are cached for
+    TASK_RESULT_CACHE_TTL. Ids without a finished task are cached as missing
+    for TASK_RESULT_NEGATIVE_TTL; pass ``negative=False`` to look past those.
+    """
+    start = time.perf_counter()
+    cache = caches[settings.TASK_RESULT_CACHE]
+    keys = {cache_key(task_id): task_id for task_id in task_ids}
+    found, missing, negative_hits = split_cached(keys, cache.get_many(keys), negative)
+
+    db_seconds = None
+    if missing:
+        db_start = time.perf_counter()
+        fetched = fetch_results(missing)
+        db_seconds = time.perf_counter() - db_start
+        found.update(fetched)
+        for entries, timeout in cache_entries(missing, fetched):
+            cache.set_many(entries, timeout)
+
+    record_lookup(keys, missing, negative_hits, start, db_seconds)
+    return found
+
+
+async def aget_results(task_ids, negative: bool = True) -> dict:
+    """``get_results`` for async views, using the async cache and ORM APIs."""
+    start = time.perf_counter()
+    cache = caches[settings.TASK_RESULT_CACHE]
+    keys = {cache_key(task_id): task_id for task_id in task_ids}
+    found, missing, negative_hits = split_cached(keys, await cache.aget_many(keys), negative)
+
+    db_seconds = None
+    if missing:
+        db_start = time.perf_counter()
+        fetched = await afetch_results(missing)
+        db_seconds = time.perf_counter() - db_start
+        found.update(fetched)
+        for entries, timeout in cache_entries(missing, fetched):
+            await cache.aset_many(entries, timeout)
+
+    record_lookup(keys, missing, negative_hits, start, db_seconds)
+    return found
+
+
+async def afetch_results(task_ids) -> dict:
+    return by_requested_key(task_ids, [row async for row in finished_tasks(task_ids)])
+
+
+def split_cached(keys: dict, cached: dict, negative: bool):
+    """Return ``(found, missing, negative_hits)`` for a ``get_many`` answer."""
+    found = {}
+    missing = []
+    negative_hits = 0
+    for key, task_id in keys.items():
+        value = cached.get(key)
+        if value is None or (value == MISSING and not negative):
+            missing.append(task_id)
+        elif value == MISSING:
+            negative_hits += 1
+        else:
+            found[task_id] = value
+    return found, missing, negative_hits
+
+
+def cache_entries(missing, fetched):
+    """``(entries, timeout)`` pairs to cache after fetching ``missing`` ids."""
+    return [
+        (
+            {cache_key(task_id): entry for task_id, entry in fetched.items() if entry[0]},
+            settings.TASK_RESULT_CACHE_TTL,
+        ),
+        (
+            {cache_key(task_id): MISSING for task_id in missing if task_id not in fetched},
+            settings.TASK_RESULT_NEGATIVE_TTL,
+        ),
+    ]
+
+
+def record_lookup(keys, missing, negative_hits, start, db_seconds):
+    stats.record(
+        hits=len(keys) - len(missing) - negative_hits,
+        negative_hits=negative_hits,
+        misses=len(missing),
+        lookup_seconds=time.perf_counter() - start,
+        db_seconds=db_seconds,
+    )
+
+
+def get_result(task_id: str):
+    """Return ``(success, result)`` for a finished task, or None."""
+    return get_results([task_id]).get(task_id)
+
+
+async def aget_result(task_id: str):
+    return (await aget_results([task_id])).get(task_id)
+
+
+def cache_result(task_id: str, success: bool, result):
+    """Store a finished task's result, e.g. from the cluster's post_execute signal."""
+    cache = caches[settings.TASK_RESULT_CACHE]
+    if success:
+        cache.set(cache_key(task_id), (success, result), settings.TASK_RESULT_CACHE_TTL)
+    else:
+        # Failed tasks can be retried, only drop a stale negative entry
+        cache.delete(cache_key(task_id))
+
+
+def result_item(task_id: str, found) -> dict:
+    """Shape a ``get_results`` entry for ``TaskResultSerializer``."""
+    if found is None:
+        return {"task_id": task_id, "status": "pending", "result": None}
+
+    success, result = found
+    if not success:
+        return {"task_id": task_id, "status": "failed", "result": {"error": result}}
+    result = result_storage.present(task_id, result)
+    if result is not None and not isinstance(result, dict):
+        result = {"value": result}
+    return {"task_id": task_id, "status": "success", "result": result}
@@ -0,0 +1,51 @@
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+_current = ContextVar("stage_timings", default=None)
+
+
+class StageTimings:
+    """
+    Seconds spent per named stage. Stages nest: time spent in an inner stage
+    is only counted for the inner one, so the totals add up to the wall time.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        # Time taken by nested stages, one entry per open stage
+        self.nested = [0.0]
+
+    @contextmanager
+    def stage(self, name: str):
+        self.nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            inner = self.nested.pop()
+            self.nested[-1] += elapsed
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed - inner
+
+    def as_ms(self) -> dict:
+        return {name: round(seconds * 1000, 3) for name, seconds in self.totals.items()}
+
+
+@contextmanager
+def record():
+    """Collect the stages timed by ``stage()`` in this context, e.g. one send_email call."""
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def stage(name: str):
+    """Time a block into the enclosing ``record()``, a no-op outside of one."""
+    timings = _current.get()
+    if timings is None:
+        return nullcontext()
+    return timings.stage(name)
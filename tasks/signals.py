@@ -0,0 +1,45 @@
+import pydoc
+
+from django.dispatch import receiver
+from django_q.signals import post_execute, post_execute_in_worker, pre_execute
+
+from .services import memo, metrics, result_storage
+from .services.task_results import cache_result
+
+
+@receiver(post_execute)
+def cache_task_result(sender, task, **kwargs):
+    # Runs in the cluster's monitor process once the result is saved. With a
+    # shared cache (CACHE_URL) the web process then serves it without a query.
+    cache_result(task["id"], task["success"], task["result"])
+
+
+@receiver(post_execute)
+def memoize_task_result(sender, task, **kwargs):
+    func = task["func"]
+    if isinstance(func, str):
+        func = pydoc.locate(func)
+    cache_ttl = getattr(func, "cache_ttl", None)
+    if cache_ttl and task["success"]:
+        memo.store(
+            task["func"], task["id"], task["args"], task["kwargs"], task["result"], cache_ttl
+        )
+
+
+@receiver(pre_execute)
+def start_task_timer(sender, task, **kwargs):
+    metrics.task_started(task)
+
+
+@receiver(post_execute_in_worker)
+def store_large_result(sender, task, func=None, **kwargs):
+    # Encoded in the worker, so large results cross the result queue compressed
+    policy = getattr(func, "result_storage", None)
+    if policy and task["success"]:
+        task["result"] = result_storage.encode(task["result"], policy)
+
+
+@receiver(post_execute_in_worker)
+def observe_task(sender, task, **kwargs):
+    # Runs in the worker process, samples are merged through PROMETHEUS_MULTIPROC_DIR
+    metrics.task_finished(task)
@@ -1,12 +1,15 @@
+import asyncio
 import time
 from datetime import datetime
 from typing import Union
+from django.conf import settings
 from loguru import logger
 from .decorators import shared_task
+from .services import retention
 from .services.email_service import EmailNotificationService
 
 
-@shared_task
+@shared_task(queue="long", priority="low", cache_ttl=settings.SAMPLE_TASK_CACHE_TTL)
 def sample_task(message: str, delay: int = 2) -> dict:
     logger.info(f"Task started with message: {message}")
     time.sleep(delay)
@@ -19,6 +22,19 @@ def sample_task(message: str, delay: int = 2) -> dict:
     return result
 
 
+@shared_task(queue="io")
+async def sample_task_async(message: str, delay: int = 2) -> dict:
+    logger.info(f"Async task started with message: {message}")
+    await asyncio.sleep(delay)
+    result = {
+        "status": "completed",
+        "message": f"Processed: {message}",
+        "delay": delay,
+    }
+    logger.success(f"Async task completed: {result}")
+    return result
+
+
 @shared_task
 def scheduled_task() -> dict:
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -31,14 +47,14 @@ def scheduled_task() -> dict:
     return result
 
 
-@shared_task
+@shared_task(queue="email", priority="high", profile=True)
 def send_email_task(
     subject: str,
     html_template_path: str,
     to_email: Union[str, list[str]],
     context: dict,
     service_type: str = None,
-) -> None:
+) -> dict:
     if service_type is not None:
         logger.warning(
             "The service_type parameter in send_email_task is deprecated. "
@@ -55,4 +71,25 @@ def send_email_task(
     to_email = list(set(to_email + default_emails))
 
     email_notifier = EmailNotificationService()
-    email_notifier.send_email(subject, html_template_path, to_email, context)
+    timings_ms = email_notifier.send_email(subject, html_template_path, to_email, context)
+    return {"status": "completed", "recipients": len(to_email), "timings_ms": timings_ms}
+
+
+@shared_task(queue="email", profile=True)
+def send_email_batch_task(
+    subject: str,
+    html_template_path: str,
+    recipients: list[tuple[Union[str, list[str]], dict]],
+    batch_size: int = None,
+) -> dict:
+    email_notifier = EmailNotificationService()
+    sent = email_notifier.send_email_batch(
+        subject, html_template_path, recipients, batch_size=batch_size
+    )
+    return {"status": "completed", "sent": sent, "recipients": len(recipients)}
+
+
+@shared_task
+def prune_tasks_task() -> dict:
+    """Apply the Task table retention policy for at most TASK_PRUNE_MAX_SECONDS."""
+    return retention.prune(max_seconds=settings.TASK_PRUNE_MAX_SECONDS)
@@ -1,26 +1,108 @@
+import hashlib
 from django import template
+from django.conf import settings
+from django.template.base import Lexer, Parser, TokenType
 from io import BytesIO
+from loguru import logger
 from mjml import mjml_to_html
 
+from tasks.cache import LRUCache
+from tasks.services.timings import stage
+
 register = template.Library()
 
+compiled_cache = LRUCache(settings.MJML_CACHE_MAX_ENTRIES, settings.MJML_CACHE_MAX_BYTES)
+
+
+def compile_mjml(mjml_content: str):
+    """
+    Compile MJML to HTML, reusing the output for identical input.
+
+    Returns ``(html, errors)``. Entries are keyed by a hash of the MJML itself,
+    so an edited template can never be served a stale layout.
+    """
+    with stage("mjml_compile"):
+        key = hashlib.sha256(mjml_content.encode("utf-8")).hexdigest()
+        html = compiled_cache.get(key)
+        if html is not None:
+            return html, []
+
+        result = mjml_to_html(BytesIO(mjml_content.encode("utf-8")))
+        if result.errors:
+            return None, result.errors
+        compiled_cache.set(key, result.html)
+        return result.html, []
+
 
 @register.tag(name="mjml")
 def do_mjml(parser, token):
+    source = block_source(parser.tokens[::-1], "endmjml")
     nodelist = parser.parse(("endmjml",))
     parser.delete_first_token()
-    return MjmlNode(nodelist)
+    return MjmlNode(nodelist, source, parser)
+
+
+def block_source(tokens, end_tag: str) -> str:
+    """Rebuild the template source of ``tokens`` up to ``end_tag``, minus comments."""
+    parts = []
+    for token in tokens:
+        if token.token_type == TokenType.BLOCK:
+            if token.contents.split()[0] == end_tag:
+                break
+            parts.append(f"{{% {token.contents} %}}")
+        elif token.token_type == TokenType.VAR:
+            parts.append(f"{{{{ {token.contents} }}}}")
+        elif token.token_type == TokenType.TEXT:
+            parts.append(token.contents)
+    return "".join(parts)
+
+
+def template_tags(source: str) -> list:
+    return [
+        token.contents
+        for token in Lexer(source).tokenize()
+        if token.token_type in (TokenType.BLOCK, TokenType.VAR)
+    ]
 
 
 class MjmlNode(template.Node):
-    def __init__(self, nodelist):
+    def __init__(self, nodelist, source="", parser=None):
         self.nodelist = nodelist
+        self.source = source
+        self.tags = dict(parser.tags) if parser else {}
+        self.filters = dict(parser.filters) if parser else {}
+        self.origin = parser.origin if parser else None
+        self.skeleton = None
 
     def render(self, context):
+        if settings.MJML_COMPILE_MODE == "substitute":
+            skeleton = self.get_skeleton()
+            if skeleton is not None:
+                return skeleton.render(context)
+
         mjml_content = self.nodelist.render(context)
-        mjml_bytes = BytesIO(mjml_content.encode("utf-8"))
-        result = mjml_to_html(mjml_bytes)
-        if result.errors:
-            return f"<!-- MJML Errors: {result.errors} -->\n{mjml_content}"
-        return result.html
+        html, errors = compile_mjml(mjml_content)
+        if errors:
+            return f"<!-- MJML Errors: {errors} -->\n{mjml_content}"
+        return html
 
+    def get_skeleton(self):
+        """
+        Compile the block once with its template tags left in place, then parse
+        the resulting HTML so each render only substitutes context values.
+        Falls back to compiling every render when MJML errors or drops tags,
+        e.g. a ``{% for %}`` wrapped around ``<mj-section>`` elements.
+        """
+        if self.skeleton is None:
+            html, errors = compile_mjml(self.source)
+            if errors or template_tags(html) != template_tags(self.source):
+                logger.warning(
+                    f"MJML block in {self.origin} cannot be precompiled, "
+                    "compiling on every render instead"
+                )
+                self.skeleton = False
+            else:
+                parser = Parser(Lexer(html).tokenize(), origin=self.origin)
+                parser.tags, parser.filters = self.tags, self.filters
+                self.skeleton = parser.parse()
+        return self.skeleton or None
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django_q.conf import Conf
+
+from tasks import brokers
+from tasks.brokers import DiskBroker
+
+
+class DiskBrokerTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(Q_DISK_BROKER_PATH=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        for patch in (mock.patch.object(Conf, "POLL", 0), mock.patch.object(Conf, "BULK", 1)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def enqueue_stale(self, broker, count):
+        # Queued for longer than the retry timeout, e.g. after a requeue
+        stale = time.time() - Conf.RETRY - 60
+        names = [broker.enqueue(f"package-{i}") for i in range(count)]
+        for name in names:
+            os.utime(broker.connection / "new" / name, (stale, stale))
+        return names
+
+    def test_round_trip(self):
+        broker = DiskBroker()
+        name = broker.enqueue("package")
+
+        self.assertEqual(broker.dequeue(), [(name, "package")])
+        self.assertEqual((broker.queue_size(), broker.lock_size()), (0, 1))
+
+        broker.acknowledge(name)
+        self.assertEqual(broker.lock_size(), 0)
+
+    def test_expired_locks_are_requeued(self):
+        broker = DiskBroker()
+        (name,) = self.enqueue_stale(broker, 1)
+        broker.dequeue()
+        stale = time.time() - Conf.RETRY - 1
+        os.utime(broker.connection / "cur" / name, (stale, stale))
+
+        self.assertEqual(broker.dequeue(), [(name, "package-0")])
+
+    def test_fresh_lock_is_not_requeued_by_another_process(self):
+        broker, other = DiskBroker(), DiskBroker()
+        self.enqueue_stale(broker, 1)
+        rename = os.rename
+
+        def rename_then_requeue(source, target):
+            rename(source, target)
+            if "cur" in os.fspath(target).split(os.sep):
+                # Another process scans cur/ right after the package lands there
+                other.requeue_expired()
+
+        with mock.patch.object(brokers.os, "rename", rename_then_requeue):
+            self.assertEqual(len(broker.dequeue()), 1)
+
+        self.assertEqual((broker.queue_size(), broker.lock_size()), (0, 1))
+
+    def test_concurrent_consumers_get_each_package_once(self):
+        names = self.enqueue_stale(DiskBroker(), 200)
+        delivered = Counter()
+        lock = threading.Lock()
+
+        def consume():
+            broker = DiskBroker()
+            while True:
+                packages = broker.dequeue()
+                if not packages and not broker.queue_size():
+                    return
+                with lock:
+                    delivered.update(name for name, _ in packages or ())
+
+        consumers = [threading.Thread(target=consume) for _ in range(4)]
+        for consumer in consumers:
+            consumer.start()
+        for consumer in consumers:
+            consumer.join()
+
+        self.assertEqual(delivered, Counter(names))
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django_q.brokers import get_broker
+from django_q.conf import Conf
+from django_q.models import OrmQ
+from django_q.signing import SignedPackage
+
+from tasks.decorators import TaskWrapper, build_task, bulk_enqueue
+
+
+def add(a, b=0):
+    return a + b
+
+
+class DelayManyTests(TestCase):
+    def setUp(self):
+        caches[settings.TASK_MEMO_CACHE].clear()
+        self.addCleanup(caches[settings.TASK_MEMO_CACHE].clear)
+
+    def queued_ids(self):
+        return [SignedPackage.loads(q.payload)["id"] for q in OrmQ.objects.order_by("id")]
+
+    def test_enqueues_in_input_order(self):
+        task_ids = TaskWrapper(add).delay_many([(1, 2), {"a": 3}, 4], chunk_size=2)
+
+        self.assertEqual(len(set(task_ids)), 3)
+        self.assertEqual(self.queued_ids(), task_ids)
+
+    def test_memoized_task_reuses_pending_ids(self):
+        task = TaskWrapper(add, cache_ttl=60)
+
+        first = task.delay_many([(1, 2), (3, 4)])
+        second = task.delay_many([(3, 4), (5, 6)])
+
+        self.assertEqual(second[0], first[1])
+        self.assertEqual(OrmQ.objects.count(), 3)
+        self.assertEqual(task.delay(1, 2), first[0])
+
+    def test_idempotent_task_suppresses_repeats(self):
+        task = TaskWrapper(add, idempotent=True)
+
+        task_ids = task.delay_many([(1, 2), (1, 2), (2, 3)])
+
+        self.assertEqual(task_ids[0], task_ids[1])
+        self.assertNotEqual(task_ids[0], task_ids[2])
+        self.assertEqual(OrmQ.objects.count(), 2)
+
+
+class BulkEnqueueTests(TestCase):
+    def test_unnamed_broker_uses_cluster_name(self):
+        broker = get_broker()
+        broker.list_key = None
+        task = build_task("tasks.tests.test_delay_many.add", (1,), {})
+
+        bulk_enqueue(broker, [SignedPackage.dumps(task)])
+
+        self.assertEqual(OrmQ.objects.get().key, Conf.CLUSTER_NAME)
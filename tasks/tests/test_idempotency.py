@@ -0,0 +1,77 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tasks.models import IdempotencyKey
+from tasks.services import idempotency
+
+
+class EnqueueOnceTests(TestCase):
+    def setUp(self):
+        idempotency.stats.reset()
+        self.enqueue = mock.Mock(side_effect=["task-1", "task-2"])
+
+    def test_repeat_returns_first_task(self):
+        first = idempotency.enqueue_once("tasks.tasks.sample_task", "k", self.enqueue)
+        second = idempotency.enqueue_once("tasks.tasks.sample_task", "k", self.enqueue)
+
+        self.assertEqual(first, ("task-1", True))
+        self.assertEqual(second, ("task-1", False))
+        self.assertEqual(self.enqueue.call_count, 1)
+        self.assertEqual(
+            idempotency.stats.as_dict(), {"enqueued": 1, "suppressed_duplicates": 1}
+        )
+
+    def test_keys_are_per_function(self):
+        idempotency.enqueue_once("tasks.tasks.sample_task", "k", self.enqueue)
+        _, created = idempotency.enqueue_once("tasks.tasks.send_email_task", "k", self.enqueue)
+
+        self.assertTrue(created)
+
+    def test_reservation_is_stored_in_the_database(self):
+        # What another process sees: no cache involved
+        idempotency.enqueue_once("tasks.tasks.sample_task", "k", self.enqueue)
+
+        row = IdempotencyKey.objects.get()
+        self.assertEqual(row.key, idempotency.reservation_key("tasks.tasks.sample_task", "k"))
+        self.assertEqual(row.task_id, "task-1")
+
+    def test_expired_key_enqueues_again(self):
+        idempotency.enqueue_once("tasks.tasks.sample_task", "k", self.enqueue)
+        IdempotencyKey.objects.update(expires=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(
+            idempotency.enqueue_once("tasks.tasks.sample_task", "k", self.enqueue),
+            ("task-2", True),
+        )
+        self.assertEqual(IdempotencyKey.objects.get().task_id, "task-2")
+
+    def test_failed_enqueue_releases_the_key(self):
+        failing = mock.Mock(side_effect=RuntimeError("broker down"))
+        with self.assertRaises(RuntimeError):
+            idempotency.enqueue_once("tasks.tasks.sample_task", "k", failing)
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(
+            idempotency.enqueue_once("tasks.tasks.sample_task", "k", self.enqueue),
+            ("task-1", True),
+        )
+
+    @override_settings(TASK_IDEMPOTENCY_WAIT=0.05)
+    def test_pending_reservation_raises_conflict(self):
+        IdempotencyKey.objects.create(
+            key=idempotency.reservation_key("tasks.tasks.sample_task", "k"),
+            expires=timezone.now() + timedelta(minutes=1),
+        )
+
+        with self.assertRaises(idempotency.IdempotencyConflict):
+            idempotency.enqueue_once("tasks.tasks.sample_task", "k", self.enqueue)
+        self.enqueue.assert_not_called()
+
+    def test_derive_key_ignores_django_q_options(self):
+        self.assertEqual(
+            idempotency.derive_key("f", (1,), {"a": 2, "group": "x"}),
+            idempotency.derive_key("f", (1,), {"a": 2}),
+        )
@@ -0,0 +1,86 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_q.conf import Conf
+from django_q.tasks import async_task
+
+from tasks.services import metrics
+from tasks.tasks import sample_task
+
+
+def samples(collector):
+    return {
+        (family.name, sample.labels.get("queue") or sample.labels.get("cluster_id")): sample.value
+        for family in collector.collect()
+        for sample in family.samples
+    }
+
+
+class MetricsTests(TestCase):
+    def test_func_name(self):
+        self.assertEqual(metrics.func_name("tasks.tasks.sample_task"), "tasks.tasks.sample_task")
+        self.assertEqual(metrics.func_name(sample_task), "tasks.tasks.sample_task")
+        self.assertEqual(metrics.func_name(samples), "tasks.tests.test_metrics.samples")
+
+    @override_settings(
+        TASK_LANES_ENABLED=True,
+        TASK_LANES={"email": {"workers": 2}, "long": {"workers": 2, "queue_limit": 10}},
+    )
+    def test_queue_limits_per_lane(self):
+        self.assertEqual(
+            metrics.queue_limits(),
+            {Conf.CLUSTER_NAME: Conf.QUEUE_LIMIT, "email": 4, "long": 10},
+        )
+
+    def test_broker_collector_reports_queue_depth(self):
+        for _ in range(3):
+            async_task("tasks.tasks.scheduled_task")
+
+        collected = samples(metrics.BrokerCollector())
+
+        self.assertEqual(collected[("tasks_queued", Conf.CLUSTER_NAME)], 3)
+        self.assertEqual(collected[("tasks_in_progress", Conf.CLUSTER_NAME)], 0)
+        self.assertEqual(collected[("tasks_queue_limit_saturation", Conf.CLUSTER_NAME)], 0)
+
+    def test_broker_errors_skip_the_queue(self):
+        with mock.patch.object(metrics, "get_broker", side_effect=ConnectionError("down")):
+            collected = samples(metrics.BrokerCollector())
+
+        self.assertNotIn(("tasks_queued", Conf.CLUSTER_NAME), collected)
+
+    def test_reset_removes_only_sample_files(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for name in ("counter_1.db", "gauge_live_2.db", "notes.txt"):
+            open(os.path.join(directory.name, name), "w").close()
+
+        with override_settings(PROMETHEUS_MULTIPROC_DIR=directory.name):
+            metrics.reset()
+
+        self.assertEqual(os.listdir(directory.name), ["notes.txt"])
+
+
+class MetricsViewTests(TestCase):
+    def test_disabled(self):
+        with mock.patch.object(metrics, "enabled", False):
+            response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 503)
+
+    def test_enabled(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        async_task("tasks.tasks.scheduled_task")
+
+        with (
+            mock.patch.object(metrics, "enabled", True),
+            mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory.name}),
+        ):
+            response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(f'tasks_queued{{queue="{Conf.CLUSTER_NAME}"}} 1.0', response.content.decode())
@@ -0,0 +1,80 @@
+import cProfile
+import os
+import tempfile
+import tracemalloc
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from tasks.services import profiling
+
+FUNC = "tasks.tasks.sample_task"
+
+
+class RunProfiledTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(TASK_PROFILE_DIR=directory.name, TASK_PROFILE_MEMORY=False)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def saved(self):
+        directory = profiling.task_dir(FUNC)
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def test_writes_profile(self):
+        self.assertEqual(profiling.run_profiled(FUNC, lambda: 42), 42)
+
+        self.assertEqual(len(self.saved()), 1)
+        self.assertTrue(self.saved()[0].endswith(profiling.PROFILE_SUFFIX))
+
+    def test_overlapping_run_is_not_profiled(self):
+        inner = profiling.run_profiled(FUNC, lambda: profiling.run_profiled(FUNC, lambda: 1))
+
+        self.assertEqual(inner, 1)
+        self.assertEqual(len(self.saved()), 1)
+
+    def test_outside_profiler_runs_unprofiled(self):
+        outside = cProfile.Profile()
+        outside.enable()
+        try:
+            result = profiling.run_profiled(FUNC, lambda: 7)
+        finally:
+            outside.disable()
+
+        self.assertEqual(result, 7)
+        self.assertEqual(self.saved(), [])
+        # The lock was released, the next run is profiled
+        profiling.run_profiled(FUNC, lambda: None)
+        self.assertEqual(len(self.saved()), 1)
+
+    def test_save_failure_keeps_result(self):
+        with mock.patch.object(profiling, "save", side_effect=RuntimeError("disk")):
+            self.assertEqual(profiling.run_profiled(FUNC, lambda: 42), 42)
+
+    def test_save_failure_keeps_task_exception(self):
+        def fail():
+            raise KeyError("task")
+
+        with mock.patch.object(profiling, "save", side_effect=RuntimeError("disk")):
+            with self.assertRaises(KeyError):
+                profiling.run_profiled(FUNC, fail)
+
+    @override_settings(TASK_PROFILE_MEMORY=True)
+    def test_memory_snapshot(self):
+        profiling.run_profiled(FUNC, lambda: [0] * 1000)
+
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(
+            [name.rsplit(".", 1)[1] for name in self.saved()], ["mem", "prof"]
+        )
+
+    @override_settings(TASK_PROFILE_MEMORY=True)
+    def test_leaves_outside_tracing_running(self):
+        tracemalloc.start()
+        try:
+            profiling.run_profiled(FUNC, lambda: None)
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
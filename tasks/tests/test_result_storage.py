@@ -0,0 +1,120 @@
+import gzip
+import json
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_q.models import Task
+
+from tasks.services import result_storage
+
+LARGE = {"rows": [{"id": i, "name": f"item-{i}"} for i in range(2000)]}
+
+
+class StoreDirMixin:
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(
+            TASK_RESULT_STORE_DIR=directory.name,
+            TASK_RESULT_COMPRESS_BYTES=1024,
+            TASK_RESULT_SPILL_BYTES=16 * 1024,
+            TASK_RESULT_CODEC="zlib",
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class EncodeTests(StoreDirMixin, TestCase):
+    def test_small_results_are_kept(self):
+        for result in (None, 3, "done", {"status": "ok"}):
+            with self.subTest(result=result):
+                self.assertEqual(result_storage.encode(result, "spill"), result)
+
+    def test_compress_round_trip(self):
+        stored = result_storage.encode(LARGE, "compress")
+
+        self.assertEqual(stored.codec, "zlib")
+        self.assertLess(len(stored.data), stored.size)
+        self.assertEqual(result_storage.load(stored), LARGE)
+
+    def test_spill_round_trip(self):
+        stored = result_storage.encode(LARGE, "spill")
+
+        self.assertEqual(stored.codec, "file")
+        self.assertEqual(stored.data, b"")
+        self.assertTrue(result_storage.store_path(stored.digest).exists())
+        self.assertEqual(result_storage.load(stored), LARGE)
+
+    def test_same_result_shares_a_file(self):
+        first = result_storage.encode(LARGE, "spill")
+        second = result_storage.encode(LARGE, "spill")
+
+        self.assertEqual(first, second)
+
+    def test_unserializable_result_is_compressed(self):
+        result = {"values": {i for i in range(5000)}}
+
+        stored = result_storage.encode(result, "spill")
+
+        self.assertEqual(stored.codec, "zlib")
+        self.assertEqual(result_storage.load(stored), result)
+
+    def test_present_links_spilled_results(self):
+        stored = result_storage.encode(LARGE, "spill")
+
+        presented = result_storage.present("abc", stored)
+
+        self.assertEqual(presented["stored"], "file")
+        self.assertEqual(
+            presented["download"], f"{reverse('tasks:task_result_download')}?task_id=abc"
+        )
+
+
+class TaskResultDownloadViewTests(StoreDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        caches[settings.TASK_RESULT_CACHE].clear()
+        self.addCleanup(caches[settings.TASK_RESULT_CACHE].clear)
+        now = timezone.now()
+        Task.objects.create(
+            id="spilled",
+            name="spilled",
+            func="tasks.tasks.sample_task",
+            result=result_storage.encode(LARGE, "spill"),
+            started=now,
+            stopped=now,
+            success=True,
+        )
+        self.url = f"{reverse('tasks:task_result_download')}?task_id=spilled"
+
+    def download(self, accept_encoding=None):
+        headers = {} if accept_encoding is None else {"Accept-Encoding": accept_encoding}
+        response = self.client.get(self.url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Accept-Encoding", response["Vary"])
+        return response, b"".join(response.streaming_content)
+
+    def test_gzip(self):
+        for header in ("gzip", "br, gzip;q=0.5", "*", "GZIP;Q=1"):
+            with self.subTest(header=header):
+                response, body = self.download(header)
+                self.assertEqual(response["Content-Encoding"], "gzip")
+                self.assertEqual(json.loads(gzip.decompress(body)), LARGE)
+
+    def test_plain(self):
+        for header in (None, "", "identity", "br", "gzip;q=0", "gzip;q=0.0, br", "*;q=0"):
+            with self.subTest(header=header):
+                response, body = self.download(header)
+                self.assertFalse(response.has_header("Content-Encoding"))
+                self.assertEqual(json.loads(body), LARGE)
+
+    def test_missing_file(self):
+        result_storage.store_path(result_storage.encode(LARGE, "spill").digest).unlink()
+
+        response = self.client.get(self.url, headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.test import AsyncClient, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from tasks import views
+from tasks.services import result_waiter
+from tasks.services.result_waiter import ResultWaiter
+
+FOUND = (True, {"rows": [1]})
+
+
+class FakeResults:
+    """Stands in for ``aget_results``: tasks finish once ``finished`` lists them."""
+
+    def __init__(self):
+        self.finished = {}
+        self.polls = []
+
+    async def __call__(self, task_ids, negative=True):
+        self.polls.append(sorted(task_ids))
+        return {task_id: self.finished[task_id] for task_id in task_ids if task_id in self.finished}
+
+
+class ResultWaiterMixin:
+    def setUp(self):
+        self.results = FakeResults()
+        patch = mock.patch.object(result_waiter, "aget_results", self.results)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+
+class ResultWaiterTests(ResultWaiterMixin, SimpleTestCase):
+    async def finish_later(self, task_id, delay=0.05):
+        await asyncio.sleep(delay)
+        self.results.finished[task_id] = FOUND
+
+    async def test_waiters_share_one_poll(self):
+        waiter = ResultWaiter(interval=0.01)
+        asyncio.create_task(self.finish_later("a"))
+
+        found = await asyncio.gather(
+            waiter.wait("a", 1), waiter.wait("a", 1), waiter.wait("b", 0.2)
+        )
+
+        self.assertEqual(found, [FOUND, FOUND, None])
+        # Every poll asks for all waited ids at once
+        self.assertEqual(self.results.polls[0], ["a", "b"])
+        self.assertEqual((waiter.futures, waiter.waiting), ({}, {}))
+
+    async def test_timeout_returns_none(self):
+        waiter = ResultWaiter(interval=0.01)
+
+        self.assertIsNone(await waiter.wait("a", 0.05))
+        self.assertEqual((waiter.futures, waiter.waiting), ({}, {}))
+        await asyncio.sleep(0.02)
+        self.assertTrue(waiter.poller.done())
+
+    async def test_poll_errors_are_retried(self):
+        waiter = ResultWaiter(interval=0.01)
+        calls = []
+
+        async def flaky(task_ids, negative=True):
+            calls.append(task_ids)
+            if len(calls) == 1:
+                raise ConnectionError("database is locked")
+            return {"a": FOUND}
+
+        with mock.patch.object(result_waiter, "aget_results", flaky):
+            self.assertEqual(await waiter.wait("a", 1), FOUND)
+        self.assertEqual(len(calls), 2)
+
+
+@override_settings(TASK_RESULT_POLL_INTERVAL=0.01)
+class TaskResultWaitTests(ResultWaiterMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        # Not finished on the first lookup
+        patch = mock.patch.object(views, "aget_result", mock.AsyncMock(return_value=None))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    async def get(self, **params):
+        return await AsyncClient().get(reverse("tasks:task_result"), params)
+
+    async def test_returns_once_the_result_lands(self):
+        async def finish():
+            await asyncio.sleep(0.05)
+            self.results.finished["a"] = FOUND
+
+        asyncio.create_task(finish())
+        response = await self.get(task_id="a", wait=1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["result"], {"rows": [1]})
+
+    async def test_not_found_after_the_wait(self):
+        response = await self.get(task_id="a", wait=0.05)
+
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(TASK_RESULT_POLL_INTERVAL=0.01, TASK_RESULT_SSE_KEEPALIVE=0.05)
+class TaskResultStreamViewTests(ResultWaiterMixin, SimpleTestCase):
+    async def events(self, **params):
+        response = await AsyncClient().get(reverse("tasks:task_result_stream"), params)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return "".join([part.decode() async for part in response.streaming_content])
+
+    async def test_result_event_after_keepalives(self):
+        async def finish():
+            await asyncio.sleep(0.12)
+            self.results.finished["a"] = FOUND
+
+        asyncio.create_task(finish())
+        body = await self.events(task_id="a", wait=1)
+
+        self.assertTrue(body.startswith(": keepalive\n\n"))
+        event, data = body.split(": keepalive\n\n")[-1].splitlines()[:2]
+        self.assertEqual(event, "event: result")
+        self.assertEqual(
+            json.loads(data.removeprefix("data: ")),
+            {"task_id": "a", "status": "success", "result": {"rows": [1]}},
+        )
+
+    async def test_timeout_event(self):
+        body = await self.events(task_id="a", wait=0.08)
+
+        self.assertTrue(
+            body.endswith('event: timeout\ndata: {"task_id":"a","status":"pending"}\n\n')
+        )
+
+    async def test_rejects_wait_over_the_limit(self):
+        response = await AsyncClient().get(
+            reverse("tasks:task_result_stream"), {"task_id": "a", "wait": 10**6}
+        )
+
+        self.assertEqual(response.status_code, 400)
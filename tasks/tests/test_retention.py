@@ -0,0 +1,202 @@
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django_q.humanhash import uuid
+from django_q.models import Task
+
+from tasks.checks import RETENTION_INDEX, check_retention_index
+from tasks.services import result_storage, retention
+
+NOW = timezone.now()
+SPILL = "tasks.tasks.sample_task"
+
+
+def add_task(func=SPILL, age=timedelta(0), success=True, result=None):
+    tag = uuid()
+    stopped = NOW - age
+    Task.objects.create(
+        id=tag[1],
+        name=tag[0],
+        func=func,
+        result=result,
+        started=stopped,
+        stopped=stopped,
+        success=success,
+    )
+    return tag[1]
+
+
+@override_settings(
+    TASK_RETENTION_SUCCESS_DAYS=7,
+    TASK_RETENTION_FAILURE_DAYS=30,
+    TASK_RETENTION_MAX_PER_FUNC=0,
+    TASK_PRUNE_CHUNK_SIZE=2,
+    TASK_PRUNE_PAUSE=0,
+)
+class PruneTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(
+            TASK_RESULT_STORE_DIR=directory.name,
+            TASK_RESULT_COMPRESS_BYTES=1024,
+            TASK_RESULT_SPILL_BYTES=4096,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def prune(self):
+        return retention.prune(compact=False, now=NOW)
+
+    def spilled(self, content):
+        stored = result_storage.encode({"rows": [f"{content}-{i}" for i in range(2000)]}, "spill")
+        self.assertEqual(stored.codec, "file")
+        # Out of the grace window for files a task may still be saving
+        old = time.time() - result_storage.ORPHAN_GRACE_SECONDS - 1
+        os.utime(result_storage.store_path(stored.digest), (old, old))
+        return stored
+
+    def test_age_rules(self):
+        kept = {
+            add_task(age=timedelta(days=6)),
+            add_task(age=timedelta(days=8), success=False, result="Traceback"),
+        }
+        add_task(age=timedelta(days=8))
+        add_task(age=timedelta(days=31), success=False, result="Traceback")
+
+        report = self.prune()
+
+        self.assertEqual(report["deleted"], {SPILL: 2})
+        self.assertTrue(report["complete"])
+        self.assertEqual(set(Task.objects.values_list("id", flat=True)), kept)
+
+    def test_chunks_delete_everything(self):
+        for _ in range(5):
+            add_task(age=timedelta(days=8))
+
+        self.assertEqual(self.prune()["total"], 5)
+        self.assertFalse(Task.objects.exists())
+
+    def test_stops_at_deadline(self):
+        add_task(age=timedelta(days=8))
+
+        deleted, complete = retention.delete_chunked(
+            Task.objects.all(), deadline=time.monotonic() - 1
+        )
+
+        self.assertEqual((deleted, complete), (0, False))
+        self.assertTrue(Task.objects.exists())
+
+    @override_settings(TASK_RETENTION_MAX_PER_FUNC=2)
+    def test_max_per_func_keeps_ties(self):
+        newest = add_task(age=timedelta(minutes=1))
+        tied = {add_task(age=timedelta(minutes=2)), add_task(age=timedelta(minutes=2))}
+        add_task(age=timedelta(minutes=3))
+
+        self.prune()
+
+        self.assertEqual(set(Task.objects.values_list("id", flat=True)), tied | {newest})
+
+    @override_settings(TASK_RETENTION_MAX_PER_FUNC=2)
+    def test_max_per_func(self):
+        kept = {add_task(age=timedelta(minutes=1)), add_task(age=timedelta(minutes=2))}
+        add_task(age=timedelta(minutes=3))
+        add_task(age=timedelta(minutes=4))
+
+        self.assertEqual(self.prune()["total"], 2)
+        self.assertEqual(set(Task.objects.values_list("id", flat=True)), kept)
+
+        # Exactly at the limit, nothing more goes
+        self.assertEqual(self.prune()["total"], 0)
+
+    def test_removes_files_of_deleted_rows(self):
+        stored = self.spilled("only-old")
+        add_task(age=timedelta(days=8), result=stored)
+
+        report = self.prune()
+
+        self.assertEqual(report["files"], 1)
+        self.assertFalse(result_storage.store_path(stored.digest).exists())
+
+    def test_keeps_files_still_referenced(self):
+        # The same result from another function still in the table
+        stored = self.spilled("shared")
+        add_task(age=timedelta(days=8), result=stored)
+        add_task(func="tasks.tasks.scheduled_task", result=stored)
+
+        report = self.prune()
+
+        self.assertEqual((report["total"], report["files"]), (1, 0))
+        self.assertEqual(result_storage.load(stored)["rows"][0], "shared-0")
+
+    def test_keeps_recent_files(self):
+        stored = self.spilled("recent")
+        os.utime(result_storage.store_path(stored.digest))
+        add_task(age=timedelta(days=8), result=stored)
+
+        self.assertEqual(self.prune()["files"], 0)
+        self.assertTrue(result_storage.store_path(stored.digest).exists())
+
+    def test_removes_files_kept_by_the_grace_window_later(self):
+        stored = self.spilled("grace")
+        os.utime(result_storage.store_path(stored.digest))
+        add_task(age=timedelta(days=8), result=stored)
+        self.assertEqual(self.prune()["files"], 0)
+
+        old = time.time() - result_storage.ORPHAN_GRACE_SECONDS - 1
+        os.utime(result_storage.store_path(stored.digest), (old, old))
+
+        self.assertEqual(self.prune()["files"], 1)
+
+    def test_removes_files_of_rows_deleted_elsewhere(self):
+        stored = self.spilled("admin-deleted")
+
+        report = self.prune()
+
+        self.assertEqual((report["total"], report["files"]), (0, 1))
+        self.assertFalse(result_storage.store_path(stored.digest).exists())
+
+    def test_sweep_resumes_after_the_deadline(self):
+        kept = self.spilled("kept")
+        for _ in range(3):
+            add_task(result=kept)
+        orphan = self.spilled("orphan")
+
+        self.assertEqual(retention.sweep_files(deadline=time.monotonic() - 1), (0, False))
+        self.assertTrue(result_storage.store_path(orphan.digest).exists())
+
+        self.assertEqual(retention.sweep_files(), (1, True))
+        self.assertTrue(result_storage.store_path(kept.digest).exists())
+        self.assertFalse(result_storage.store_path(orphan.digest).exists())
+
+    def test_sweep_keeps_files_written_after_it_started(self):
+        # A task that spilled during the sweep may be saved behind its cursor
+        retention.sweep_files(deadline=time.monotonic() - 1)
+        stored = result_storage.encode({"rows": [f"late-{i}" for i in range(2000)]}, "spill")
+
+        self.assertEqual(retention.sweep_files(), (0, True))
+        self.assertTrue(result_storage.store_path(stored.digest).exists())
+
+    def test_does_not_import_task_functions(self):
+        add_task(func="tasks.tests.never_imported.run", age=timedelta(days=8))
+        self.spilled("unrelated")
+
+        self.assertEqual(self.prune()["total"], 1)
+        self.assertNotIn("tasks.tests.never_imported", sys.modules)
+
+
+class RetentionIndexCheckTests(TestCase):
+    def test_warns_when_a_django_q_migration_dropped_the_index(self):
+        self.assertEqual(check_retention_index(None, databases=["default"]), [])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX "{RETENTION_INDEX}"')
+
+        warnings = check_retention_index(None, databases=["default"])
+        self.assertEqual([warning.id for warning in warnings], ["tasks.W001"])
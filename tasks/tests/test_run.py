@@ -0,0 +1,72 @@
+import io
+import os
+import sys
+import textwrap
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+import run
+
+# Starts a grandchild that ignores SIGTERM and shares the child's stdout,
+# like a server worker, reports its pid and then runs for EXIT_AFTER seconds
+PARENT = textwrap.dedent(
+    """
+    import subprocess, sys, time
+    worker = subprocess.Popen([sys.executable, "-c", (
+        "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(60)"
+    )])
+    print(f"worker {worker.pid}", flush=True)
+    time.sleep(float(sys.argv[1]))
+    """
+)
+
+
+def alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+class SupervisorTests(SimpleTestCase):
+    def supervise(self, exit_after):
+        child = run.Child("CLUSTER", [sys.executable, "-c", PARENT, str(exit_after)])
+        output = io.BytesIO()
+        supervisor = run.Supervisor([child], output=output)
+        supervisor.start(child)
+        self.addCleanup(supervisor.stop, timeout=1)
+        self.wait_for(lambda: b"worker" in output.getvalue(), supervisor)
+        worker = int(output.getvalue().split(b"worker ")[1].split()[0])
+        self.addCleanup(lambda: alive(worker) and os.kill(worker, 9))
+        return supervisor, child, worker
+
+    def wait_for(self, condition, supervisor, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, "timed out")
+            for key, _ in supervisor.selector.select(timeout=0.05):
+                supervisor.read(key.data, key.fileobj)
+            supervisor.reap()
+
+    def test_stop_kills_the_process_group(self):
+        supervisor, child, worker = self.supervise(exit_after=60)
+
+        supervisor.stop(timeout=0.5)
+
+        self.assertIsNotNone(child.process.returncode)
+        self.wait_for(lambda: not alive(worker), supervisor, timeout=5)
+
+    @mock.patch.object(run, "EXIT_DRAIN_SECONDS", 0.2)
+    @mock.patch.object(run, "mark_process_dead")
+    def test_reaps_exited_child_while_its_worker_holds_the_pipe(self, mark_process_dead):
+        supervisor, child, worker = self.supervise(exit_after=0)
+        pid = child.process.pid
+
+        self.wait_for(lambda: child.process is None, supervisor)
+
+        mark_process_dead.assert_called_once_with(pid)
+        self.assertFalse(supervisor.selector.get_map())
+        self.wait_for(lambda: not alive(worker), supervisor, timeout=5)
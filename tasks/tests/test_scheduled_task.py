@@ -0,0 +1,106 @@
+import importlib
+from datetime import timedelta
+from unittest import mock
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_q.models import Schedule
+from django_q.signing import SignedPackage
+
+from tasks.models import IntervalSchedule
+from tasks.services import interval_scheduler
+
+heartbeat_migration = importlib.import_module("tasks.migrations.0002_move_heartbeat_schedule")
+
+
+class ScheduledTaskViewTests(TestCase):
+    def test_new_schedule_is_due_now(self):
+        before = timezone.now()
+        response = self.client.post(reverse("tasks:scheduled_task"))
+
+        self.assertEqual(response.status_code, 200)
+        next_run = response.json()["next_run"]
+        self.assertIsNotNone(next_run)
+        self.assertGreaterEqual(timezone.datetime.fromisoformat(next_run), before)
+
+    def test_next_run_follows_last_run(self):
+        schedule, _ = interval_scheduler.create_heartbeat()
+        schedule.last_run = timezone.now() - timedelta(seconds=2)
+        schedule.save()
+
+        data = self.client.get(reverse("tasks:scheduled_task")).json()
+
+        self.assertEqual(
+            timezone.datetime.fromisoformat(data["next_run"]),
+            schedule.last_run + timedelta(seconds=5),
+        )
+
+    def test_repeats_reflect_enabled(self):
+        schedule, _ = interval_scheduler.create_heartbeat()
+        self.assertEqual(self.client.get(reverse("tasks:scheduled_task")).json()["repeats"], -1)
+
+        schedule.enabled = False
+        schedule.save()
+        data = self.client.get(reverse("tasks:scheduled_task")).json()
+
+        self.assertEqual(data["repeats"], 0)
+        self.assertIsNone(data["next_run"])
+
+
+class HeartbeatMigrationTests(TestCase):
+    def setUp(self):
+        self.schema_editor = mock.Mock(connection=connection)
+
+    def test_reverse_recreates_django_q_schedule(self):
+        interval_scheduler.create_heartbeat()
+
+        heartbeat_migration.restore_heartbeat(apps, self.schema_editor)
+
+        stock = Schedule.objects.get(name=interval_scheduler.HEARTBEAT_NAME)
+        self.assertEqual(stock.func, "tasks.tasks.scheduled_task")
+        self.assertEqual(stock.schedule_type, Schedule.MINUTES)
+        self.assertEqual(stock.repeats, -1)
+        self.assertFalse(IntervalSchedule.objects.exists())
+
+    def test_round_trip(self):
+        interval_scheduler.create_heartbeat()
+
+        heartbeat_migration.restore_heartbeat(apps, self.schema_editor)
+        heartbeat_migration.move_heartbeat(apps, self.schema_editor)
+
+        self.assertFalse(Schedule.objects.exists())
+        self.assertEqual(IntervalSchedule.objects.get().interval, 5)
+
+
+@override_settings(TASK_LANES_ENABLED=True)
+class IntervalSchedulerRoutingTests(TestCase):
+    def enqueued(self, **fields):
+        IntervalSchedule.objects.create(name="s", interval=30, **fields)
+        scheduler = interval_scheduler.IntervalScheduler()
+        scheduler.reload(0.0)
+        with (
+            mock.patch.object(interval_scheduler, "get_broker", side_effect=lambda key: key),
+            mock.patch.object(interval_scheduler, "bulk_enqueue") as bulk_enqueue,
+        ):
+            scheduler.run_due(0.0)
+        (broker, packs), _ = bulk_enqueue.call_args
+        return broker, SignedPackage.loads(packs[0])
+
+    def test_blank_cluster_uses_the_task_lane(self):
+        broker, task = self.enqueued(func="tasks.tasks.sample_task", cluster="")
+
+        self.assertEqual((broker, task["cluster"]), ("long", "long"))
+
+    def test_explicit_cluster_wins(self):
+        broker, task = self.enqueued(func="tasks.tasks.sample_task", cluster="io")
+
+        self.assertEqual((broker, task["cluster"]), ("io", "io"))
+
+    def test_task_without_lane_uses_default_cluster(self):
+        broker, task = self.enqueued(func="tasks.tasks.scheduled_task", cluster="")
+
+        self.assertIsNone(broker)
+        self.assertNotIn("cluster", task)
@@ -0,0 +1,120 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tasks.models import IntervalSchedule
+from tasks.serializers import ScheduleSerializer
+from tasks.services.schedules import upsert_schedules
+
+
+def schedule(name="tenant-1", func="tasks.tasks.scheduled_task", **fields):
+    return {"name": name, "func": func, "interval": 30, **fields}
+
+
+class ScheduleValidationTests(TestCase):
+    def errors(self, items):
+        serializer = ScheduleSerializer(data=items, many=True)
+        self.assertFalse(serializer.is_valid())
+        return serializer.errors
+
+    def test_accepts_shared_task(self):
+        serializer = ScheduleSerializer(data=[schedule()], many=True)
+
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_rejects_other_callables(self):
+        for func in ("os.system", "subprocess.call", "builtins.eval", "tasks.views.dumps"):
+            with self.subTest(func=func):
+                errors = self.errors([schedule(func=func)])
+                self.assertEqual(errors[0]["func"], [f"{func} is not a shared_task"])
+
+    def test_does_not_import_the_path(self):
+        self.errors([schedule(func="tasks.tests.never_imported.run")])
+
+        self.assertNotIn("tasks.tests.never_imported", sys.modules)
+
+    def test_rejects_duplicate_names(self):
+        errors = self.errors([schedule(), schedule()])
+
+        self.assertIn("unique", str(errors))
+
+
+class UpsertSchedulesTests(TestCase):
+    def upsert(self, items):
+        serializer = ScheduleSerializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        return upsert_schedules(serializer.validated_data)
+
+    def test_per_tenant_updates_take_bounded_queries(self):
+        items = [schedule(f"tenant-{i}", kwargs={"tenant": i}) for i in range(50)]
+        self.upsert(items)
+        before = IntervalSchedule.objects.get(name="tenant-0").updated
+        for i, item in enumerate(items):
+            item.update(interval=60, kwargs={"tenant": i, "region": "eu"})
+
+        # Lookup, insert, one bulk_update and one shared-value UPDATE, in a transaction
+        with self.assertNumQueries(6):
+            _, created, updated = self.upsert(items + [schedule("tenant-new")])
+
+        self.assertEqual((created, updated), (1, 50))
+        for i in (0, 49):
+            s = IntervalSchedule.objects.get(name=f"tenant-{i}")
+            self.assertEqual((s.interval, s.kwargs), (60, {"tenant": i, "region": "eu"}))
+            self.assertGreater(s.updated, before)
+
+    def test_unchanged_rows_are_not_written(self):
+        self.upsert([schedule()])
+
+        _, created, updated = self.upsert([schedule()])
+
+        self.assertEqual((created, updated), (0, 0))
+
+
+class ScheduleBulkViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("tasks:schedules")
+
+    def login(self, is_staff):
+        user = User.objects.create_user("user", password="password", is_staff=is_staff)
+        self.client.force_authenticate(user)
+
+    def test_anonymous_is_denied(self):
+        responses = {
+            "get": self.client.get(self.url),
+            "post": self.client.post(self.url, [schedule()], format="json"),
+            "delete": self.client.delete(self.url, {"names": ["tenant-1"]}, format="json"),
+        }
+
+        for method, response in responses.items():
+            with self.subTest(method=method):
+                self.assertEqual(response.status_code, 403)
+        self.assertFalse(IntervalSchedule.objects.exists())
+
+    def test_non_staff_is_denied(self):
+        self.login(is_staff=False)
+
+        response = self.client.post(self.url, [schedule()], format="json")
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_staff_upserts(self):
+        self.login(is_staff=True)
+
+        created = self.client.post(self.url, [schedule()], format="json")
+        updated = self.client.post(self.url, [schedule(interval=60)], format="json")
+
+        self.assertEqual(created.json()["created"], 1)
+        self.assertEqual(updated.json()["updated"], 1)
+        self.assertEqual(IntervalSchedule.objects.get().interval, 60)
+
+    def test_staff_cannot_schedule_arbitrary_functions(self):
+        self.login(is_staff=True)
+
+        response = self.client.post(self.url, [schedule(func="os.system")], format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IntervalSchedule.objects.exists())
@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from tasks import serializers
+from tasks.renderers import FastJSONRenderer, orjson
+from tasks.serializers import OutputSerializer
+
+TASK_ID = "0f1e2d3c4b5a69788796a5b4c3d2e1f0"
+WHEN = datetime(2026, 1, 1, 0, 0, 5, tzinfo=timezone.utc)
+
+# Response data per serializer, as the views build it, plus edge cases:
+# None values, absent optional fields, non-string keys and non-JSON types
+CASES = {
+    serializers.TaskResponseSerializer: [
+        {
+            "task_id": TASK_ID,
+            "status": "queued",
+            "message": "Task has been enqueued",
+            "input": {"message": "hi", "delay": 2},
+            "duplicate": False,
+        },
+        {"task_id": TASK_ID, "status": "queued", "message": "m", "input": {1: "int key"}},
+    ],
+    serializers.TaskBatchResponseSerializer: [
+        {"task_ids": [TASK_ID, 42], "status": "queued", "message": "m", "count": 2},
+        {"task_ids": [], "status": "queued", "message": "m", "count": "3"},
+    ],
+    serializers.TaskResultSerializer: [
+        {"task_id": TASK_ID, "status": "success", "result": {"rows": [1, 2], "at": WHEN}},
+        {"task_id": TASK_ID, "status": "failed", "result": {"error": "Traceback ..."}},
+        {"task_id": TASK_ID, "status": "pending", "result": None},
+        {"task_id": TASK_ID, "status": "success", "result": {"value": Decimal("1.5")}},
+    ],
+    serializers.TaskResultsResponseSerializer: [
+        {
+            "results": [
+                {"task_id": TASK_ID, "status": "success", "result": {"value": 3}},
+                {"task_id": "other", "status": "pending", "result": None},
+            ]
+        },
+        {"results": []},
+    ],
+    serializers.StatsSerializer: [
+        {
+            "result_cache": {"hits": 3, "misses": 1, "hit_ratio": 0.75},
+            "mjml_cache": {"size": 2},
+            "email_text_cache": {},
+            "idempotency": {"enqueued": 1, "suppressed_duplicates": 0},
+            "memoized_tasks": {"tasks.tasks.sample_task": {"hits": 1}},
+        }
+    ],
+    serializers.ScheduledTaskStatusSerializer: [
+        {
+            "exists": True,
+            "name": "scheduled_task_5s",
+            "next_run": WHEN.isoformat(),
+            "schedule_type": "every 5 seconds",
+            "repeats": -1,
+            "success_count": 12,
+            "last_run": None,
+        },
+        {"exists": True, "name": "scheduled_task_5s", "next_run": WHEN, "last_run": WHEN},
+        {"exists": False, "message": "Scheduled task not found."},
+    ],
+    serializers.ScheduledTaskResponseSerializer: [
+        {
+            "status": "success",
+            "message": "Scheduled task updated",
+            "schedule_id": 1,
+            "next_run": WHEN.isoformat(),
+            "schedule_type": "every 5 seconds",
+        },
+        {"status": "success", "message": "Scheduled task deleted"},
+        {"status": "success", "message": "m", "schedule_id": 1, "next_run": None},
+    ],
+    serializers.ScheduleBulkResponseSerializer: [
+        {"created": 1, "updated": 1, "schedules": [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]},
+        {"created": 0, "updated": 0, "schedules": [None, {3: "int key"}]},
+    ],
+    serializers.ScheduleDeleteResponseSerializer: [{"deleted": 3}, {"deleted": "4"}],
+    serializers.EmailResponseSerializer: [
+        {"task_id": TASK_ID, "status": "queued", "message": "m", "duplicate": True},
+        {"task_id": TASK_ID, "status": "queued", "message": "m"},
+    ],
+}
+
+
+def output_serializers(cls=OutputSerializer):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from output_serializers(subclass)
+
+
+class OutputSerializerTests(SimpleTestCase):
+    def test_every_response_serializer_has_cases(self):
+        self.assertEqual(set(output_serializers()), set(CASES))
+
+    def test_dump_matches_data(self):
+        for cls, cases in CASES.items():
+            for data in cases:
+                with self.subTest(serializer=cls.__name__, data=data):
+                    self.assertEqual(cls.dump(data), cls(data).data)
+
+    def test_dump_is_repeatable(self):
+        # The plan is built on the first call and reused
+        data = CASES[serializers.TaskResultSerializer][0]
+
+        self.assertEqual(
+            serializers.TaskResultSerializer.dump(data),
+            serializers.TaskResultSerializer.dump(data),
+        )
+
+    def test_missing_required_field(self):
+        with self.assertRaises(KeyError):
+            serializers.TaskResultSerializer.dump({"task_id": TASK_ID, "status": "success"})
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_matches_json_renderer(self):
+        renderer = FastJSONRenderer()
+        for cls, cases in CASES.items():
+            for data in cases:
+                with self.subTest(serializer=cls.__name__, data=data):
+                    body = renderer.render(cls.dump(data))
+                    expected = super(FastJSONRenderer, renderer).render(cls(data).data)
+                    self.assertEqual(body, expected)
+
+    def test_escapes_line_separators(self):
+        body = FastJSONRenderer().render({"text": "a\u2028b\u2029c"})
+
+        self.assertEqual(body, b'{"text":"a\\u2028b\\u2029c"}')
+
+    def test_orjson_is_installed(self):
+        # A declared dependency: without it every response takes the json path
+        self.assertIsNotNone(orjson)
@@ -0,0 +1,95 @@
+import gzip
+import json
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_q.models import Task
+
+from tasks import views
+from tasks.services import result_storage
+
+LARGE = {"rows": [{"id": i, "name": f"item-{i}"} for i in range(2000)]}
+
+
+async def add_task(task_id, result):
+    now = timezone.now()
+    await Task.objects.acreate(
+        id=task_id,
+        name=task_id,
+        func="tasks.tasks.sample_task",
+        result=result,
+        started=now,
+        stopped=now,
+        success=True,
+    )
+
+
+class AsgiStreamingTests(TestCase):
+    """Under ASGI the streaming endpoints must not be read whole before sending."""
+
+    def setUp(self):
+        self.client = AsyncClient()
+        caches[settings.TASK_RESULT_CACHE].clear()
+        self.addCleanup(caches[settings.TASK_RESULT_CACHE].clear)
+
+    @override_settings(TASK_RESULTS_CHUNK_SIZE=1)
+    async def test_results_are_sent_per_chunk(self):
+        lookups = []
+
+        def get_results(chunk):
+            lookups.append(chunk)
+            return {}
+
+        with mock.patch.object(views, "get_results", get_results):
+            response = await self.client.get(
+                reverse("tasks:task_results"), {"task_id": "a,b,c"}
+            )
+            self.assertTrue(response.is_async)
+
+            parts = []
+            async for part in response.streaming_content:
+                parts.append(part)
+                if len(parts) == 2:
+                    # The first item is out before the second chunk is looked up
+                    self.assertEqual(lookups, [("a",)])
+
+        body = json.loads(b"".join(parts))
+        self.assertEqual([item["task_id"] for item in body["results"]], ["a", "b", "c"])
+
+    async def download(self, accept_encoding):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with override_settings(
+            TASK_RESULT_STORE_DIR=directory.name,
+            TASK_RESULT_COMPRESS_BYTES=1024,
+            TASK_RESULT_SPILL_BYTES=16 * 1024,
+        ):
+            await add_task("spilled", result_storage.encode(LARGE, "spill"))
+            response = await self.client.get(
+                reverse("tasks:task_result_download"),
+                {"task_id": "spilled"},
+                headers={"Accept-Encoding": accept_encoding},
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_async)
+            parts = [part async for part in response.streaming_content]
+        return response, parts
+
+    async def test_download_streams_the_stored_file(self):
+        with mock.patch("django.http.FileResponse.block_size", 4096):
+            response, parts = await self.download("gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(json.loads(gzip.decompress(b"".join(parts))), LARGE)
+
+    async def test_download_streams_decompressed(self):
+        response, parts = await self.download("identity")
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(json.loads(b"".join(parts)), LARGE)
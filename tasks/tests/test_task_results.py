@@ -0,0 +1,171 @@
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_q.models import Task
+
+from tasks.services import task_results
+from tasks.services.task_results import MISSING, cache_key, get_results
+
+
+def add_task(task_id, name, success=True, result=None):
+    now = timezone.now()
+    Task.objects.create(
+        id=task_id,
+        name=name,
+        func="tasks.tasks.sample_task",
+        result=result,
+        started=now,
+        stopped=now,
+        success=success,
+    )
+
+
+class ResultCacheMixin:
+    def setUp(self):
+        self.cache = caches[settings.TASK_RESULT_CACHE]
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+
+
+class GetResultsTests(ResultCacheMixin, TestCase):
+    def test_successful_results_are_cached(self):
+        add_task("a" * 32, "alpha", result={"value": 1})
+
+        self.assertEqual(get_results(["a" * 32]), {"a" * 32: (True, {"value": 1})})
+        Task.objects.all().delete()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_results(["a" * 32]), {"a" * 32: (True, {"value": 1})})
+
+    def test_failed_results_are_not_cached(self):
+        add_task("f" * 32, "failed", success=False, result="Traceback")
+
+        self.assertEqual(get_results(["f" * 32]), {"f" * 32: (False, "Traceback")})
+        self.assertIsNone(self.cache.get(cache_key("f" * 32)))
+
+    def test_missing_ids_are_cached_as_missing(self):
+        self.assertEqual(get_results(["unknown"]), {})
+        self.assertEqual(self.cache.get(cache_key("unknown")), MISSING)
+
+        add_task("unknown", "late", result=2)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_results(["unknown"]), {})
+        self.assertEqual(get_results(["unknown"], negative=False), {"unknown": (True, 2)})
+
+    def test_looks_up_tasks_by_name(self):
+        add_task("b" * 32, "bravo-lima", result=3)
+        add_task("c" * 32, "charlie-mike", result=4)
+
+        found = get_results(["bravo-lima", "c" * 32, "nobody"])
+
+        self.assertEqual(found, {"bravo-lima": (True, 3), "c" * 32: (True, 4)})
+
+    def test_counts_hits_and_misses(self):
+        task_results.stats.reset()
+        self.addCleanup(task_results.stats.reset)
+        add_task("d" * 32, "delta", result=5)
+
+        get_results(["d" * 32, "nobody"])
+        get_results(["d" * 32, "nobody"])
+
+        stats = task_results.stats.as_dict()
+        self.assertEqual((stats["hits"], stats["negative_hits"], stats["misses"]), (1, 1, 2))
+        self.assertEqual(stats["db_queries"], 1)
+
+
+class TaskResultViewTests(ResultCacheMixin, TestCase):
+    def get(self, task_id):
+        return self.client.get(reverse("tasks:task_result"), {"task_id": task_id})
+
+    def test_success(self):
+        add_task("a" * 32, "alpha", result={"rows": [1]})
+
+        response = self.get("a" * 32)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), {"task_id": "a" * 32, "status": "success", "result": {"rows": [1]}}
+        )
+
+    def test_non_dict_result(self):
+        add_task("a" * 32, "alpha", result=3)
+
+        self.assertEqual(self.get("a" * 32).json()["result"], {"value": 3})
+
+    def test_failed(self):
+        add_task("f" * 32, "failed", success=False, result="Traceback")
+
+        response = self.get("f" * 32)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {"task_id": "f" * 32, "status": "failed", "result": {"error": "Traceback"}},
+        )
+
+    def test_by_name(self):
+        add_task("a" * 32, "alpha-bravo", result=1)
+
+        self.assertEqual(self.get("alpha-bravo").json()["status"], "success")
+
+    def test_unknown(self):
+        self.assertEqual(self.get("nobody").status_code, 404)
+
+
+@override_settings(TASK_RESULTS_CHUNK_SIZE=2)
+class TaskResultsViewTests(ResultCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("tasks:task_results")
+        add_task("a" * 32, "alpha", result={"rows": [1]})
+        add_task("f" * 32, "failed", success=False, result="Traceback")
+
+    def results(self, response):
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b"".join(response.streaming_content))["results"]
+
+    def test_get_keeps_request_order_across_chunks(self):
+        response = self.client.get(self.url, {"task_id": ["nobody," + "f" * 32, "a" * 32]})
+
+        self.assertEqual(
+            self.results(response),
+            [
+                {"task_id": "nobody", "status": "pending", "result": None},
+                {"task_id": "f" * 32, "status": "failed", "result": {"error": "Traceback"}},
+                {"task_id": "a" * 32, "status": "success", "result": {"rows": [1]}},
+            ],
+        )
+
+    def test_post_deduplicates(self):
+        response = self.client.post(
+            self.url, {"task_ids": ["a" * 32, "alpha", "a" * 32]}, content_type="application/json"
+        )
+
+        self.assertEqual(
+            [(item["task_id"], item["status"]) for item in self.results(response)],
+            [("a" * 32, "success"), ("alpha", "success")],
+        )
+
+    def test_one_query_per_chunk(self):
+        task_ids = ",".join(f"missing-{i}" for i in range(5))
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {"task_id": task_ids})
+            self.assertEqual(len(self.results(response)), 5)
+
+    def test_rejects_empty_and_oversized_requests(self):
+        task_ids = [f"task-{i}" for i in range(settings.TASK_RESULTS_MAX_IDS + 1)]
+        cases = {
+            "empty": self.client.get(self.url),
+            "oversized": self.client.post(
+                self.url, {"task_ids": task_ids}, content_type="application/json"
+            ),
+        }
+
+        for case, response in cases.items():
+            with self.subTest(case=case):
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.core import mail
+from django.template import engines
+from django.test import SimpleTestCase
+
+from tasks.services import email_service, timings
+from tasks.services.email_service import EmailNotificationService
+from tasks.services.timings import StageTimings, record, stage
+
+
+class StageTimingsTests(SimpleTestCase):
+    def test_nested_stages_are_counted_once(self):
+        clock = iter([0.0, 1.0, 3.0, 4.0, 10.0, 10.5])
+        recorded = StageTimings()
+
+        with mock.patch.object(timings.time, "perf_counter", lambda: next(clock)):
+            with recorded.stage("render"):
+                with recorded.stage("mjml_compile"):
+                    pass
+            with recorded.stage("render"):
+                pass
+
+        self.assertEqual(recorded.totals, {"mjml_compile": 2.0, "render": 2.5})
+        self.assertEqual(recorded.as_ms(), {"mjml_compile": 2000.0, "render": 2500.0})
+
+    def test_stage_outside_record_is_a_noop(self):
+        with stage("render"):
+            pass
+
+        with record() as recorded:
+            with stage("render"):
+                pass
+
+        self.assertEqual(list(recorded.totals), ["render"])
+
+
+class SendEmailTimingsTests(SimpleTestCase):
+    def test_returns_and_observes_every_stage(self):
+        template = engines["django"].from_string("<p>Hello {{ name }}</p>")
+
+        with (
+            mock.patch.object(EmailNotificationService, "get_template", return_value=template),
+            mock.patch.object(email_service.metrics, "observe_stages") as observe_stages,
+        ):
+            stages_ms = EmailNotificationService().send_email(
+                "Hi", "emails/welcome.html", ["a@example.com"], {"name": "Ada"}
+            )
+
+        self.assertEqual(
+            set(stages_ms), {"template_load", "render", "html_to_text", "delivery"}
+        )
+        self.assertTrue(all(ms >= 0 for ms in stages_ms.values()))
+        observe_stages.assert_called_once()
+        self.assertEqual(observe_stages.call_args.args[0], "email")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Hello Ada", mail.outbox[0].body)
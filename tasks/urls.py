@@ -1,12 +1,35 @@
 from django.urls import path
 
-from .views import EmailView, ScheduledTaskView, TaskResultView, TaskView
+from .views import (
+    EmailView,
+    ScheduleBulkView,
+    ScheduledTaskView,
+    StatsView,
+    TaskBatchView,
+    TaskResultDownloadView,
+    TaskResultStreamView,
+    TaskResultView,
+    TaskResultsView,
+    TaskView,
+)
 
 app_name = "tasks"
 
 urlpatterns = [
     path("task/", TaskView.as_view(), name="task"),
+    path("task/batch/", TaskBatchView.as_view(), name="task_batch"),
     path("task/result/", TaskResultView.as_view(), name="task_result"),
+    path(
+        "task/result/download/",
+        TaskResultDownloadView.as_view(),
+        name="task_result_download",
+    ),
+    path(
+        "task/result/stream/", TaskResultStreamView.as_view(), name="task_result_stream"
+    ),
+    path("task/results/", TaskResultsView.as_view(), name="task_results"),
     path("scheduled-task/", ScheduledTaskView.as_view(), name="scheduled_task"),
+    path("schedules/", ScheduleBulkView.as_view(), name="schedules"),
     path("email/", EmailView.as_view(), name="email"),
+    path("stats/", StatsView.as_view(), name="stats"),
 ]
@@ -1,58 +1,219 @@
-from django_q.models import Schedule
-from django_q.tasks import result, schedule
-from drf_spectacular.utils import extend_schema
+import asyncio
+from itertools import batched
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.views import APIView
 
+from .models import IntervalSchedule
+from .pagination import ScheduleCursorPagination
+from .renderers import EventStreamRenderer, FastJSONRenderer, dumps, format_event
 from .serializers import (
     EmailRequestSerializer,
     EmailResponseSerializer,
+    IdempotentTaskRequestSerializer,
+    ScheduleBulkResponseSerializer,
+    ScheduleDeleteResponseSerializer,
+    ScheduleDeleteSerializer,
+    SchedulePageSerializer,
+    ScheduleSerializer,
     ScheduledTaskResponseSerializer,
     ScheduledTaskStatusSerializer,
+    StatsSerializer,
+    TaskBatchResponseSerializer,
     TaskRequestSerializer,
     TaskResponseSerializer,
+    TaskResultQuerySerializer,
     TaskResultSerializer,
+    TaskResultsRequestSerializer,
+    TaskResultsResponseSerializer,
 )
+from .services.result_waiter import get_waiter
+from .services.schedules import delete_schedules, upsert_schedules
+from .services import (
+    idempotency,
+    interval_scheduler,
+    memo,
+    metrics,
+    result_storage,
+    task_results,
+)
+from .services.email_service import text_cache
+from .services.task_results import aget_result, get_result, get_results, result_item
 from .tasks import sample_task, send_email_task
+from .templatetags.mjml import compiled_cache
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView with coroutine handlers. Under ASGI a request that is waiting on
+    a task result does not hold a worker thread.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication, permissions and throttling may touch the database
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+IDEMPOTENCY_KEY_HEADER = OpenApiParameter(
+    name="Idempotency-Key",
+    type=str,
+    location=OpenApiParameter.HEADER,
+    required=False,
+    description="Repeats with the same key within the idempotency window return the first task",
+)
+
+
+def idempotency_key(request, validated_data):
+    return request.headers.get("Idempotency-Key") or validated_data.get("idempotency_key")
+
+
+def idempotency_conflict(e):
+    return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+
+
+async def aiterate(iterator):
+    """Yield the items of a blocking iterator, reading each in a worker thread."""
+    done = object()
+    while (item := await sync_to_async(next)(iterator, done)) is not done:
+        yield item
 
 
-class TaskView(APIView):
+def streamed(request, response):
+    """
+    Under ASGI, Django reads a streaming response's sync iterator whole before
+    sending anything. Give it an async iterator there, so every chunk goes out
+    as soon as it is read. Under WSGI the sync iterator streams as it is.
+    """
+    if isinstance(request._request, ASGIRequest) and not response.is_async:
+        response.streaming_content = aiterate(iter(response.streaming_content))
+    return response
+
+
+def accepts_encoding(request, coding: str) -> bool:
+    """Whether Accept-Encoding allows ``coding``: listed or ``*``, with a q-value above 0."""
+    qualities = {}
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+    return qualities.get(coding, qualities.get("*", 0.0)) > 0
+
+
+class TaskView(AsyncAPIView):
     @extend_schema(
         summary="Run a test task",
         description="Enqueue a sample task using django-q2 and return the task ID",
-        request=TaskRequestSerializer,
-        responses={200: TaskResponseSerializer, 400: None},
+        parameters=[IDEMPOTENCY_KEY_HEADER],
+        request=IdempotentTaskRequestSerializer,
+        responses={200: TaskResponseSerializer, 400: None, 409: None},
     )
-    def post(self, request):
-        serializer = TaskRequestSerializer(data=request.data)
+    async def post(self, request):
+        serializer = IdempotentTaskRequestSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         message = serializer.validated_data["message"]
         delay = serializer.validated_data["delay"]
 
-        task_id = sample_task.delay(message, delay)
+        try:
+            task_id, created = await sample_task.adelay_once(
+                message,
+                delay,
+                idempotency_key=idempotency_key(request, serializer.validated_data),
+            )
+        except idempotency.IdempotencyConflict as e:
+            return idempotency_conflict(e)
 
         response_data = {
             "task_id": task_id,
             "status": "queued",
-            "message": "Task has been enqueued",
+            "message": "Task has been enqueued" if created else "Task was already enqueued",
             "input": {"message": message, "delay": delay},
+            "duplicate": not created,
+        }
+
+        return Response(TaskResponseSerializer.dump(response_data), status=status.HTTP_200_OK)
+
+
+class TaskBatchView(APIView):
+    @extend_schema(
+        summary="Run a batch of test tasks",
+        description="Enqueue many sample tasks with chunked broker writes and return all task IDs",
+        request=TaskRequestSerializer(many=True),
+        responses={200: TaskBatchResponseSerializer, 400: None},
+    )
+    def post(self, request):
+        serializer = TaskRequestSerializer(
+            data=request.data, many=True, max_length=settings.TASK_BATCH_MAX_SIZE
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        task_ids = sample_task.delay_many(serializer.validated_data)
+
+        response_data = {
+            "task_ids": task_ids,
+            "status": "queued",
+            "message": f"{len(task_ids)} tasks have been enqueued",
+            "count": len(task_ids),
         }
 
-        response_serializer = TaskResponseSerializer(response_data)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return Response(TaskBatchResponseSerializer.dump(response_data), status=status.HTTP_200_OK)
 
 
-class TaskResultView(APIView):
+class TaskResultView(AsyncAPIView):
     @extend_schema(
         summary="Get task result",
-        description="Retrieve the result of a task by its ID",
+        description=(
+            "Retrieve the result of a task by its ID. With wait set, the request "
+            "is held open until the result lands or the timeout expires."
+        ),
         responses={200: TaskResultSerializer, 400: None, 404: None},
-        parameters=[],
+        parameters=[TaskResultQuerySerializer],
     )
-    def get(self, request):
+    async def get(self, request):
         task_id = request.query_params.get("task_id")
 
         if not task_id:
@@ -61,71 +222,253 @@ class TaskResultView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        task_result = result(task_id)
+        query = TaskResultQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        wait = query.validated_data.get("wait")
 
-        if task_result is None:
+        found = await aget_result(task_id)
+        if found is None and wait:
+            found = await get_waiter().wait(task_id, wait)
+        if found is None:
             return Response(
                 {"error": "Task not found or not yet completed"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        response_data = {"task_id": task_id, "status": "success", "result": task_result}
+        return Response(
+            TaskResultSerializer.dump(result_item(task_id, found)), status=status.HTTP_200_OK
+        )
+
+
+class TaskResultDownloadView(APIView):
+    @extend_schema(
+        summary="Download task result",
+        description=(
+            "The full result of a successful task as JSON. Results spilled to the "
+            "file store are streamed as stored, with Content-Encoding: gzip."
+        ),
+        responses={(200, "application/json"): OpenApiTypes.OBJECT, 400: None, 404: None},
+        parameters=[OpenApiParameter("task_id", OpenApiTypes.STR, required=True)],
+    )
+    def get(self, request):
+        task_id = request.query_params.get("task_id")
+        if not task_id:
+            return Response(
+                {"error": "task_id query parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        found = get_result(task_id)
+        if found is None or not found[0]:
+            return Response(
+                {"error": "Task not found, not yet completed or failed"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        value = found[1]
+        if isinstance(value, result_storage.StoredResult) and value.codec == "file":
+            path = result_storage.store_path(value.digest)
+            if not path.exists():
+                return Response(
+                    {"error": "Stored result file is missing"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            if accepts_encoding(request, "gzip"):
+                response = FileResponse(open(path, "rb"), content_type="application/json")
+                response["Content-Encoding"] = "gzip"
+            else:
+                response = StreamingHttpResponse(
+                    result_storage.iter_decompressed(path), content_type="application/json"
+                )
+            patch_vary_headers(response, ["Accept-Encoding"])
+            return streamed(request, response)
+        return JsonResponse(
+            result_storage.load(value), encoder=JSONEncoder, safe=False
+        )
+
+
+class TaskResultStreamView(AsyncAPIView):
+    renderer_classes = [FastJSONRenderer, EventStreamRenderer]
+
+    @extend_schema(
+        summary="Stream task result",
+        description=(
+            "Server-Sent Events stream that emits a single result event once the "
+            "task finishes, keepalive comments while waiting and a timeout event "
+            "after wait seconds."
+        ),
+        responses={(200, "text/event-stream"): TaskResultSerializer, 400: None},
+        parameters=[TaskResultQuerySerializer],
+    )
+    async def get(self, request):
+        query = TaskResultQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        task_id = query.validated_data["task_id"]
+        wait = query.validated_data.get("wait", settings.TASK_RESULT_MAX_WAIT)
+
+        response = StreamingHttpResponse(
+            self.events(task_id, wait), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def events(self, task_id, wait):
+        waiter = get_waiter()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+
+        while (remaining := deadline - loop.time()) > 0:
+            found = await waiter.wait(
+                task_id, min(remaining, settings.TASK_RESULT_SSE_KEEPALIVE)
+            )
+            if found is not None:
+                data = TaskResultSerializer.dump(result_item(task_id, found))
+                yield format_event("result", data)
+                return
+            yield ": keepalive\n\n"
+
+        yield format_event("timeout", {"task_id": task_id, "status": "pending"})
+
 
-        response_serializer = TaskResultSerializer(response_data)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+class TaskResultsView(APIView):
+    @extend_schema(
+        summary="Get many task results",
+        description=(
+            "Retrieve the results of many tasks at once. Unknown or unfinished "
+            "tasks are reported as pending. Pass task_id repeatedly or comma separated."
+        ),
+        responses={200: TaskResultsResponseSerializer, 400: None},
+        parameters=[
+            OpenApiParameter("task_id", OpenApiTypes.STR, many=True, required=True),
+        ],
+    )
+    def get(self, request):
+        task_ids = [
+            task_id
+            for value in request.query_params.getlist("task_id")
+            for task_id in value.split(",")
+            if task_id
+        ]
+        return self.lookup({"task_ids": task_ids})
+
+    @extend_schema(
+        summary="Get many task results",
+        description="Retrieve the results of many tasks at once from a JSON body",
+        request=TaskResultsRequestSerializer,
+        responses={200: TaskResultsResponseSerializer, 400: None},
+    )
+    def post(self, request):
+        return self.lookup(request.data)
+
+    def lookup(self, data):
+        serializer = TaskResultsRequestSerializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Deduplicate while keeping request order
+        task_ids = list(dict.fromkeys(serializer.validated_data["task_ids"]))
+        return streamed(
+            self.request,
+            StreamingHttpResponse(self.stream_results(task_ids), content_type="application/json"),
+        )
+
+    def stream_results(self, task_ids):
+        # One query per chunk, so memory stays bounded for long id lists
+        separator = ""
+        yield '{"results":['
+        for chunk in batched(task_ids, settings.TASK_RESULTS_CHUNK_SIZE):
+            found = get_results(chunk)
+            for task_id in chunk:
+                item = TaskResultSerializer.dump(result_item(task_id, found.get(task_id)))
+                yield separator + dumps(item)
+                separator = ","
+        yield "]}"
+
+
+class StatsView(APIView):
+    @extend_schema(
+        summary="Get cache statistics",
+        description=(
+            "Hit ratios and latency of this process's result, MJML and text caches, "
+            "its suppressed duplicate enqueues and memoized task hits"
+        ),
+        responses={200: StatsSerializer},
+    )
+    def get(self, request):
+        response_data = {
+            "result_cache": task_results.stats.as_dict(),
+            "mjml_cache": compiled_cache.stats(),
+            "email_text_cache": text_cache.stats(),
+            "idempotency": idempotency.stats.as_dict(),
+            "memoized_tasks": memo.stats.as_dict(),
+        }
+
+        return Response(StatsSerializer.dump(response_data), status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    @extend_schema(
+        summary="Prometheus metrics",
+        description=(
+            "Enqueue and execution metrics of the web and cluster processes, "
+            "queue depth per lane and cluster queue_limit saturation in the "
+            "Prometheus text format. Requires prometheus_client."
+        ),
+        responses={(200, "text/plain"): OpenApiTypes.STR, 503: None},
+    )
+    def get(self, request):
+        if not metrics.enabled:
+            return HttpResponse(
+                "Metrics are disabled or prometheus_client is not installed\n",
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content_type="text/plain",
+            )
+        body, content_type = metrics.render()
+        return HttpResponse(body, content_type=content_type)
 
 
 class ScheduledTaskView(APIView):
-    SCHEDULE_NAME = "scheduled_task_5s"
+    SCHEDULE_NAME = interval_scheduler.HEARTBEAT_NAME
 
     @extend_schema(
         summary="Create or update scheduled task",
-        description="Create a scheduled task that runs every 5 seconds",
+        description=(
+            "Create a scheduled task that runs every 5 seconds. It is run by "
+            "manage.py run_interval_scheduler."
+        ),
+        request=None,
         responses={200: ScheduledTaskResponseSerializer},
     )
     def post(self, request):
-        existing_schedule = Schedule.objects.filter(name=self.SCHEDULE_NAME).first()
-
-        if existing_schedule:
-            existing_schedule.func = "tasks.tasks.scheduled_task"
-            existing_schedule.schedule_type = Schedule.MINUTES
-            existing_schedule.minutes = 5 / 60
-            existing_schedule.repeats = -1
-            existing_schedule.save()
-            schedule_id = existing_schedule.id
-            message = "Scheduled task updated"
-        else:
-            schedule_id = schedule(
-                "tasks.tasks.scheduled_task",
-                name=self.SCHEDULE_NAME,
-                schedule_type=Schedule.MINUTES,
-                minutes=5 / 60,
-                repeats=-1,
-            )
-            message = "Scheduled task created"
-
-        schedule_obj = Schedule.objects.get(id=schedule_id)
+        schedule_obj, created = interval_scheduler.create_heartbeat()
+        next_run = interval_scheduler.next_run(schedule_obj)
 
         response_data = {
             "status": "success",
-            "message": message,
-            "schedule_id": schedule_id,
-            "next_run": (
-                schedule_obj.next_run.isoformat() if schedule_obj.next_run else None
-            ),
-            "schedule_type": "every 5 seconds",
+            "message": "Scheduled task created" if created else "Scheduled task updated",
+            "schedule_id": schedule_obj.id,
+            "next_run": next_run.isoformat() if next_run else None,
+            "schedule_type": f"every {schedule_obj.interval} seconds",
         }
 
-        response_serializer = ScheduledTaskResponseSerializer(response_data)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return Response(
+            ScheduledTaskResponseSerializer.dump(response_data), status=status.HTTP_200_OK
+        )
 
     @extend_schema(
         summary="Get scheduled task status",
-        description="Get information about the scheduled task",
+        description=(
+            "Get information about the scheduled task. Run counts and times are "
+            "checkpointed every TASK_SCHEDULER_CHECKPOINT seconds."
+        ),
         responses={200: ScheduledTaskStatusSerializer},
     )
     def get(self, request):
-        schedule_obj = Schedule.objects.filter(name=self.SCHEDULE_NAME).first()
+        schedule_obj = IntervalSchedule.objects.filter(name=self.SCHEDULE_NAME).first()
 
         if not schedule_obj:
             response_data = {
@@ -133,22 +476,22 @@ class ScheduledTaskView(APIView):
                 "message": "Scheduled task not found. Use POST /api/scheduled-task/ to create it.",
             }
         else:
+            next_run = interval_scheduler.next_run(schedule_obj)
             response_data = {
                 "exists": True,
                 "name": schedule_obj.name,
-                "next_run": (
-                    schedule_obj.next_run.isoformat() if schedule_obj.next_run else None
-                ),
-                "schedule_type": f"every {int(schedule_obj.minutes * 60)} seconds",
-                "repeats": schedule_obj.repeats,
-                "success_count": schedule_obj.success_count,
+                "next_run": next_run.isoformat() if next_run else None,
+                "schedule_type": f"every {schedule_obj.interval} seconds",
+                "repeats": interval_scheduler.repeats(schedule_obj),
+                "success_count": schedule_obj.run_count,
                 "last_run": (
                     schedule_obj.last_run.isoformat() if schedule_obj.last_run else None
                 ),
             }
 
-        response_serializer = ScheduledTaskStatusSerializer(response_data)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return Response(
+            ScheduledTaskStatusSerializer.dump(response_data), status=status.HTTP_200_OK
+        )
 
     @extend_schema(
         summary="Delete scheduled task",
@@ -156,30 +499,104 @@ class ScheduledTaskView(APIView):
         responses={200: ScheduledTaskResponseSerializer, 404: None},
     )
     def delete(self, request):
-        schedule_obj = Schedule.objects.filter(name=self.SCHEDULE_NAME).first()
+        deleted, _ = IntervalSchedule.objects.filter(name=self.SCHEDULE_NAME).delete()
 
-        if not schedule_obj:
+        if not deleted:
             return Response(
                 {"status": "error", "message": "Scheduled task not found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        schedule_obj.delete()
-
         response_data = {"status": "success", "message": "Scheduled task deleted"}
 
-        response_serializer = ScheduledTaskResponseSerializer(response_data)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return Response(
+            ScheduledTaskResponseSerializer.dump(response_data), status=status.HTTP_200_OK
+        )
+
 
+class ScheduleBulkView(APIView):
+    # Schedules run code in the cluster, so only staff manage them
+    permission_classes = [IsAdminUser]
 
-class EmailView(APIView):
+    @extend_schema(
+        summary="List schedules",
+        description=(
+            "Interval schedules ordered by name, with cursor pagination. Follow "
+            "next/previous; there is no total count."
+        ),
+        parameters=[
+            OpenApiParameter("cursor", OpenApiTypes.STR),
+            OpenApiParameter("page_size", OpenApiTypes.INT),
+            OpenApiParameter("name_prefix", OpenApiTypes.STR, description="e.g. a tenant prefix"),
+        ],
+        responses={200: SchedulePageSerializer},
+    )
+    def get(self, request):
+        queryset = IntervalSchedule.objects.all()
+        if name_prefix := request.query_params.get("name_prefix"):
+            queryset = queryset.filter(name__startswith=name_prefix)
+        paginator = ScheduleCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(ScheduleSerializer(page, many=True).data)
+
+    @extend_schema(
+        summary="Create or update schedules",
+        description=(
+            "Upsert many interval schedules by name in one transaction. Run by "
+            "manage.py run_interval_scheduler."
+        ),
+        request=ScheduleSerializer(many=True),
+        responses={200: ScheduleBulkResponseSerializer, 400: None},
+    )
+    def post(self, request):
+        serializer = ScheduleSerializer(
+            data=request.data,
+            many=True,
+            max_length=settings.SCHEDULES_BULK_MAX_SIZE,
+            context={},
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        schedules, created, updated = upsert_schedules(serializer.validated_data)
+
+        response_data = {
+            "created": created,
+            "updated": updated,
+            "schedules": [{"id": s.id, "name": s.name} for s in schedules],
+        }
+
+        return Response(
+            ScheduleBulkResponseSerializer.dump(response_data), status=status.HTTP_200_OK
+        )
+
+    @extend_schema(
+        summary="Delete schedules",
+        description="Delete many interval schedules by name",
+        request=ScheduleDeleteSerializer,
+        responses={200: ScheduleDeleteResponseSerializer, 400: None},
+    )
+    def delete(self, request):
+        serializer = ScheduleDeleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        deleted = delete_schedules(serializer.validated_data["names"])
+
+        return Response(
+            ScheduleDeleteResponseSerializer.dump({"deleted": deleted}), status=status.HTTP_200_OK
+        )
+
+
+class EmailView(AsyncAPIView):
     @extend_schema(
         summary="Send email",
         description="Enqueue an email task to send an email using MJML template",
+        parameters=[IDEMPOTENCY_KEY_HEADER],
         request=EmailRequestSerializer,
-        responses={200: EmailResponseSerializer, 400: None},
+        responses={200: EmailResponseSerializer, 400: None, 409: None},
     )
-    def post(self, request):
+    async def post(self, request):
         serializer = EmailRequestSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -190,19 +607,25 @@ class EmailView(APIView):
         context = serializer.validated_data["context"]
         service_type = serializer.validated_data.get("service_type")
 
-        task_id = send_email_task.delay(
-            subject=subject,
-            html_template_path=html_template_path,
-            to_email=to_email,
-            context=context,
-            service_type=service_type,
-        )
+        try:
+            task_id, created = await send_email_task.adelay_once(
+                subject=subject,
+                html_template_path=html_template_path,
+                to_email=to_email,
+                context=context,
+                service_type=service_type,
+                idempotency_key=idempotency_key(request, serializer.validated_data),
+            )
+        except idempotency.IdempotencyConflict as e:
+            return idempotency_conflict(e)
 
         response_data = {
             "task_id": task_id,
             "status": "queued",
-            "message": "Email task has been enqueued",
+            "message": (
+                "Email task has been enqueued" if created else "Email task was already enqueued"
+            ),
+            "duplicate": not created,
         }
 
-        response_serializer = EmailResponseSerializer(response_data)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return Response(EmailResponseSerializer.dump(response_data), status=status.HTTP_200_OK)